@@ -0,0 +1,31 @@
+from django.contrib import admin
+from .models import DailyCategorySales, DailyOrderStats, DailyProductSales
+
+
+class RollupAdmin(admin.ModelAdmin):
+    """Tabel rollup hanya diisi oleh analytics.rollup / backfill_analytics."""
+    date_hierarchy = 'date'
+    list_filter = ('status',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyOrderStats)
+class DailyOrderStatsAdmin(RollupAdmin):
+    list_display = ('date', 'status', 'orders', 'units', 'revenue')
+
+
+@admin.register(DailyCategorySales)
+class DailyCategorySalesAdmin(RollupAdmin):
+    list_display = ('date', 'status', 'brand', 'category', 'orders', 'units', 'revenue')
+    list_filter = ('status', 'brand', 'category')
+
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(RollupAdmin):
+    list_display = ('date', 'status', 'product', 'orders', 'units', 'revenue')
+    list_select_related = ('product',)
@@ -0,0 +1,76 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from analytics.models import DailyCategorySales, DailyOrderStats, DailyProductSales
+from analytics.rollup import record_orders
+from cart.models import Order
+
+ROLLUP_MODELS = (DailyOrderStats, DailyCategorySales, DailyProductSales)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily sales rollup tables from existing orders, in ranges of whole days "
+        "holding about --chunk-size orders. Each range is deleted and rebuilt in one transaction "
+        "with its orders locked, so status changes to those orders wait for it. Checkouts and "
+        "order deletes are not locked out: pause writers (maintenance mode) during the run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only rebuild from this local date (YYYY-MM-DD)")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        if opts["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        since = None
+        if opts["since"]:
+            try:
+                since = datetime.date.fromisoformat(opts["since"])
+            except ValueError:
+                raise CommandError("--since must be YYYY-MM-DD.")
+
+        done, start = 0, since
+        while True:
+            end = self._range_end(start, opts["chunk_size"])
+            with transaction.atomic():
+                orders = Order.objects.order_by("created_at", "id")
+                rows = [model.objects.all() for model in ROLLUP_MODELS]
+                if start:
+                    orders = orders.filter(created_at__gte=_day_start(start))
+                    rows = [r.filter(date__gte=start) for r in rows]
+                if end:
+                    orders = orders.filter(created_at__lt=_day_start(end))
+                    rows = [r.filter(date__lt=end) for r in rows]
+                # Kunci order dulu supaya change_order_status menunggu range ini selesai
+                chunk = list(orders.select_for_update().only("id", "created_at", "status"))
+                for r in rows:
+                    r.delete()
+                record_orders(chunk)
+            done += len(chunk)
+            if end is None:
+                break
+            start = end
+            self.stdout.write(f"{done} orders (before {end})")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt analytics from {done} orders."))
+
+    def _range_end(self, start, chunk_size):
+        """
+        Tanggal lokal pertama setelah range yang dimulai di `start`: hari dari
+        order ke-chunk_size ikut utuh. None kalau sisa order lebih sedikit.
+        """
+        orders = Order.objects.order_by("created_at", "id")
+        if start:
+            orders = orders.filter(created_at__gte=_day_start(start))
+        last = orders.values_list("created_at", flat=True)[chunk_size - 1:chunk_size].first()
+        if last is None:
+            return None
+        return timezone.localdate(last) + datetime.timedelta(days=1)
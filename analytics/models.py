@@ -0,0 +1,54 @@
+from django.db import models
+
+from catalog.models import Product
+
+
+class DailyRollup(models.Model):
+    """
+    Kolom bersama tabel rollup harian. `date` adalah tanggal lokal order
+    dibuat; perubahan status memindahkan kontribusi order ke baris status
+    baru di tanggal yang sama (analytics.rollup).
+    """
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailyOrderStats(DailyRollup):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'status'], name='daily_order_stats_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status}"
+
+
+class DailyCategorySales(DailyRollup):
+    brand = models.CharField(max_length=100)
+    category = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'status', 'brand', 'category'], name='daily_category_sales_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status} {self.brand}/{self.category}"
+
+
+class DailyProductSales(DailyRollup):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'status', 'product'], name='daily_product_sales_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status} {self.product_id}"
@@ -0,0 +1,134 @@
+"""
+Query dashboard penjualan, hanya membaca tabel rollup harian.
+
+Jumlah baris yang dibaca sebanding dengan jumlah hari x status (x produk
+atau brand/kategori yang terjual), bukan jumlah OrderItem, jadi rentang
+bertahun-tahun tetap cepat. Kolom `orders` di pengelompokan brand/kategori
+/produk adalah jumlah order yang memuat grup tersebut per hari; order
+dengan beberapa kategori dari brand yang sama terhitung di tiap kategori.
+"""
+import datetime
+
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from analytics.models import DailyCategorySales, DailyOrderStats, DailyProductSales
+from cart.models import Order
+from catalog.models import Product
+
+DEFAULT_DAYS = 30
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+STATUSES = {choice for choice, _ in Order.STATUS_CHOICES}
+# Order yang dibatalkan tidak dihitung kecuali diminta lewat ?status=
+DEFAULT_STATUSES = STATUSES - {"Cancelled"}
+GROUPS = ("day", "month", "status", "brand", "category", "product")
+ORDERINGS = ("revenue", "units", "orders")
+
+
+class InvalidAnalyticsRequest(ValueError):
+    pass
+
+
+def _parse_day(raw, name):
+    try:
+        return datetime.date.fromisoformat(raw)
+    except ValueError:
+        raise InvalidAnalyticsRequest(f"Invalid {name}, expected YYYY-MM-DD")
+
+
+def parse_params(params):
+    """
+    ?date_from=&date_to= (inklusif, default DEFAULT_DAYS hari terakhir),
+    ?status=Paid,Shipped atau status=all, ?group_by= (salah satu GROUPS),
+    ?order_by= dan ?limit= untuk pengelompokan selain waktu.
+    """
+    date_to = _parse_day(params["date_to"], "date_to") if params.get("date_to") else timezone.localdate()
+    if params.get("date_from"):
+        date_from = _parse_day(params["date_from"], "date_from")
+    else:
+        date_from = date_to - datetime.timedelta(days=DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise InvalidAnalyticsRequest("date_from must not be after date_to")
+
+    raw_status = params.get("status", "")
+    if raw_status == "all":
+        statuses = STATUSES
+    elif raw_status:
+        statuses = set(raw_status.split(","))
+        unknown = statuses - STATUSES
+        if unknown:
+            raise InvalidAnalyticsRequest(f"Unknown status: {', '.join(sorted(unknown))}")
+    else:
+        statuses = DEFAULT_STATUSES
+
+    group_by = params.get("group_by", "day")
+    if group_by not in GROUPS:
+        raise InvalidAnalyticsRequest(f"group_by must be one of: {', '.join(GROUPS)}")
+    order_by = params.get("order_by", "revenue")
+    if order_by not in ORDERINGS:
+        raise InvalidAnalyticsRequest(f"order_by must be one of: {', '.join(ORDERINGS)}")
+
+    try:
+        limit = int(params.get("limit", DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        limit = DEFAULT_LIMIT
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "statuses": sorted(statuses),
+        "group_by": group_by,
+        "order_by": order_by,
+        "limit": max(1, min(limit, MAX_LIMIT)),
+    }
+
+
+def _sums():
+    return {"orders": Sum("orders"), "units": Sum("units"), "revenue": Sum("revenue")}
+
+
+def _rows(options):
+    group_by = options["group_by"]
+    model = {
+        "brand": DailyCategorySales, "category": DailyCategorySales, "product": DailyProductSales,
+    }.get(group_by, DailyOrderStats)
+    qs = model.objects.filter(
+        date__gte=options["date_from"], date__lte=options["date_to"], status__in=options["statuses"],
+    )
+
+    if group_by == "day":
+        return list(qs.values("date").annotate(**_sums()).order_by("date"))
+    if group_by == "month":
+        return list(qs.annotate(month=TruncMonth("date")).values("month").annotate(**_sums()).order_by("month"))
+    if group_by == "status":
+        return list(qs.values("status").annotate(**_sums()).order_by("status"))
+
+    # Produk dikelompokkan per id saja; nama dll. diambil hanya untuk baris teratas
+    field = "product_id" if group_by == "product" else group_by
+    return list(
+        qs.values(field).annotate(**_sums()).order_by(f"-{options['order_by']}", field)[:options["limit"]]
+    )
+
+
+def sales_summary(params):
+    options = parse_params(params)
+    totals = DailyOrderStats.objects.filter(
+        date__gte=options["date_from"], date__lte=options["date_to"], status__in=options["statuses"],
+    ).aggregate(**_sums())
+    rows = _rows(options)
+    if options["group_by"] == "product":
+        products = Product.objects.only("name", "brand", "category").in_bulk([row["product_id"] for row in rows])
+        for row in rows:
+            product = products.get(row["product_id"])
+            row["product_name"] = product.name if product else None
+            row["brand"] = product.brand if product else None
+            row["category"] = product.category if product else None
+    return {
+        "date_from": options["date_from"].isoformat(),
+        "date_to": options["date_to"].isoformat(),
+        "statuses": options["statuses"],
+        "group_by": options["group_by"],
+        "totals": {name: value or 0 for name, value in totals.items()},
+        "rows": rows,
+    }
@@ -0,0 +1,151 @@
+"""
+Pemeliharaan tabel rollup penjualan harian (analytics.models).
+
+Isi tabel selalu sama dengan agregat Order + OrderItem per (tanggal lokal
+order dibuat, status order) dan per produk / brand+kategori, sehingga
+dashboard tidak perlu memindai OrderItem. Tabel diperbarui secara
+inkremental di transaksi yang sama dengan perubahan order:
+
+- order_created: setelah Order dan OrderItem-nya dibuat (checkout),
+- order_status_changed: kontribusi order pindah dari status lama ke baru,
+- order_deleted: dipanggil sebelum Order dihapus.
+
+Setiap pembaruan memakai tiga query per tabel berapa pun jumlah itemnya:
+INSERT baris kosong untuk kunci baru (ON CONFLICT DO NOTHING, jadi aman
+kalau checkout paralel membuat baris yang sama), SELECT pk, lalu satu
+UPDATE berbasis F() sehingga tambahan dari transaksi paralel tidak hilang.
+Revenue = sum(price_at_checkout * quantity). Perintah backfill_analytics
+membangun ulang tabel dari order lama.
+"""
+from collections import defaultdict
+
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from analytics.models import DailyCategorySales, DailyOrderStats, DailyProductSales
+from cart.models import OrderItem
+
+# Field kunci selain (date, status)
+KEYS = {
+    DailyOrderStats: (),
+    DailyCategorySales: ("brand", "category"),
+    DailyProductSales: ("product_id",),
+}
+VALUES = ("orders", "units", "revenue")
+
+
+def order_lines(order_ids):
+    """(order_id, product_id, brand, category, quantity, price) untuk order yang diberikan."""
+    return OrderItem.objects.filter(order_id__in=order_ids).values_list(
+        "order_id", "product_id", "product__brand", "product__category", "quantity", "price_at_checkout",
+    )
+
+
+class Deltas:
+    """Kumpulan perubahan per tabel: {model: {key: [orders, units, revenue]}}."""
+
+    def __init__(self):
+        self.tables = {model: defaultdict(lambda: [0, 0, 0]) for model in KEYS}
+
+    def add_order(self, created_at, status, lines, sign=1):
+        """`lines` berisi (product_id, brand, category, quantity, price) milik satu order."""
+        day = timezone.localdate(created_at)
+        order_row = self.tables[DailyOrderStats][(day, status)]
+        order_row[0] += sign
+        seen = set()
+        for product_id, brand, category, quantity, price in lines:
+            units, revenue = sign * quantity, sign * quantity * int(price)
+            order_row[1] += units
+            order_row[2] += revenue
+            for model, key in (
+                (DailyCategorySales, (day, status, brand, category)),
+                (DailyProductSales, (day, status, product_id)),
+            ):
+                row = self.tables[model][key]
+                if (model, key) not in seen:
+                    # Satu order dihitung sekali per baris walaupun produknya muncul dua kali
+                    seen.add((model, key))
+                    row[0] += sign
+                row[1] += units
+                row[2] += revenue
+
+    def __bool__(self):
+        return any(self.tables.values())
+
+
+def _apply_table(model, changes):
+    fields = ("date", "status") + KEYS[model]
+    # Baris kosong untuk kunci baru; yang sudah ada (termasuk yang baru dibuat
+    # transaksi paralel) dilewati oleh ON CONFLICT DO NOTHING
+    model.objects.bulk_create([model(**dict(zip(fields, key))) for key in changes], ignore_conflicts=True)
+
+    # Filter per kolom dengan IN (bukan OR per kunci, yang bisa melewati batas
+    # kedalaman ekspresi SQLite di chunk backfill besar), dicocokkan di Python
+    lookups = {f"{field}__in": {key[i] for key in changes} for i, field in enumerate(fields)}
+    pks = {
+        tuple(row[:-1]): row[-1]
+        for row in model.objects.filter(**lookups).values_list(*fields, "pk")
+    }
+
+    set_values = {}
+    for i, name in enumerate(VALUES):
+        field = model._meta.get_field(name)
+        whens = [
+            When(pk=pks[key], then=F(name) + Value(values[i], output_field=field))
+            for key, values in changes.items() if values[i]
+        ]
+        if whens:
+            set_values[name] = Case(*whens, default=F(name), output_field=field)
+    if set_values:
+        model.objects.filter(pk__in=[pks[key] for key in changes]).update(**set_values)
+
+
+def apply(deltas):
+    """Tulis `deltas` ke tabel rollup (di dalam transaksi pemanggil)."""
+    for model, changes in deltas.tables.items():
+        if changes:
+            _apply_table(model, changes)
+
+
+def _lines_of(order):
+    return [line[1:] for line in order_lines([order.pk])]
+
+
+def order_created(order, lines=None):
+    """`lines` opsional: (product_id, brand, category, quantity, price) kalau sudah ada di memori."""
+    deltas = Deltas()
+    deltas.add_order(order.created_at, order.status, _lines_of(order) if lines is None else lines)
+    apply(deltas)
+
+
+def order_status_changed(order, old_status):
+    if old_status == order.status:
+        return
+    lines = _lines_of(order)
+    deltas = Deltas()
+    deltas.add_order(order.created_at, old_status, lines, sign=-1)
+    deltas.add_order(order.created_at, order.status, lines)
+    apply(deltas)
+
+
+def record_orders(orders):
+    """
+    Tambahkan kontribusi sekumpulan order yang belum tercatat (mis. satu
+    chunk backfill atau order dari generator data sintetis) dengan satu
+    query item.
+    """
+    orders = list(orders)
+    lines = defaultdict(list)
+    for order_id, *line in order_lines([order.pk for order in orders]):
+        lines[order_id].append(line)
+    deltas = Deltas()
+    for order in orders:
+        deltas.add_order(order.created_at, order.status, lines[order.pk])
+    if deltas:
+        apply(deltas)
+
+
+def order_deleted(order):
+    deltas = Deltas()
+    deltas.add_order(order.created_at, order.status, _lines_of(order), sign=-1)
+    apply(deltas)
@@ -0,0 +1,230 @@
+import datetime
+import io
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from analytics.models import DailyCategorySales, DailyOrderStats, DailyProductSales
+from analytics.rollup import order_status_changed, record_orders
+from cart.checkout import checkout
+from cart.models import CartItem, Order
+from catalog.models import Product
+from invoice import views as invoice_views
+
+
+def rollup_rows():
+    """Isi semua tabel rollup, tanpa baris yang sudah nol semua."""
+    rows = set()
+    for model in (DailyOrderStats, DailyCategorySales, DailyProductSales):
+        for row in model.objects.values():
+            row.pop("id")
+            if row["orders"] or row["units"] or row["revenue"]:
+                rows.add((model.__name__, tuple(sorted(row.items()))))
+    return rows
+
+
+class AnalyticsTestMixin:
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="buyer", password="pass12345")
+        self.shoe = Product.objects.create(name="Air Zoom", brand="Nike", category="Shoes", price=1000, stock=50)
+        self.jersey = Product.objects.create(name="Jersey", brand="Nike", category="Jersey", price=300, stock=50)
+        self.ball = Product.objects.create(name="Ball", brand="Spalding", category="Ball", price=200, stock=50)
+
+    def buy(self, *lines):
+        for product, quantity in lines:
+            CartItem.objects.create(user=self.user, product=product, quantity=quantity)
+        order, invoice = checkout(self.user, "Budi", "Jl. Margonda", "Depok", "16424")
+        return order, invoice
+
+
+class RollupTest(AnalyticsTestMixin, TestCase):
+    def test_checkout_updates_rollups(self):
+        self.buy((self.shoe, 2), (self.ball, 1))
+        self.buy((self.shoe, 1))
+        today = timezone.localdate()
+
+        stats = DailyOrderStats.objects.get(date=today, status="Pending")
+        self.assertEqual((stats.orders, stats.units, stats.revenue), (2, 4, 3200))
+        shoe = DailyProductSales.objects.get(date=today, status="Pending", product=self.shoe)
+        self.assertEqual((shoe.orders, shoe.units, shoe.revenue), (2, 3, 3000))
+        ball = DailyCategorySales.objects.get(date=today, status="Pending", brand="Spalding", category="Ball")
+        self.assertEqual((ball.orders, ball.units, ball.revenue), (1, 1, 200))
+
+    def test_status_change_moves_order(self):
+        self.buy((self.shoe, 1))
+        _, invoice = self.buy((self.jersey, 2))
+        self.client.login(username="buyer", password="pass12345")
+        response = self.client.post(
+            reverse("invoice:update_status", args=[invoice.pk]), json.dumps({"status": "Paid"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        today = timezone.localdate()
+        pending = DailyOrderStats.objects.get(date=today, status="Pending")
+        paid = DailyOrderStats.objects.get(date=today, status="Paid")
+        self.assertEqual((pending.orders, pending.revenue), (1, 1000))
+        self.assertEqual((paid.orders, paid.units, paid.revenue), (1, 2, 600))
+
+    def test_delete_removes_order(self):
+        self.buy((self.shoe, 1))
+        _, invoice = self.buy((self.ball, 3))
+        self.client.login(username="buyer", password="pass12345")
+        self.client.post(
+            reverse("invoice:delete_invoice_flutter"), json.dumps({"id": str(invoice.pk)}),
+            content_type="application/json",
+        )
+        self.assertFalse(Order.objects.filter(pk=invoice.order_id).exists())
+        stats = DailyOrderStats.objects.get(status="Pending")
+        self.assertEqual((stats.orders, stats.revenue), (1, 1000))
+        self.assertEqual(DailyProductSales.objects.get(product=self.ball).orders, 0)
+
+    def test_incremental_matches_backfill(self):
+        order, _ = self.buy((self.shoe, 2), (self.jersey, 1))
+        self.buy((self.ball, 4))
+        self.buy((self.shoe, 1), (self.ball, 1))
+        # Order lama di hari lain
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - datetime.timedelta(days=40))
+        DailyOrderStats.objects.all().delete()
+        DailyCategorySales.objects.all().delete()
+        DailyProductSales.objects.all().delete()
+        call_command("backfill_analytics", chunk_size=2, stdout=io.StringIO())
+        rebuilt = rollup_rows()
+
+        # Setelah backfill, perubahan inkremental tetap sama dengan hasil rebuild
+        order.refresh_from_db()
+        old_status, order.status = order.status, "Shipped"
+        order.save()
+        order_status_changed(order, old_status)
+        incremental = rollup_rows()
+        call_command("backfill_analytics", stdout=io.StringIO())
+        self.assertEqual(incremental, rollup_rows())
+        self.assertNotEqual(rebuilt, incremental)
+
+    def test_backfill_rebuilds_whole_days_in_one_transaction(self):
+        now = timezone.now()
+        for days_ago in (3, 3, 2, 1, 1, 1, 0):
+            order, _ = self.buy((self.shoe, 1))
+            Order.objects.filter(pk=order.pk).update(created_at=now - datetime.timedelta(days=days_ago))
+        DailyOrderStats.objects.all().delete()
+        call_command("backfill_analytics", stdout=io.StringIO())
+        expected = rollup_rows()
+        # Baris basi di hari tanpa order ikut dibuang
+        DailyOrderStats.objects.create(date=timezone.localdate(now - datetime.timedelta(days=5)), status="Paid", orders=9)
+
+        ranges = []
+
+        def record(orders):
+            self.assertTrue(connection.in_atomic_block)
+            ranges.append({timezone.localdate(o.created_at) for o in orders})
+            return record_orders(orders)
+
+        with mock.patch("analytics.management.commands.backfill_analytics.record_orders", side_effect=record):
+            call_command("backfill_analytics", chunk_size=1, stdout=io.StringIO())
+        self.assertEqual(rollup_rows(), expected)
+        # Satu hari tidak pernah terbagi ke dua range
+        days = [day for days in ranges for day in days]
+        self.assertEqual(len(days), len(set(days)))
+        self.assertEqual(len(set(days)), 4)
+
+    def test_checkout_query_count_does_not_grow_with_items(self):
+        products = [
+            Product.objects.create(name=f"P{i}", brand="Wilson", category="Ball", price=100, stock=10)
+            for i in range(6)
+        ]
+        self.buy((products[0], 1))
+        counts = []
+        for lines in (products[:2], products):
+            CartItem.objects.bulk_create([CartItem(user=self.user, product=p) for p in lines])
+            with CaptureQueriesContext(connection) as queries:
+                checkout(self.user, "Budi", "Jl. Margonda", "Depok", "16424")
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_status_change_reads_latest_status(self):
+        order, invoice = self.buy((self.shoe, 1))
+        self.client.login(username="buyer", password="pass12345")
+        real_get = invoice_views.get_object_or_404
+
+        def stale_invoice(*args, **kwargs):
+            # Order sudah dimuat, lalu request lain mengubah statusnya
+            loaded = real_get(*args, **kwargs)
+            loaded.order
+            concurrent = Order.objects.get(pk=order.pk)
+            old_status, concurrent.status = concurrent.status, "Shipped"
+            concurrent.save()
+            order_status_changed(concurrent, old_status)
+            return loaded
+
+        requests = (
+            (reverse("invoice:update_status", args=[invoice.pk]), {"status": "Paid"}),
+            (reverse("invoice:edit_status_flutter"), {"id": str(invoice.pk), "status": "Cancelled"}),
+        )
+        for url, body in requests:
+            with mock.patch.object(invoice_views, "get_object_or_404", side_effect=stale_invoice):
+                response = self.client.post(url, json.dumps(body), content_type="application/json")
+            self.assertEqual(response.status_code, 200)
+            incremental = rollup_rows()
+            call_command("backfill_analytics", stdout=io.StringIO())
+            self.assertEqual(incremental, rollup_rows())
+            self.assertEqual(Order.objects.get(pk=order.pk).status, body["status"])
+
+
+class SalesEndpointTest(AnalyticsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.buy((self.shoe, 2), (self.jersey, 1))
+        self.buy((self.ball, 5))
+        _, cancelled = self.buy((self.shoe, 10))
+        cancelled.order.status = "Cancelled"
+        cancelled.order.save()
+        order_status_changed(cancelled.order, "Pending")
+
+        self.staff = get_user_model().objects.create_user(username="admin", password="pass12345", is_staff=True)
+        self.url = reverse("analytics:sales_json")
+
+    def get(self, **params):
+        self.client.login(username="admin", password="pass12345")
+        return self.client.get(self.url, params)
+
+    def test_staff_only(self):
+        self.client.login(username="buyer", password="pass12345")
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_daily_totals_exclude_cancelled(self):
+        data = json.loads(self.get().content)
+        self.assertEqual(data["totals"], {"orders": 2, "units": 8, "revenue": 3300})
+        self.assertEqual(len(data["rows"]), 1)
+        self.assertEqual(data["rows"][0]["date"], timezone.localdate().isoformat())
+
+    def test_group_by_brand_and_product(self):
+        brands = json.loads(self.get(group_by="brand").content)["rows"]
+        self.assertEqual([(r["brand"], r["revenue"]) for r in brands], [("Nike", 2300), ("Spalding", 1000)])
+
+        products = json.loads(self.get(group_by="product", order_by="units", limit=1, status="all").content)["rows"]
+        self.assertEqual(products[0]["product_name"], "Air Zoom")
+        self.assertEqual(products[0]["units"], 12)
+
+    def test_group_by_status(self):
+        rows = json.loads(self.get(group_by="status", status="all").content)["rows"]
+        self.assertEqual({r["status"]: r["orders"] for r in rows}, {"Cancelled": 1, "Pending": 2})
+
+    def test_reads_only_rollups(self):
+        self.get()  # login
+        with CaptureQueriesContext(connection) as queries:
+            self.get(group_by="category", date_from="2020-01-01")
+        self.assertFalse(any("cart_orderitem" in q["sql"] for q in queries.captured_queries))
+
+    def test_bad_parameters(self):
+        for params in ({"group_by": "week"}, {"date_from": "2025/01/01"}, {"status": "Lost"},
+                       {"date_from": "2025-02-01", "date_to": "2025-01-01"}):
+            response = self.get(**params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(json.loads(response.content)["status"], "error")
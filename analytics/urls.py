@@ -0,0 +1,8 @@
+from django.urls import path
+from analytics.views import sales_json
+
+app_name = 'analytics'
+
+urlpatterns = [
+    path('sales/', sales_json, name='sales_json'),
+]
@@ -0,0 +1,17 @@
+from django.http import JsonResponse
+
+from analytics.queries import InvalidAnalyticsRequest, sales_summary
+
+
+def sales_json(request):
+    """
+    Ringkasan penjualan untuk dashboard admin dari tabel rollup harian,
+    mis. ?group_by=brand&date_from=2024-01-01&date_to=2024-12-31.
+    """
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({"status": "error", "message": "Unauthorized"}, status=403)
+    try:
+        data = sales_summary(request.GET)
+    except InvalidAnalyticsRequest as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    return JsonResponse({"status": "success", **data})
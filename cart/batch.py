@@ -0,0 +1,129 @@
+"""
+Perubahan keranjang secara batch: daftar operasi {product_id, op, quantity}
+diterapkan dalam satu transaksi dengan jumlah query tetap, berapa pun
+banyaknya operasi:
+
+1. cek produk yang ditambah/di-set memang ada,
+2. baca baris keranjang yang terkena (select_for_update),
+3. satu UPDATE untuk semua baris yang sudah ada: `add` memakai F() supaya
+   tambahan dari request paralel tidak hilang, `set` menulis nilai absolut,
+4. bulk_create untuk produk yang belum ada di keranjang,
+5. satu DELETE untuk `remove` dan `set` dengan quantity 0,
+6. bangun ulang snapshot keranjang (cart.cache) untuk response.
+
+Operasi untuk produk yang sama digabung sesuai urutannya, jadi
+[add 2, add 1] sama dengan add 3 dan [remove, add 1] sama dengan set 1.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from cart.cache import build_snapshot, invalidate_cart
+from cart.models import CartItem
+from catalog.models import Product
+
+OPS = ("add", "set", "remove")
+MAX_OPERATIONS = 100
+MAX_QUANTITY = 1000
+
+
+class CartBatchError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _int(value, name):
+    if isinstance(value, bool):
+        raise CartBatchError(f"{name} harus berupa angka.")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise CartBatchError(f"{name} harus berupa angka.")
+
+
+def parse_operations(data):
+    """Validasi body request menjadi list (product_id, op, quantity)."""
+    if not isinstance(data, list) or not data:
+        raise CartBatchError("operations harus berupa list yang tidak kosong.")
+    if len(data) > MAX_OPERATIONS:
+        raise CartBatchError(f"Maksimal {MAX_OPERATIONS} operasi per request.")
+
+    operations = []
+    for raw in data:
+        if not isinstance(raw, dict):
+            raise CartBatchError("Setiap operasi harus berupa object.")
+        op = raw.get("op", "add")
+        if op not in OPS:
+            raise CartBatchError(f"op harus salah satu dari: {', '.join(OPS)}.")
+        product_id = _int(raw.get("product_id"), "product_id")
+        quantity = 0 if op == "remove" else _int(raw.get("quantity", 1), "quantity")
+        minimum = 1 if op == "add" else 0
+        if not minimum <= quantity <= MAX_QUANTITY:
+            raise CartBatchError(f"quantity untuk {op} harus antara {minimum} dan {MAX_QUANTITY}.")
+        operations.append((product_id, op, quantity))
+    return operations
+
+
+def _merge(operations):
+    """
+    Gabungkan operasi per produk menjadi satu efek akhir:
+    ("add", n) = tambah n, ("set", n) = jadikan n (0 = hapus).
+    """
+    effects = {}
+    for product_id, op, quantity in operations:
+        current = effects.get(product_id)
+        if op == "add" and current is not None:
+            effects[product_id] = (current[0], current[1] + quantity)
+        elif op == "add":
+            effects[product_id] = ("add", quantity)
+        else:
+            effects[product_id] = ("set", quantity)
+    return effects
+
+
+def apply_operations(user, operations):
+    """
+    Terapkan operasi ke keranjang user dan kembalikan snapshot keranjang
+    yang baru. Melempar CartBatchError (dan tidak mengubah apa pun) kalau
+    ada produk yang tidak ditemukan.
+    """
+    effects = _merge(operations)
+    try:
+        with transaction.atomic():
+            wanted = {pk for pk, (kind, quantity) in effects.items() if kind == "add" or quantity > 0}
+            found = set(Product.objects.filter(pk__in=wanted).values_list("pk", flat=True)) if wanted else set()
+            missing = sorted(wanted - found)
+            if missing:
+                raise CartBatchError(
+                    f"Produk tidak ditemukan: {', '.join(map(str, missing))}", status=404,
+                )
+
+            existing = dict(
+                CartItem.objects.select_for_update()
+                .filter(user=user, product_id__in=effects)
+                .values_list("product_id", "pk")
+            )
+            new_quantity, to_create, to_delete = [], [], []
+            for product_id, (kind, quantity) in effects.items():
+                if kind == "set" and quantity == 0:
+                    to_delete.append(product_id)
+                elif product_id in existing:
+                    value = F("quantity") + quantity if kind == "add" else Value(quantity)
+                    new_quantity.append(When(pk=existing[product_id], then=value))
+                else:
+                    to_create.append(CartItem(user=user, product_id=product_id, quantity=quantity))
+
+            if new_quantity:
+                CartItem.objects.filter(pk__in=existing.values()).exclude(product_id__in=to_delete).update(
+                    quantity=Case(*new_quantity, default=F("quantity"), output_field=IntegerField()),
+                )
+            if to_create:
+                CartItem.objects.bulk_create(to_create)
+            if to_delete:
+                CartItem.objects.filter(user=user, product_id__in=to_delete).delete()
+            invalidate_cart(user.pk)
+            return build_snapshot(user.pk)
+    except IntegrityError:
+        # Request lain membuat baris (user, produk) yang sama di antara SELECT dan INSERT
+        raise CartBatchError("Keranjang berubah, silakan coba lagi.", status=409)
@@ -0,0 +1,123 @@
+"""
+Snapshot keranjang per user di cache Django.
+
+Snapshot berisi item (dengan data produk yang dibutuhkan halaman cart dan
+endpoint Flutter), total harga, dan jumlah barang. Dibangun dengan satu
+query saat cache miss, lalu dipakai ulang oleh show_cart, get_cart_json,
+dan badge cart di navbar.
+
+Setiap view yang mengubah CartItem wajib memanggil invalidate_cart(user_id).
+Entry dihapus saat itu juga dan sekali lagi setelah transaksi commit,
+supaya request lain yang sempat membangun ulang snapshot dari data lama
+(sebelum commit) tidak meninggalkan snapshot basi. Perubahan harga/nama
+produk tidak meng-invalidate snapshot, jadi entry juga kedaluwarsa sendiri
+setelah CART_CACHE_TIMEOUT detik. Checkout selalu membaca database.
+
+Invalidasi hanya sampai ke backend cache yang dipakai proses ini. Dengan
+LocMemCache setiap worker punya cache sendiri dan worker lain akan terus
+menyajikan snapshot basi, jadi snapshot hanya dipakai kalau backend-nya
+dibagi antar proses (mis. Redis) atau DEBUG aktif (runserver, satu
+proses). Setting CART_CACHE_ENABLED (True/False) mengesampingkan deteksi ini.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from cart.models import CartItem
+
+DEFAULT_TIMEOUT = 300
+# Backend yang isinya tidak terlihat oleh worker lain
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _key(user_id):
+    return f"cart:v1:{user_id}"
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def build_snapshot(user_id):
+    rows = (
+        CartItem.objects.filter(user_id=user_id)
+        .order_by("id")
+        .values(
+            "quantity", "product_id", "product__name", "product__brand",
+            "product__price", "product__image", "product__description",
+        )
+    )
+    items = []
+    for row in rows:
+        items.append({
+            "product": {
+                "id": row["product_id"],
+                "name": row["product__name"],
+                "brand": row["product__brand"],
+                "price": row["product__price"],
+                "image": row["product__image"],
+                "description": row["product__description"],
+            },
+            "quantity": row["quantity"],
+            "subtotal": row["product__price"] * row["quantity"],
+        })
+    return {
+        "items": items,
+        "total": sum(item["subtotal"] for item in items),
+        "count": sum(item["quantity"] for item in items),
+    }
+
+
+def enabled():
+    configured = getattr(settings, "CART_CACHE_ENABLED", None)
+    if configured is not None:
+        return configured
+    return settings.DEBUG or settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+
+
+def get_cart_snapshot(user_id):
+    if not enabled():
+        return build_snapshot(user_id)
+    snapshot = cache.get(_key(user_id))
+    if snapshot is not None:
+        _count("hits")
+        return snapshot
+    _count("misses")
+    snapshot = build_snapshot(user_id)
+    cache.set(_key(user_id), snapshot, getattr(settings, "CART_CACHE_TIMEOUT", DEFAULT_TIMEOUT))
+    return snapshot
+
+
+def invalidate_cart(user_id):
+    if not enabled():
+        return
+    cache.delete(_key(user_id))
+    transaction.on_commit(lambda: cache.delete(_key(user_id)))
+
+
+def cache_stats():
+    """Hit/miss sejak proses ini berjalan (per worker, bukan total cluster)."""
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+        "backend": settings.CACHES["default"]["BACKEND"],
+        "enabled": enabled(),
+    }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats["hits"] = _stats["misses"] = 0
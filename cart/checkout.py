@@ -0,0 +1,113 @@
+"""
+Checkout keranjang (database) menjadi Order + OrderItem + Invoice.
+
+Semua langkah berjalan di satu transaksi dengan jumlah query tetap,
+berapa pun banyaknya item di keranjang:
+
+1. baca keranjang + produknya (select_related),
+2. kunci baris produk dengan select_for_update, selalu urut pk supaya dua
+   checkout yang berebut produk yang sama tidak saling deadlock,
+3. kurangi stok dengan satu UPDATE berbasis F(). UPDATE itu sendiri hanya
+   mengenai baris yang stoknya masih cukup, jadi stok tidak pernah minus
+   walaupun database tidak mendukung row lock (SQLite),
+4. buat Order, bulk_create OrderItem, perbarui rollup analytics, buat
+   Invoice, kosongkan keranjang.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from analytics.rollup import order_created
+from cart.cache import invalidate_cart
+from cart.models import CartItem, Order, OrderItem
+from catalog.cache import bump_catalog_version
+from catalog.models import Product
+from invoice.models import Invoice
+from invoice.utils import generate_invoice_no
+
+
+class CheckoutError(Exception):
+    def __init__(self, message, status=400, products=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        # Nama produk yang stoknya tidak cukup (untuk ditampilkan ke user)
+        self.products = products or []
+
+
+def _decrement_stock(quantities):
+    """
+    Kurangi stok semua produk dalam satu UPDATE. Mengembalikan jumlah baris
+    yang ter-update; kurang dari len(quantities) berarti ada stok yang kurang.
+    """
+    enough = Q()
+    new_stock, still_available = [], []
+    for pk, qty in quantities.items():
+        enough |= Q(pk=pk, stock__gte=qty)
+        new_stock.append(When(pk=pk, then=F("stock") - qty))
+        # Ekspresi di SET membaca nilai sebelum UPDATE, jadi bandingkan dengan qty
+        still_available.append(When(pk=pk, stock__gt=qty, then=F("is_available")))
+    return Product.objects.filter(enough).update(
+        stock=Case(*new_stock, output_field=IntegerField()),
+        is_available=Case(*still_available, default=Value(False)),
+    )
+
+
+def checkout(user, full_name, address, city, postal_code):
+    """Checkout isi keranjang user. Melempar CheckoutError kalau gagal."""
+    with transaction.atomic():
+        cart_items = list(
+            CartItem.objects.filter(user=user).select_related("product").order_by("product_id")
+        )
+        if not cart_items:
+            raise CheckoutError("Keranjang Anda kosong.")
+
+        quantities = defaultdict(int)
+        for item in cart_items:
+            quantities[item.product_id] += item.quantity
+
+        products = {
+            p.pk: p
+            for p in Product.objects.select_for_update().filter(pk__in=quantities).order_by("pk")
+        }
+        short = [
+            products[pk].name for pk, qty in quantities.items()
+            if not products[pk].is_available or products[pk].stock < qty
+        ]
+        if short:
+            raise CheckoutError(f"Stok tidak cukup untuk: {', '.join(short)}", status=409, products=short)
+
+        if _decrement_stock(quantities) != len(quantities):
+            # Stok berubah di antara SELECT dan UPDATE (tanpa row lock)
+            raise CheckoutError("Stok berubah saat checkout, silakan coba lagi.", status=409)
+        bump_catalog_version()
+
+        order = Order.objects.create(
+            user=user,
+            full_name=full_name,
+            address=address,
+            city=city,
+            postal_code=postal_code,
+            total_price=sum(products[pk].price * qty for pk, qty in quantities.items()),
+            status="Pending",
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=pk, quantity=qty, price_at_checkout=products[pk].price)
+            for pk, qty in quantities.items()
+        ])
+        order_created(order, [
+            (pk, products[pk].brand, products[pk].category, qty, products[pk].price)
+            for pk, qty in quantities.items()
+        ])
+
+        invoice = Invoice.objects.create(
+            user=user,
+            product=cart_items[0].product,
+            invoice_no=generate_invoice_no(),
+            order=order,
+        )
+
+        CartItem.objects.filter(user=user).delete()
+        invalidate_cart(user.pk)
+    return order, invoice
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from cart.cache import get_cart_snapshot
+
+
+def cart_count(request):
+    """Jumlah barang di cart untuk badge navbar, hanya dihitung kalau dipakai template."""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {"cart_count": SimpleLazyObject(lambda: get_cart_snapshot(user.pk)["count"])}
@@ -8,6 +8,12 @@ class CartItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            # Satu baris per (user, produk); get_or_create jadi aman dari race
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_user_product_cart'),
+        ]
+
     @property
     def subtotal(self):
         return self.product.price * self.quantity
@@ -1,10 +1,18 @@
 import json
-from django.test import TestCase, Client
+import threading
+import time
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from catalog.models import Product
-from .models import Order, OrderItem
+from .models import CartItem, Order, OrderItem
+from .checkout import CheckoutError, checkout
+from .cache import cache_stats, reset_cache_stats
+from django.core.cache import cache
 from invoice.models import Invoice
+from invoice.utils import generate_invoice_no
 
 class CartViewsTestCase(TestCase):
     def setUp(self):
@@ -95,4 +103,273 @@ class CartViewsTestCase(TestCase):
         
         json_response = json.loads(response.content)
         self.assertEqual(json_response['status'], 'error')
-        self.assertEqual(json_response['message'], 'Semua field alamat wajib diisi!')
\ No newline at end of file
+        self.assertEqual(json_response['message'], 'Semua field alamat wajib diisi!')
+
+
+class CheckoutServiceTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='buyer', password='pass12345')
+        self.products = [
+            Product.objects.create(name=f"Product {i}", brand="Nike", category="Shoes", price=1000 * (i + 1), stock=5)
+            for i in range(5)
+        ]
+
+    def fill_cart(self, products, quantity=2, user=None):
+        CartItem.objects.bulk_create([CartItem(user=user or self.user, product=p, quantity=quantity) for p in products])
+
+    def test_checkout_creates_order_and_decrements_stock(self):
+        self.fill_cart(self.products[:2])
+        order, invoice = checkout(self.user, "Budi", "Jl. Margonda", "Depok", "16424")
+
+        self.assertEqual(order.total_price, 2 * 1000 + 2 * 2000)
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(invoice.order, order)
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 3)
+
+    def test_query_count_does_not_grow_with_cart(self):
+        generate_invoice_no()  # pesan blok nomor invoice dulu supaya tidak ikut terhitung
+        self.fill_cart(self.products[:1])
+        with CaptureQueriesContext(connection) as one:
+            checkout(self.user, "Budi", "Jl. Margonda", "Depok", "16424")
+        other = get_user_model().objects.create_user(username='other', password='pass12345')
+        self.fill_cart(self.products, user=other)
+        with CaptureQueriesContext(connection) as five:
+            checkout(other, "Ani", "Jl. Margonda", "Depok", "16424")
+        self.assertEqual(len(one), len(five))
+
+    def test_insufficient_stock_changes_nothing(self):
+        self.fill_cart(self.products[:2], quantity=6)
+        with self.assertRaises(CheckoutError) as ctx:
+            checkout(self.user, "Budi", "Jl. Margonda", "Depok", "16424")
+        self.assertEqual(ctx.exception.status, 409)
+        self.assertEqual(ctx.exception.products, ["Product 0", "Product 1"])
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(CartItem.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 5)
+
+    def test_selling_out_marks_product_unavailable(self):
+        self.fill_cart(self.products[:1], quantity=5)
+        checkout(self.user, "Budi", "Jl. Margonda", "Depok", "16424")
+        product = Product.objects.get(pk=self.products[0].pk)
+        self.assertEqual((product.stock, product.is_available), (0, False))
+        self.assertTrue(Product.objects.get(pk=self.products[1].pk).is_available)
+
+    def test_checkout_view_reports_stock_error(self):
+        self.fill_cart(self.products[:1], quantity=9)
+        self.client.login(username='buyer', password='pass12345')
+        response = self.client.post(reverse('cart:show_checkout'), {
+            'full_name': 'Budi', 'address': 'Jl. Margonda', 'city': 'Depok', 'postal_code': '16424',
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("Product 0", json.loads(response.content)["message"])
+
+
+class ConcurrentCheckoutTest(TransactionTestCase):
+    def test_parallel_checkouts_never_oversell(self):
+        stock, buyers = 3, 8
+        product = Product.objects.create(name="Limited", brand="Nike", category="Shoes", price=1000, stock=stock)
+        users = [get_user_model().objects.create_user(username=f'buyer{i}', password='x') for i in range(buyers)]
+        for user in users:
+            CartItem.objects.create(user=user, product=product, quantity=1)
+
+        barrier = threading.Barrier(buyers)
+        results = []
+
+        def buy(user):
+            barrier.wait()
+            try:
+                for _ in range(50):
+                    try:
+                        checkout(user, "Budi", "Jl. Margonda", "Depok", "16424")
+                        results.append("ok")
+                        return
+                    except CheckoutError:
+                        results.append("sold out")
+                        return
+                    except OperationalError:
+                        # SQLite mengunci seluruh database, coba lagi
+                        time.sleep(0.01)
+                results.append("gave up")
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in users]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        product.refresh_from_db()
+        self.assertEqual(results.count("ok"), stock)
+        self.assertEqual(results.count("sold out"), buyers - stock)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(sum(OrderItem.objects.values_list("quantity", flat=True)), stock)
+        self.assertEqual(Order.objects.count(), stock)
+        self.assertEqual(CartItem.objects.count(), buyers - stock)
+
+
+@override_settings(CART_CACHE_ENABLED=True)
+class CartCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.user = get_user_model().objects.create_user(username='buyer', password='pass12345')
+        self.product = Product.objects.create(name="Air Zoom", brand="Nike", category="Shoes", price=1000, stock=10)
+        self.other = Product.objects.create(name="Jersey", brand="Adidas", category="Jersey", price=500, stock=10)
+        self.client.login(username='buyer', password='pass12345')
+
+    def cart_json(self):
+        return json.loads(self.client.get(reverse('cart:get_cart_json')).content)
+
+    def test_snapshot_is_served_from_cache(self):
+        CartItem.objects.create(user=self.user, product=self.product, quantity=2)
+        self.assertEqual(self.cart_json()[0]["fields"]["quantity"], 2)
+        with self.assertNumQueries(2):  # session + user, tanpa query CartItem
+            data = self.cart_json()
+        self.assertEqual(data[0]["fields"]["subtotal"], "2000")
+        self.assertEqual(cache_stats()["hits"], 1)
+        self.assertEqual(cache_stats()["misses"], 1)
+
+    def test_writes_invalidate_snapshot(self):
+        self.assertEqual(self.cart_json(), [])
+
+        self.client.post(reverse('cart:add_to_cart', args=[self.product.pk]), {'quantity': 2})
+        self.assertEqual(self.cart_json()[0]["fields"]["quantity"], 2)
+
+        self.client.post(reverse('cart:add_to_cart_flutter', args=[self.other.pk]))
+        self.assertEqual(len(self.cart_json()), 2)
+
+        self.client.post(reverse('cart:delete_cart_flutter'), json.dumps({"id": self.other.pk}), content_type="application/json")
+        self.assertEqual(len(self.cart_json()), 1)
+
+        self.client.post(reverse('cart:remove_from_cart', args=[self.product.pk]))
+        self.assertEqual(self.cart_json(), [])
+
+    def test_checkout_clears_snapshot(self):
+        CartItem.objects.create(user=self.user, product=self.product, quantity=1)
+        self.assertEqual(len(self.cart_json()), 1)
+        checkout(self.user, "Budi", "Jl. Margonda", "Depok", "16424")
+        self.assertEqual(self.cart_json(), [])
+
+    def test_show_cart_and_badge(self):
+        CartItem.objects.create(user=self.user, product=self.product, quantity=3)
+        response = self.client.get(reverse('cart:show_cart'))
+        self.assertEqual(response.context['total_cart_price'], 3000)
+        self.assertContains(response, "Checkout (3)")
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse('cart:cart_cache_stats')).status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        data = json.loads(self.client.get(reverse('cart:cart_cache_stats')).content)
+        self.assertEqual(data["status"], "success")
+        self.assertIn("hit_rate", data)
+
+    @override_settings(CART_CACHE_ENABLED=None, DEBUG=False)
+    def test_process_local_cache_is_not_used_in_production(self):
+        # LocMemCache tidak terlihat oleh worker lain, jadi snapshot tidak disimpan
+        CartItem.objects.create(user=self.user, product=self.product, quantity=1)
+        self.assertEqual(len(self.cart_json()), 1)
+        CartItem.objects.filter(user=self.user).delete()
+        self.assertEqual(self.cart_json(), [])
+        self.assertEqual(cache_stats()["hits"] + cache_stats()["misses"], 0)
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}):
+            self.assertTrue(cache_stats()["enabled"])
+
+
+class CartItemConstraintTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='buyer', password='pass12345')
+        self.product = Product.objects.create(name="Air Zoom", brand="Nike", category="Shoes", price=1000, stock=10)
+        self.client.login(username='buyer', password='pass12345')
+
+    def test_duplicate_row_is_rejected(self):
+        CartItem.objects.create(user=self.user, product=self.product)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CartItem.objects.create(user=self.user, product=self.product)
+
+    def test_repeated_adds_accumulate_in_one_row(self):
+        self.client.post(reverse('cart:add_to_cart', args=[self.product.pk]), {'quantity': 2})
+        self.client.post(reverse('cart:add_to_cart', args=[self.product.pk]), {'quantity': 3})
+        self.client.post(reverse('cart:add_to_cart_flutter', args=[self.product.pk]))
+        item = CartItem.objects.get(user=self.user, product=self.product)
+        self.assertEqual(item.quantity, 6)
+
+
+class CartBatchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='batcher', password='pass12345')
+        self.products = [
+            Product.objects.create(name=f"Ball {i}", brand="Spalding", category="Ball", price=1000 * (i + 1), stock=10)
+            for i in range(6)
+        ]
+        self.client.login(username='batcher', password='pass12345')
+        self.url = reverse('cart:batch_cart_flutter')
+
+    def post(self, operations):
+        return self.client.post(self.url, json.dumps({"operations": operations}), content_type="application/json")
+
+    def quantities(self):
+        return dict(CartItem.objects.filter(user=self.user).values_list("product_id", "quantity"))
+
+    def test_applies_operations_and_returns_cart(self):
+        a, b, c = self.products[:3]
+        CartItem.objects.create(user=self.user, product=a, quantity=1)
+        CartItem.objects.create(user=self.user, product=b, quantity=4)
+        CartItem.objects.create(user=self.user, product=c, quantity=2)
+
+        response = self.post([
+            {"product_id": a.pk, "op": "add", "quantity": 2},
+            {"product_id": b.pk, "op": "set", "quantity": 1},
+            {"product_id": c.pk, "op": "remove"},
+            {"product_id": self.products[3].pk, "op": "add"},
+            {"product_id": self.products[3].pk, "op": "add", "quantity": 2},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {a.pk: 3, b.pk: 1, self.products[3].pk: 3})
+
+        data = json.loads(response.content)
+        self.assertEqual(data["count"], 7)
+        self.assertEqual(int(data["total"]), 3 * 1000 + 1 * 2000 + 3 * 4000)
+        self.assertEqual([item["pk"] for item in data["items"]], [a.pk, b.pk, self.products[3].pk])
+        self.assertIn("thumbnail_url", data["items"][0]["fields"])
+
+    def test_query_count_is_constant(self):
+        p = self.products
+        remove = [{"product_id": p[5].pk, "op": "remove"}]
+        # Pemanasan: sesi login sudah di-cache, p[0] sudah ada di keranjang
+        self.post([{"product_id": p[0].pk}])
+        with CaptureQueriesContext(connection) as small:
+            self.post([{"product_id": p[0].pk}, {"product_id": p[1].pk}] + remove)
+        with CaptureQueriesContext(connection) as large:
+            self.post([{"product_id": x.pk, "quantity": 2} for x in p[:5]] + remove)
+        self.assertEqual(len(small), len(large))
+
+    def test_unknown_product_rolls_back_batch(self):
+        response = self.post([
+            {"product_id": self.products[0].pk, "op": "add"},
+            {"product_id": 999999, "op": "add"},
+        ])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.quantities(), {})
+
+    def test_invalid_operations(self):
+        for operations in ([], [{"product_id": "x"}], [{"product_id": self.products[0].pk, "op": "drop"}],
+                           [{"product_id": self.products[0].pk, "op": "add", "quantity": 0}]):
+            self.assertEqual(self.post(operations).status_code, 400)
+        response = self.client.post(self.url, "not json", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalidates_cart_snapshot(self):
+        cart_url = reverse('cart:get_cart_json')
+        self.assertEqual(json.loads(self.client.get(cart_url).content), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post([{"product_id": self.products[0].pk, "op": "add", "quantity": 2}])
+        self.assertEqual(json.loads(self.client.get(cart_url).content)[0]["fields"]["quantity"], 2)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.post([{"product_id": self.products[0].pk}]).status_code, 401)
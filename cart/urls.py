@@ -1,5 +1,5 @@
 from django.urls import path
-from cart.views import show_cart, remove_from_cart, show_checkout, add_to_cart, get_cart_json, delete_cart_flutter, checkout_flutter, add_to_cart_flutter
+from cart.views import show_cart, remove_from_cart, show_checkout, add_to_cart, get_cart_json, delete_cart_flutter, checkout_flutter, add_to_cart_flutter, batch_cart_flutter, cart_cache_stats
 
 app_name = 'cart'
 
@@ -11,5 +11,7 @@ urlpatterns = [
     path('json-flutter/', get_cart_json, name='get_cart_json'),
     path('add-flutter/<int:product_id>/', add_to_cart_flutter, name='add_to_cart_flutter'),
     path('delete-flutter/', delete_cart_flutter, name='delete_cart_flutter'),
+    path('batch-flutter/', batch_cart_flutter, name='batch_cart_flutter'),
     path('checkout-flutter/', checkout_flutter, name='checkout_flutter'),
+    path('cache-stats/', cart_cache_stats, name='cart_cache_stats'),
 ]
\ No newline at end of file
@@ -2,26 +2,25 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
-from django.db import transaction
 from django.http import JsonResponse, HttpResponseRedirect
+from django.db.models import F
 from django.views.decorators.csrf import csrf_exempt
 from catalog.models import Product 
-from invoice.models import Invoice
-from cart.models import Order, OrderItem, CartItem # Pastikan CartItem sudah diimport
-import datetime
+from catalog.thumbnails import thumbnail_url_for
+from cart.models import CartItem
+from cart.batch import CartBatchError, apply_operations, parse_operations
+from cart.cache import cache_stats, get_cart_snapshot, invalidate_cart
+from cart.checkout import CheckoutError, checkout
 import json
 
 @login_required(login_url="authentication:login")
 def show_cart(request):
-    # Mengambil data dari DATABASE (Sinkron)
-    cart_items = CartItem.objects.filter(user=request.user)
-    
-    # Hitung total harga
-    total_cart_price = sum(item.subtotal for item in cart_items)
+    # Snapshot cart dari cache (dibangun dari database saat miss)
+    snapshot = get_cart_snapshot(request.user.pk)
     
     context = {
-        'cart_items': cart_items,
-        'total_cart_price': total_cart_price,
+        'cart_items': snapshot['items'],
+        'total_cart_price': snapshot['total'],
     }
     
     return render(request, 'cart.html', context)
@@ -29,17 +28,14 @@ def show_cart(request):
 @login_required(login_url="authentication:login")
 def show_checkout(request):
     if request.method == 'POST':
-        # Ambil item dari Database
-        cart_items = CartItem.objects.filter(user=request.user)
-        
-        if not cart_items.exists():
-            return JsonResponse({'status': 'error', 'message': 'Keranjang Anda kosong.'}, status=400)
-
         full_name = request.POST.get('full_name')
         address = request.POST.get('address')
         city = request.POST.get('city')
         postal_code = request.POST.get('postal_code')
 
+        if not CartItem.objects.filter(user=request.user).exists():
+            return JsonResponse({'status': 'error', 'message': 'Keranjang Anda kosong.'}, status=400)
+
         if not all([full_name, address, city, postal_code]):
             return JsonResponse({
                 'status': 'error', 
@@ -47,60 +43,22 @@ def show_checkout(request):
             }, status=400)
 
         try:
-            with transaction.atomic():
-                total_cart_price = sum(item.subtotal for item in cart_items)
-
-                # 1) Buat Order
-                order = Order.objects.create(
-                    user=request.user,
-                    full_name=full_name,
-                    address=address,
-                    city=city,
-                    postal_code=postal_code,
-                    total_price=total_cart_price,
-                    status="Pending"
-                )
-
-                # 2) Buat OrderItem dari CartItem database
-                for item in cart_items:
-                    OrderItem.objects.create(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price_at_checkout=item.product.price,
-                    )
-
-                # 3) Buat Invoice
-                timestamp = int(datetime.datetime.now().timestamp())
-                invoice_no = f"INV-{request.user.id}-{timestamp}"
-                
-                # Ambil produk pertama untuk referensi (opsional sesuai model lama)
-                first_product = cart_items.first().product if cart_items.exists() else None
-
-                Invoice.objects.create(
-                    user=request.user,
-                    product=first_product, 
-                    date=datetime.datetime.now().date(),
-                    invoice_no=invoice_no,
-                    order=order
-                )
-
-                # 4) HAPUS CART DARI DATABASE (Agar kosong setelah checkout)
-                cart_items.delete()
-
-            # 5) Redirect
-            redirect_url = reverse('invoice:show_invoices')
-            return JsonResponse({
-                'status': 'success',
-                'message': 'Checkout berhasil!',
-                'redirect_url': redirect_url
-            })
-
+            # Order, OrderItem, pengurangan stok, Invoice, dan pengosongan cart
+            checkout(request.user, full_name, address, city, postal_code)
+        except CheckoutError as e:
+            return JsonResponse({'status': 'error', 'message': e.message}, status=e.status)
         except Exception as e:
             return JsonResponse({
                 'status': 'error',
                 'message': f'Terjadi kesalahan server: {e}'
             }, status=500)
+
+        redirect_url = reverse('invoice:show_invoices')
+        return JsonResponse({
+            'status': 'success',
+            'message': 'Checkout berhasil!',
+            'redirect_url': redirect_url
+        })
     else:
         return redirect('cart:show_cart')
 
@@ -109,6 +67,7 @@ def show_checkout(request):
 def remove_from_cart(request, id):
     # Menghapus item dari Database berdasarkan Product ID dan User
     CartItem.objects.filter(user=request.user, product_id=id).delete()
+    invalidate_cart(request.user.pk)
     return HttpResponseRedirect(reverse('cart:show_cart'))
 
 @login_required(login_url="authentication:login")
@@ -124,10 +83,10 @@ def add_to_cart(request, product_id):
         defaults={'quantity': quantity}
     )
     
-    # Jika barang sudah ada, update quantity-nya
+    # Jika barang sudah ada, update quantity-nya (atomik di SQL, aman dari request paralel)
     if not created:
-        cart_item.quantity += quantity
-        cart_item.save() # Simpan perubahan ke DB
+        CartItem.objects.filter(pk=cart_item.pk).update(quantity=F('quantity') + quantity)
+    invalidate_cart(request.user.pk)
         
     return redirect(request.META.get('HTTP_REFERER', 'main:show_main'))
 
@@ -135,25 +94,25 @@ def get_cart_json(request):
     if not request.user.is_authenticated:
         return JsonResponse({"status": "error", "message": "User belum login"}, status=401)
     
-    # Ambil dari Database
-    cart_items = CartItem.objects.filter(user=request.user)
-    data = []
-
-    for item in cart_items:
-        data.append({
-            "pk": item.product.id,
-            "fields": {
-                "product_name": item.product.name,
-                "brand": item.product.brand,
-                "price": item.product.price,
-                "quantity": item.quantity,
-                "subtotal": item.subtotal, # Menggunakan properti @property dari model
-                "thumbnail_url": item.product.image if item.product.image else "",
-            }
-        })
+    # Ambil dari snapshot cache
+    data = [_cart_item_json(request, item) for item in get_cart_snapshot(request.user.pk)['items']]
 
     return JsonResponse(data, safe=False)
 
+def _cart_item_json(request, item):
+    product = item['product']
+    return {
+        "pk": product['id'],
+        "fields": {
+            "product_name": product['name'],
+            "brand": product['brand'],
+            "price": product['price'],
+            "quantity": item['quantity'],
+            "subtotal": item['subtotal'],
+            "thumbnail_url": thumbnail_url_for(request, product['id'], product['image']),
+        }
+    }
+
 @csrf_exempt
 def add_to_cart_flutter(request, product_id):
     if not request.user.is_authenticated:
@@ -169,8 +128,8 @@ def add_to_cart_flutter(request, product_id):
         )
         
         if not created:
-            cart_item.quantity += 1
-            cart_item.save()
+            CartItem.objects.filter(pk=cart_item.pk).update(quantity=F('quantity') + 1)
+        invalidate_cart(request.user.pk)
         
         return JsonResponse({"status": "success", "message": "Berhasil ditambahkan ke keranjang"}, status=200)
 
@@ -187,6 +146,7 @@ def delete_cart_flutter(request):
         
         # Hapus dari Database
         deleted, _ = CartItem.objects.filter(user=request.user, product_id=product_id).delete()
+        invalidate_cart(request.user.pk)
         
         if deleted > 0:
             return JsonResponse({"status": "success", "message": "Item dihapus"}, status=200)
@@ -195,6 +155,34 @@ def delete_cart_flutter(request):
         
     return JsonResponse({"status": "error"}, status=401)
 
+@csrf_exempt
+def batch_cart_flutter(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({"status": "error", "message": "Login required"}, status=401)
+
+    if request.method != 'POST':
+        return JsonResponse({"status": "error", "message": "Method not allowed"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    try:
+        operations = parse_operations(data.get("operations") if isinstance(data, dict) else None)
+        # Semua operasi dalam satu transaksi; gagal satu, batal semua
+        snapshot = apply_operations(request.user, operations)
+    except CartBatchError as e:
+        return JsonResponse({"status": "error", "message": e.message}, status=e.status)
+
+    # State keranjang terbaru, format item sama dengan get_cart_json
+    return JsonResponse({
+        "status": "success",
+        "items": [_cart_item_json(request, item) for item in snapshot['items']],
+        "total": snapshot['total'],
+        "count": snapshot['count'],
+    })
+
 @csrf_exempt
 def checkout_flutter(request):
     # Wajib login untuk akses database cart
@@ -208,9 +196,15 @@ def checkout_flutter(request):
         if cart_exists:
             # HAPUS DATA DARI DATABASE (Bukan Session lagi)
             CartItem.objects.filter(user=request.user).delete()
+            invalidate_cart(request.user.pk)
             
             return JsonResponse({"status": "success", "message": "Checkout successful!"}, status=200)
         else:
             return JsonResponse({"status": "error", "message": "Cart is empty"}, status=400)
         
-    return JsonResponse({"status": "error"}, status=401)
\ No newline at end of file
+    return JsonResponse({"status": "error"}, status=401)
+
+def cart_cache_stats(request):
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({"status": "error", "message": "Unauthorized"}, status=403)
+    return JsonResponse({"status": "success", **cache_stats()})
@@ -0,0 +1,126 @@
+"""
+Cache response JSON katalog dengan key ber-versi dan ETag.
+
+CatalogVersion adalah counter di database yang dinaikkan setiap kali data
+produk berubah: lewat signal post_save/post_delete Product (catalog.signals)
+dan secara eksplisit di jalur bulk yang tidak memicu signal (import CSV,
+agregat rating, pengurangan stok saat checkout). Key cache memuat versi
+itu, jadi entry lama tidak perlu dihapus satu per satu; setelah versi naik
+key-nya tidak pernah dibaca lagi dan kedaluwarsa sendiri.
+
+Response membawa ETag kuat (hash isi body). Client yang mengirim
+If-None-Match dengan ETag yang sama mendapat 304 tanpa body.
+acached_json_response adalah versi untuk view async.
+"""
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, urlencode
+
+DEFAULT_TIMEOUT = 600
+
+
+def _version_query():
+    from catalog.models import CatalogVersion
+
+    return CatalogVersion.objects.filter(pk=1).values_list("value", flat=True)
+
+
+def current_version():
+    return _version_query().first() or 0
+
+
+async def acurrent_version():
+    return await _version_query().afirst() or 0
+
+
+def _bump():
+    from catalog.models import CatalogVersion
+
+    if not CatalogVersion.objects.filter(pk=1).update(value=F("value") + 1):
+        CatalogVersion.objects.get_or_create(pk=1, defaults={"value": 1})
+
+
+def bump_catalog_version():
+    """
+    Naikkan versi katalog setelah transaksi yang sedang berjalan commit
+    (langsung kalau tidak di dalam transaksi). Di-bump setelah commit supaya
+    baris counter tidak ikut terkunci selama transaksi penulis berjalan.
+    """
+    transaction.on_commit(_bump)
+
+
+def normalize_params(params, names):
+    """Query string kanonik dari parameter yang relevan saja (urut, tanpa nilai kosong)."""
+    pairs = []
+    for name in sorted(names):
+        value = (params.get(name) or "").strip()
+        if value:
+            pairs.append((name, value))
+    return urlencode(pairs)
+
+
+def _etag(body):
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def _timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+
+def _key(request, name, param_names, version):
+    params = hashlib.sha1(normalize_params(request.GET, param_names).encode()).hexdigest()
+    return f"catalog:v{version}:{name}:{params}"
+
+
+def cached_json_response(request, name, param_names, build):
+    """
+    Kembalikan response JSON endpoint katalog `name` dari cache, atau bangun
+    dengan `build()` (yang mengembalikan JsonResponse) saat miss. Response
+    selain 200 (misalnya 400 validasi) tidak di-cache.
+    """
+    timeout = _timeout()
+    key = _key(request, name, param_names, current_version())
+
+    entry = cache.get(key) if timeout else None
+    if entry is None:
+        response = build()
+        if response.status_code != 200:
+            return response
+        entry = (response.content, _etag(response.content))
+        if timeout:
+            cache.set(key, entry, timeout)
+    return _respond(request, entry)
+
+
+async def acached_json_response(request, name, param_names, build):
+    """Seperti cached_json_response; `build` (sync) dijalankan di thread saat miss."""
+    timeout = _timeout()
+    key = _key(request, name, param_names, await acurrent_version())
+
+    entry = await cache.aget(key) if timeout else None
+    if entry is None:
+        response = await sync_to_async(build)()
+        if response.status_code != 200:
+            return response
+        entry = (response.content, _etag(response.content))
+        if timeout:
+            await cache.aset(key, entry, timeout)
+    return _respond(request, entry)
+
+
+def _respond(request, entry):
+    body, etag = entry
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    # Boleh disimpan client, tapi selalu divalidasi ulang dengan ETag
+    response["Cache-Control"] = "public, no-cache"
+    return response
@@ -0,0 +1,219 @@
+"""
+Parsing dan validasi CSV produk untuk catalog.importing.
+
+Modul ini sengaja tidak meng-import Django (model, settings) supaya
+parse_chunk bisa dijalankan di process pool dengan start method apa pun.
+Dengan "spawn" (default di macOS/Windows) proses anak hanya meng-import
+modul ini, tanpa django.setup().
+"""
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+REQUIRED_HEADERS = {"Product Name", "Brand"}
+
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+_READ_BLOCK = 1024 * 1024
+
+# Sama dengan max_length Product.name / Product.brand (dicek di test)
+NAME_MAX_LENGTH = 300
+BRAND_MAX_LENGTH = 100
+
+
+class RowError(ValueError):
+    pass
+
+
+def parse_date(s):
+    if not s:
+        return None
+    s = s.strip()
+    # Jalur cepat tanpa strptime untuk format yang paling sering dipakai
+    try:
+        if "-" in s:
+            return date.fromisoformat(s)
+        a, b, c = s.split("/")
+        if len(a) == 4:
+            return date(int(a), int(b), int(c))  # %Y/%m/%d
+        return date(int(c), int(a), int(b))  # %m/%d/%Y
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unknown date format: {s!r}")
+
+
+def to_int(val, default=0):
+    try:
+        return int(str(val).replace(".", "").replace(",", "").strip())
+    except Exception:
+        return default
+
+
+def _required_int(row, column):
+    raw = row.get(column)
+    if raw is None or not raw.strip():
+        return 0
+    value = to_int(raw, None)
+    if value is None:
+        raise RowError(f"invalid {column}: {raw!r}")
+    return value
+
+
+def clean_row(row):
+    """
+    Normalisasi dan validasi satu baris CSV (dict dari DictReader) menjadi
+    field Product. Melempar RowError kalau barisnya tidak bisa diimport.
+    """
+    name = (row.get("Product Name") or "").strip()
+    brand = (row.get("Brand") or "").strip()
+    category = (row.get("Category") or "").strip()
+    if not name:
+        raise RowError("missing Product Name")
+    if not brand:
+        raise RowError("missing Brand")
+    if not category:
+        raise RowError("missing Category")
+    if len(name) > NAME_MAX_LENGTH or len(brand) > BRAND_MAX_LENGTH:
+        raise RowError("Product Name or Brand too long")
+
+    stock = _required_int(row, "Stock")
+    release_date = None
+    if row.get("Released Date"):
+        try:
+            release_date = parse_date(row["Released Date"])
+        except ValueError as e:
+            raise RowError(str(e))
+    return {
+        "name": name,
+        "brand": brand,
+        "category": category,
+        "description": (row.get("Description") or "").strip() or "",
+        "image": (row.get("Link") or "").strip() or None,
+        "release_date": release_date,
+        "price": _required_int(row, "Price"),
+        "stock": stock,
+        "is_available": stock > 0 if row.get("Stock") is not None else True,
+    }
+
+
+def read_header(path):
+    """Kembalikan (fieldnames, offset byte setelah baris header)."""
+    with open(path, "rb") as f:
+        line = f.readline()
+    fieldnames = next(csv.reader([line.decode("utf-8")]), None)
+    return fieldnames, len(line)
+
+
+def find_chunks(path, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Bagi isi CSV (setelah header) menjadi rentang (start, end, first_line).
+    Batas chunk dicari dengan menghitung paritas tanda kutip, jadi newline
+    di dalam field ber-kutip tidak dianggap akhir record. Semua penghitungan
+    memakai bytes.count/find sehingga tetap cepat untuk file berukuran GB.
+    """
+    _, header_end = read_header(path)
+    chunks = []
+    start, start_line = header_end, 2
+    line, quoted = 2, False
+    target = start + chunk_bytes
+
+    with open(path, "rb") as f:
+        f.seek(header_end)
+        base = header_end
+        while True:
+            block = f.read(_READ_BLOCK)
+            if not block:
+                break
+            i, n = 0, len(block)
+            while i < n:
+                t = target - base
+                if t >= n:
+                    quoted ^= bool(block.count(b'"', i) & 1)
+                    line += block.count(b"\n", i)
+                    i = n
+                    break
+                t = max(t, i)
+                quoted ^= bool(block.count(b'"', i, t) & 1)
+                line += block.count(b"\n", i, t)
+                i = t
+                # Cari newline pertama setelah target yang berada di luar kutip
+                while i < n:
+                    nl = block.find(b"\n", i)
+                    if nl == -1:
+                        quoted ^= bool(block.count(b'"', i) & 1)
+                        i = n
+                        break
+                    quoted ^= bool(block.count(b'"', i, nl) & 1)
+                    i = nl + 1
+                    line += 1
+                    if not quoted:
+                        end = base + i
+                        chunks.append((start, end, start_line))
+                        start, start_line = end, line
+                        target = end + chunk_bytes
+                        break
+            base += n
+
+    if base > start:
+        chunks.append((start, base, start_line))
+    return chunks
+
+
+def parse_chunk(path, start, end, first_line, fieldnames):
+    """
+    Parse dan validasi satu rentang byte. Mengembalikan (rows, rejects) dengan
+    rejects berupa list (nomor_baris, alasan). Aman dijalankan di proses lain.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    rows, rejects = [], []
+    reader = csv.reader(io.StringIO(text, newline=""))
+    width = len(fieldnames)
+    while True:
+        line_no = first_line + reader.line_num
+        try:
+            values = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            rejects.append((line_no, f"malformed CSV: {e}"))
+            continue
+        if not values:
+            continue
+        if len(values) != width:
+            rejects.append((line_no, f"expected {width} columns, got {len(values)}"))
+            continue
+        try:
+            rows.append(clean_row(dict(zip(fieldnames, values))))
+        except RowError as e:
+            rejects.append((line_no, str(e)))
+    return rows, rejects
+
+
+def iter_parsed_chunks(path, fieldnames, workers=1, chunk_bytes=DEFAULT_CHUNK_BYTES, mp_context=None):
+    """
+    Hasil parse_chunk untuk seluruh file, sesuai urutan file. Dengan
+    workers > 1 parsing dilakukan di process pool, dengan jumlah chunk yang
+    sedang diproses dibatasi supaya memori tetap terkendali.
+    """
+    chunks = find_chunks(path, chunk_bytes)
+    if workers <= 1:
+        for start, end, first_line in chunks:
+            yield parse_chunk(path, start, end, first_line, fieldnames)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        pending = []
+        for start, end, first_line in chunks:
+            pending.append(pool.submit(parse_chunk, path, start, end, first_line, fieldnames))
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
@@ -0,0 +1,99 @@
+"""
+Jumlah produk per kategori, brand dan rentang harga untuk filter katalog.
+
+Semuanya berasal dari satu query GROUP BY (category, brand, bucket harga,
+masuk rentang min_price/max_price atau tidak) atas produk tersedia yang
+lolos filter q dan min_rating. Hasilnya paling banyak kategori x brand x
+bucket x 2 baris, berapa pun jumlah produknya, lalu diagregasi di Python.
+
+Setiap facet mengabaikan filternya sendiri: jumlah per brand memakai
+filter kategori dan harga tapi tidak filter brand, dst., jadi pilihan lain
+tetap terlihat beserta jumlahnya. `total` memakai semua filter, sama
+dengan jumlah hasil products_filtered_json.
+"""
+from django.conf import settings
+from django.db.models import BooleanField, Case, Count, IntegerField, Q, Value, When
+
+from .filters import filter_products, validate_filters
+
+# Batas bawah setiap bucket harga (Rupiah); bucket terakhir tanpa batas atas
+DEFAULT_PRICE_BUCKETS = (0, 250_000, 500_000, 1_000_000, 2_000_000, 5_000_000)
+
+
+def price_buckets():
+    return tuple(getattr(settings, "CATALOG_PRICE_BUCKETS", DEFAULT_PRICE_BUCKETS))
+
+
+def _bucket_expression(edges):
+    return Case(
+        *[When(price__lt=upper, then=Value(i)) for i, upper in enumerate(edges[1:])],
+        default=Value(len(edges) - 1),
+        output_field=IntegerField(),
+    )
+
+
+def _in_price_range(params):
+    condition = Q()
+    if params.get('min_price'):
+        condition &= Q(price__gte=params['min_price'])
+    if params.get('max_price'):
+        condition &= Q(price__lte=params['max_price'])
+    if not condition:
+        return Value(True)
+    return Case(When(condition, then=Value(True)), default=Value(False), output_field=BooleanField())
+
+
+def _counts(counter):
+    return [
+        {"value": value, "count": count}
+        for value, count in sorted(counter.items(), key=lambda item: (-item[1], item[0] or ''))
+    ]
+
+
+def facet_counts(products, params):
+    """
+    {"total", "category": [{value, count}], "brand": [...], "price": [{min,
+    max, count}]} untuk queryset `products` dan filter dari `params`.
+    Angka filter yang tidak valid menghasilkan InvalidFilterRequest.
+    """
+    validate_filters(params)
+    edges = price_buckets()
+    # Filter yang juga menjadi facet dievaluasi di Python dari hasil GROUP BY
+    base = {name: params.get(name) for name in ('q', 'min_rating')}
+    rows = (
+        filter_products(products, base)
+        .order_by()
+        .annotate(
+            price_bucket=_bucket_expression(edges),
+            in_range=_in_price_range(params),
+        )
+        .values_list('category', 'brand', 'price_bucket', 'in_range')
+        .annotate(count=Count('id'))
+    )
+
+    category = params.get('category') or None
+    brand = (params.get('brand') or '').lower()
+    total = 0
+    categories, brands, buckets = {}, {}, [0] * len(edges)
+    for row_category, row_brand, bucket, row_in_range, count in rows:
+        category_ok = category is None or row_category == category
+        # Sama dengan filter brand__icontains
+        brand_ok = brand in (row_brand or '').lower()
+        if row_in_range and brand_ok:
+            categories[row_category] = categories.get(row_category, 0) + count
+        if row_in_range and category_ok:
+            brands[row_brand] = brands.get(row_brand, 0) + count
+        if category_ok and brand_ok:
+            buckets[bucket] += count
+            if row_in_range:
+                total += count
+
+    return {
+        "total": total,
+        "category": _counts(categories),
+        "brand": _counts(brands),
+        "price": [
+            {"min": lower, "max": edges[i + 1] if i + 1 < len(edges) else None, "count": buckets[i]}
+            for i, lower in enumerate(edges)
+        ],
+    }
@@ -0,0 +1,55 @@
+import math
+
+from .search import search_products
+
+FILTER_PARAMS = ('q', 'category', 'brand', 'min_price', 'max_price', 'min_rating')
+NUMERIC_FILTER_PARAMS = ('min_price', 'max_price', 'min_rating')
+
+
+class InvalidFilterRequest(ValueError):
+    pass
+
+
+def validate_filters(params):
+    """Tolak min_price, max_price atau min_rating yang bukan angka (biar jadi 400, bukan 500)."""
+    for name in NUMERIC_FILTER_PARAMS:
+        value = params.get(name)
+        if not value:
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            number = math.nan
+        if not math.isfinite(number):
+            raise InvalidFilterRequest(f"Invalid {name}: {value}")
+
+
+def filter_products(products, params):
+    """
+    Terapkan filter katalog (q, category, brand, min_price, max_price, min_rating)
+    dari query params ke queryset Product. Angka yang tidak valid
+    menghasilkan InvalidFilterRequest.
+    """
+    validate_filters(params)
+    query = params.get('q')
+    category = params.get('category')
+    brand = params.get('brand')
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    min_rating = params.get('min_rating')
+
+    if query:
+        # Full-text search (diurutkan berdasarkan relevansi)
+        products = search_products(products, query)
+    if category:
+        products = products.filter(category=category)
+    if brand:
+        products = products.filter(brand__icontains=brand)
+    if min_price:
+        products = products.filter(price__gte=min_price)
+    if max_price:
+        products = products.filter(price__lte=max_price)
+    if min_rating:
+        products = products.filter(rating__gte=min_rating)
+
+    return products
@@ -0,0 +1,121 @@
+"""
+Import produk dari CSV secara batch.
+
+Alurnya:
+1. find_chunks membagi file menjadi beberapa rentang byte. Batasnya selalu
+   di akhir record CSV (newline di luar tanda kutip), jadi deskripsi
+   multi-baris tidak terpotong.
+2. parse_chunk mem-parse dan memvalidasi satu rentang. Fungsi ini bisa
+   dijalankan paralel di process pool lewat iter_parsed_chunks. Keduanya
+   ada di catalog.csv_parsing, yang tidak bergantung pada Django.
+3. ProductImporter (satu writer di proses utama) menerima hasilnya sesuai
+   urutan file dan menulis per batch dengan bulk_create / bulk_update.
+
+Kunci produk adalah (name, brand). Semua kunci yang sudah ada di-preload
+sekali ke dict, dan setiap batch ditulis dalam transaksi sendiri. Memori
+yang dipakai sebanding dengan jumlah produk di database + beberapa chunk,
+bukan dengan ukuran file CSV.
+"""
+import time
+
+from django.db import transaction
+
+from catalog.cache import bump_catalog_version
+from catalog.models import Product
+
+UPDATE_FIELDS = ("category", "description", "price", "stock", "image", "release_date", "is_available")
+
+
+class ProductImporter:
+    def __init__(self, update=False, dry_run=False, batch_size=1000, progress=None):
+        self.update = update
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.progress = progress
+
+        self.created = self.updated = self.skipped = self.unchanged = 0
+        self.rows = 0
+        self.changed_fields = dict.fromkeys(UPDATE_FIELDS, 0)
+        self._started = time.monotonic()
+
+        # (name, brand) -> pk untuk semua produk yang sudah ada
+        self.existing = {
+            (name, brand): pk
+            for pk, name, brand in Product.objects.values_list("pk", "name", "brand").iterator(chunk_size=10_000)
+        }
+        self._creates = {}
+        self._updates = {}
+
+    def add(self, fields):
+        self.rows += 1
+        key = (fields["name"], fields["brand"])
+
+        pending = self._creates.get(key) or self._updates.get(key)
+        if pending is not None:
+            # Kunci yang sama muncul lagi di batch yang sama
+            if self.update:
+                pending.update(fields)
+            else:
+                self.skipped += 1
+        elif key in self.existing:
+            if self.update and self.existing[key] is not None:
+                self._updates[key] = dict(fields)
+            else:
+                self.skipped += 1
+        else:
+            self._creates[key] = dict(fields)
+
+        if len(self._creates) + len(self._updates) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        creates, updates = self._creates, self._updates
+        self._creates, self._updates = {}, {}
+        if not creates and not updates:
+            return
+
+        to_update = self._diff(updates)
+        if not self.dry_run:
+            with transaction.atomic():
+                objs = Product.objects.bulk_create([Product(**f) for f in creates.values()], batch_size=self.batch_size)
+                if to_update:
+                    Product.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=self.batch_size)
+            for key, obj in zip(creates, objs):
+                self.existing[key] = obj.pk
+            # bulk_create / bulk_update tidak memicu signal Product
+            bump_catalog_version()
+        else:
+            for key in creates:
+                self.existing[key] = None
+
+        self.created += len(creates)
+        self.updated += len(to_update)
+        if self.progress:
+            self.progress(self)
+
+    def _diff(self, updates):
+        """Bandingkan dengan nilai di DB; hanya baris yang benar-benar berubah yang di-update."""
+        if not updates:
+            return []
+        pks = {self.existing[key]: key for key in updates}
+        current = Product.objects.filter(pk__in=pks).values("pk", *UPDATE_FIELDS)
+
+        changed = []
+        for old in current:
+            new = updates[pks[old["pk"]]]
+            fields = [f for f in UPDATE_FIELDS if old[f] != new[f]]
+            if not fields:
+                self.unchanged += 1
+                continue
+            for f in fields:
+                self.changed_fields[f] += 1
+            changed.append(Product(pk=old["pk"], **new))
+        return changed
+
+    def finish(self):
+        self.flush()
+        return self
+
+    @property
+    def rate(self):
+        return self.rows / max(time.monotonic() - self._started, 1e-9)
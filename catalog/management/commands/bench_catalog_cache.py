@@ -0,0 +1,81 @@
+import random
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+
+from catalog.models import Product
+from catalog.views import products_filtered_json
+
+BRANDS = ["Nike", "Adidas", "Spalding", "Wilson", "Tarmak", "Under Armour", "Puma"]
+CATEGORIES = [c for c, _ in Product.CATEGORY_CHOICES]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test products_filtered_json without cache, with the versioned cache, "
+        "and with If-None-Match revalidation (304). Synthetic rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=5000)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        try:
+            with transaction.atomic():
+                self._run(opts)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, opts):
+        rng = random.Random(opts["seed"])
+        Product.objects.bulk_create(
+            [
+                Product(
+                    name=f"Bench product {i}", brand=rng.choice(BRANDS), category=rng.choice(CATEGORIES),
+                    price=rng.randrange(100_000, 3_000_000, 1000), stock=5,
+                )
+                for i in range(opts["products"])
+            ],
+            batch_size=2000,
+        )
+
+        # Kombinasi filter yang realistis: sedikit variasi, banyak pengunjung
+        combos = [{"category": c} for c in CATEGORIES] + [{"brand": b.lower()} for b in BRANDS]
+        combos += [{"category": c, "max_price": 1_000_000} for c in CATEGORIES]
+        plan = [rng.choice(combos) for _ in range(opts["requests"])]
+        factory = RequestFactory()
+
+        self.stdout.write(f"{opts['products']} products, {len(combos)} distinct filters, {len(plan)} requests")
+        results = {}
+        with override_settings(CATALOG_CACHE_TIMEOUT=0):
+            results["uncached"] = self._load(factory, plan)
+        cache.clear()
+        results["cached"] = self._load(factory, plan)
+        results["304"] = self._load(factory, plan, conditional=True)
+
+        base = results["uncached"][0]
+        for mode, (rps, size) in results.items():
+            self.stdout.write(f"{mode:>9}: {rps:>9,.0f} req/s  {rps / base:6.1f}x  {size / 1e6:7.1f} MB sent")
+
+    def _load(self, factory, plan, conditional=False):
+        etags = {}
+        sent = 0
+        start = time.perf_counter()
+        for params in plan:
+            key = tuple(sorted(params.items()))
+            headers = {"HTTP_IF_NONE_MATCH": etags[key]} if conditional and key in etags else {}
+            response = async_to_sync(products_filtered_json)(factory.get("/catalog/json/filtered/", params, **headers))
+            etags[key] = response["ETag"]
+            sent += len(response.content)
+        return len(plan) / (time.perf_counter() - start), sent
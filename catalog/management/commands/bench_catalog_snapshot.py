@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+
+from catalog import snapshot
+from catalog.models import Product
+from catalog.views import products_filtered_json
+
+BRANDS = ["Nike", "Adidas", "Spalding", "Wilson", "Tarmak", "Under Armour", "Puma"]
+CATEGORIES = [c for c, _ in Product.CATEGORY_CHOICES]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark products_filtered_json through the ORM vs the in-process catalog snapshot "
+        "(CATALOG_SNAPSHOT), with the response cache disabled. Synthetic rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        try:
+            with transaction.atomic():
+                self._run(opts)
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            # Snapshot berisi baris sintetis yang sudah di-rollback
+            snapshot.clear_snapshot()
+
+    def _run(self, opts):
+        rng = random.Random(opts["seed"])
+        Product.objects.bulk_create(
+            [
+                Product(
+                    name=f"Bench product {i}", brand=rng.choice(BRANDS), category=rng.choice(CATEGORIES),
+                    price=rng.randrange(100_000, 3_000_000, 1000), stock=rng.randrange(0, 50),
+                    rating=round(rng.uniform(0, 5), 1), description="Synthetic product for benchmarking",
+                )
+                for i in range(opts["products"])
+            ],
+            batch_size=2000,
+        )
+
+        # Filter sempit (yang biasa dipakai grid) sampai yang lebar
+        combos = [{"category": c, "brand": b.lower(), "min_price": 2_500_000} for c in CATEGORIES for b in BRANDS]
+        combos += [{"brand": b.lower(), "min_rating": 4.5, "sort": "-rating"} for b in BRANDS]
+        combos += [{"category": c, "max_price": 1_000_000, "sort": "price"} for c in CATEGORIES]
+        plan = [rng.choice(combos) for _ in range(opts["requests"])]
+        factory = RequestFactory()
+
+        snapshot.clear_snapshot()
+        with override_settings(CATALOG_SNAPSHOT=True):
+            start = time.perf_counter()
+            snap = snapshot.get_snapshot()
+            build = time.perf_counter() - start
+            select = []
+            for params in plan:
+                start = time.perf_counter()
+                snap.select({k: str(v) for k, v in params.items()}, params.get("sort", "id"))
+                select.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(
+            f"{opts['products']} products, {len(combos)} distinct filters, {len(plan)} requests; "
+            f"snapshot build {build:.2f}s"
+        )
+        self.stdout.write(f"snapshot select: p50={_percentile(select, 50):.3f}ms p99={_percentile(select, 99):.3f}ms")
+
+        results = {}
+        with override_settings(CATALOG_CACHE_TIMEOUT=0):
+            for mode, enabled in (("orm", False), ("snapshot", True)):
+                with override_settings(CATALOG_SNAPSHOT=enabled):
+                    results[mode] = self._load(factory, plan)
+                samples = results[mode]
+                self.stdout.write(
+                    f"{mode:>9}: p50={_percentile(samples, 50):.2f}ms p99={_percentile(samples, 99):.2f}ms "
+                    f"mean={statistics.mean(samples):.2f}ms"
+                )
+        speedup = _percentile(results["orm"], 50) / max(_percentile(results["snapshot"], 50), 1e-9)
+        self.stdout.write(self.style.SUCCESS(f"p50 speedup: {speedup:.1f}x"))
+
+    def _load(self, factory, plan):
+        samples = []
+        for params in plan:
+            start = time.perf_counter()
+            async_to_sync(products_filtered_json)(factory.get("/catalog/json/filtered/", params))
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
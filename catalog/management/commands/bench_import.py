@@ -0,0 +1,71 @@
+import csv
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.csv_parsing import DEFAULT_CHUNK_BYTES, iter_parsed_chunks, read_header
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark CSV parse/validate throughput of the product importer for "
+        "different worker counts on a synthetic copy of data/data.csv."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000)
+        parser.add_argument("--workers", type=str, default="1,2,4,8", help="Comma separated worker counts")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_BYTES)
+        parser.add_argument("--source", type=str, default=str(settings.BASE_DIR / "data" / "data.csv"))
+        parser.add_argument("--keep", action="store_true", help="Keep the generated CSV file")
+
+    def handle(self, *args, **opts):
+        try:
+            workers = [int(w) for w in opts["workers"].split(",") if w.strip()]
+        except ValueError:
+            raise CommandError("--workers must be a comma separated list of integers.")
+
+        path = self._generate(opts["source"], opts["rows"])
+        try:
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            self.stdout.write(f"Synthetic CSV: {opts['rows']} rows, {size_mb:.0f} MB ({path})")
+            fieldnames, _ = read_header(path)
+
+            baseline = None
+            for n in workers:
+                start = time.perf_counter()
+                parsed = rejected = 0
+                for rows, rejects in iter_parsed_chunks(path, fieldnames, n, opts["chunk_size"]):
+                    parsed += len(rows)
+                    rejected += len(rejects)
+                elapsed = time.perf_counter() - start
+                rate = (parsed + rejected) / elapsed
+                baseline = baseline or rate
+                self.stdout.write(
+                    f"workers={n:<3} {elapsed:7.2f}s  {rate:>10,.0f} rows/s  "
+                    f"speedup={rate / baseline:.2f}x  rejected={rejected}"
+                )
+            self.stdout.write(f"(os.cpu_count() = {os.cpu_count()})")
+        finally:
+            if not opts["keep"]:
+                os.unlink(path)
+
+    def _generate(self, source, n_rows):
+        with open(source, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            template = [row for row in reader if row]
+        name_col = header.index("Product Name")
+
+        handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="", encoding="utf-8")
+        with handle:
+            writer = csv.writer(handle)
+            writer.writerow(header)
+            for i in range(n_rows):
+                row = list(template[i % len(template)])
+                row[name_col] = f"{row[name_col]} #{i}"
+                writer.writerow(row)
+        return handle.name
@@ -0,0 +1,105 @@
+import random
+import re
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from catalog.models import Product
+from catalog.search import search_backend, search_products
+
+BRANDS = ["Nike", "Adidas", "Spalding", "Wilson", "Tarmak", "Under Armour", "Puma"]
+CATEGORIES = [c for c, _ in Product.CATEGORY_CHOICES]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _vocabulary():
+    path = settings.BASE_DIR / "data" / "data.csv"
+    words = set()
+    if path.exists():
+        words.update(w.lower() for w in re.findall(r"[A-Za-z]{3,}", path.read_text(encoding="utf-8")))
+    return sorted(words) or ["basketball", "jersey", "shoes", "ball", "shorts", "court", "dri", "fit"]
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark full-text search vs name__icontains on a synthetic catalog. "
+        "All synthetic rows are rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--page-size", type=int, default=24)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        try:
+            with transaction.atomic():
+                self._run(opts)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, opts):
+        rng = random.Random(opts["seed"])
+        vocab = _vocabulary()
+
+        self.stdout.write(f"Generating {opts['products']} products (backend={search_backend()})...")
+        batch = []
+        for i in range(opts["products"]):
+            batch.append(Product(
+                name=" ".join(rng.choices(vocab, k=4)).title(),
+                brand=rng.choice(BRANDS),
+                category=rng.choice(CATEGORIES),
+                description=" ".join(rng.choices(vocab, k=40)),
+                price=rng.randrange(100_000, 5_000_000, 1000),
+                stock=rng.randrange(0, 200),
+            ))
+            if len(batch) == 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+
+        queries = [rng.choice(vocab) for _ in range(opts["queries"])]
+        page = opts["page_size"]
+        base = Product.objects.filter(is_available=True)
+
+        # "page" = halaman pertama hasil, "count" = jumlah semua hasil (full scan untuk icontains)
+        paths = {
+            "icontains/page": lambda q: list(base.filter(name__icontains=q).values_list("id", flat=True)[:page]),
+            "fulltext/page": lambda q: list(search_products(base, q).values_list("id", flat=True)[:page]),
+            "icontains/count": lambda q: base.filter(name__icontains=q).count(),
+            "fulltext/count": lambda q: search_products(base, q).count(),
+        }
+        results = {}
+        for label, run in paths.items():
+            run(queries[0])  # warm-up
+            samples = []
+            for q in queries:
+                start = time.perf_counter()
+                run(q)
+                samples.append((time.perf_counter() - start) * 1000)
+            results[label] = samples
+            self.stdout.write(
+                f"{label:>16}: p50={_percentile(samples, 50):.2f}ms "
+                f"p99={_percentile(samples, 99):.2f}ms mean={statistics.mean(samples):.2f}ms"
+            )
+
+        for mode in ("page", "count"):
+            speedup = (
+                _percentile(results[f"icontains/{mode}"], 50)
+                / max(_percentile(results[f"fulltext/{mode}"], 50), 1e-9)
+            )
+            self.stdout.write(self.style.SUCCESS(f"{mode} p50 speedup: {speedup:.1f}x"))
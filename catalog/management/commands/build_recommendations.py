@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the related-products index (top-K item-item cosine neighbours from wishlist, "
+        "cart and order interactions) used by catalog/<pk>/related/. Run it periodically, "
+        "e.g. nightly from cron; running workers pick up the new file automatically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--k", type=int, default=recommendations.DEFAULT_K, help="Neighbours per product")
+        parser.add_argument("--block-size", type=int, default=None, help="Products per similarity block")
+        parser.add_argument("--output", default=None, help="Index file (default: RECOMMENDATIONS_PATH)")
+
+    def handle(self, *args, **opts):
+        if opts["k"] < 1:
+            raise CommandError("--k must be positive.")
+        stats = recommendations.build(k=opts["k"], path=opts["output"], block_size=opts["block_size"])
+        self.stdout.write(self.style.SUCCESS(
+            "Done. products={products} users={users} interactions={interactions} "
+            "with_neighbors={with_neighbors} k={k} seconds={seconds}".format(**stats)
+        ))
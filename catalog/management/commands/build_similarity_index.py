@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the text similarity index (hashed TF-IDF of name, brand, category and description) "
+        "used by catalog/<pk>/similar/. Products created or edited in the app are refreshed "
+        "incrementally; rebuild after bulk imports and periodically to recompute IDF."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=similarity.BUILD_CHUNK, help="Products vectorized per batch")
+        parser.add_argument("--output", default=None, help="Index directory (default: SIMILARITY_INDEX_DIR)")
+
+    def handle(self, *args, **opts):
+        if opts["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        stats = similarity.build(path=opts["output"], chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            "Done. products={products} replayed={replayed} terms={terms} megabytes={megabytes} seconds={seconds}".format(**stats)
+        ))
@@ -1,18 +1,10 @@
 import csv
-from datetime import datetime
+
 from django.core.management.base import BaseCommand, CommandError
-from catalog.models import Product
-from django.db import transaction
 
-def parse_date(s):
-    if not s:
-        return None
-    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d"):
-        try:
-            return datetime.strptime(s.strip(), fmt).date()
-        except ValueError:
-            continue
-    raise ValueError(f"Unknown date format: {s!r}")
+from catalog.csv_parsing import DEFAULT_CHUNK_BYTES, REQUIRED_HEADERS, iter_parsed_chunks, read_header
+from catalog.importing import ProductImporter
+
 
 class Command(BaseCommand):
     help = "Import products from a CSV file into the Product model"
@@ -28,90 +20,113 @@ class Command(BaseCommand):
             action="store_true",
             help="Update existing rows (matched by name + brand) instead of skipping",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows written per bulk_create/bulk_update (each batch is its own transaction)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Do not write anything, only report what would change",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes used to parse and validate the CSV (1 = parse in this process)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_BYTES,
+            help="Approximate bytes of CSV handed to a worker at a time",
+        )
+        parser.add_argument(
+            "--rejects",
+            type=str,
+            default=None,
+            help="Where to write rejected rows (default: <csv_path>.rejects.csv)",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **opts):
         csv_path = opts["csv_path"]
-        do_update = opts["update"]
+        if opts["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if opts["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        rejects_path = opts["rejects"] or f"{csv_path}.rejects.csv"
 
         try:
-            with open(csv_path, newline="", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                if not reader.fieldnames:
-                    raise CommandError("CSV has no header row.")
-                required = {"Product Name", "Brand"}
-                missing = required - set(h.strip() for h in reader.fieldnames)
-                if missing:
-                    raise CommandError(f"CSV missing required headers: {missing}")
-
-                created, updated, skipped = 0, 0, 0
-
-                for row in reader:
-                    # Normalize/clean inputs from CSV
-                    name = (row.get("Product Name") or "").strip()
-                    brand = (row.get("Brand") or "").strip()
-                    category = (row.get("Category") or "").strip() or None
-                    description = (row.get("Description") or "").strip() or ""
-                    image = (row.get("Link") or "").strip() or None
-                    release_date = None
-                    if row.get("Released Date"):
-                        release_date = parse_date(row["Released Date"])
-
-                    def to_int(val, default=0):
-                        try:
-                            return int(str(val).replace(".", "").replace(",", "").strip())
-                        except Exception:
-                            return default
-
-                    price = to_int(row.get("Price"), 0)
-                    stock = to_int(row.get("Stock"), 0)
-
-                    is_available = stock > 0 if row.get("Stock") is not None else True
-
-                    if do_update:
-                        obj, was_created = Product.objects.update_or_create(
-                            name=name,
-                            brand=brand,
-                            defaults={
-                                "category": category,
-                                "description": description,
-                                "price": price,
-                                "stock": stock,
-                                "image": image,
-                                "release_date": release_date,
-                                "is_available": is_available,
-                            },
-                        )
-                        if was_created:
-                            created += 1
-                        else:
-                            updated += 1
-                    else:
-                        obj, was_created = Product.objects.get_or_create(
-                            name=name,
-                            brand=brand,
-                            defaults={
-                                "category": category,
-                                "description": description,
-                                "price": price,
-                                "stock": stock,
-                                "image": image,
-                                "release_date": release_date,
-                                "is_available": is_available,
-                            },
-                        )
-                        if was_created:
-                            created += 1
-                        else:
-                            skipped += 1
+            fieldnames, _ = read_header(csv_path)
+            if not fieldnames:
+                raise CommandError("CSV has no header row.")
+            missing = REQUIRED_HEADERS - set(h.strip() for h in fieldnames)
+            if missing:
+                raise CommandError(f"CSV missing required headers: {missing}")
 
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Done. created={created}, updated={updated}, skipped={skipped}"
-                    )
-                )
+            importer = ProductImporter(
+                update=opts["update"],
+                dry_run=opts["dry_run"],
+                batch_size=opts["batch_size"],
+                progress=self._progress,
+            )
+            rejected = 0
+            rejects_file = None
+            try:
+                chunks = iter_parsed_chunks(csv_path, fieldnames, opts["workers"], opts["chunk_size"])
+                for rows, rejects in chunks:
+                    for fields in rows:
+                        importer.add(fields)
+                    rejected += len(rejects)
+                    # --dry-run tidak menulis file apa pun, hanya melaporkan jumlahnya
+                    if rejects and not opts["dry_run"]:
+                        if rejects_file is None:
+                            rejects_file = open(rejects_path, "w", newline="", encoding="utf-8")
+                            writer = csv.writer(rejects_file)
+                            writer.writerow(["line", "reason"])
+                        writer.writerows(rejects)
+                importer.finish()
+            finally:
+                if rejects_file is not None:
+                    rejects_file.close()
 
         except FileNotFoundError:
             raise CommandError(f"CSV not found: {csv_path}")
+        except CommandError:
+            raise
         except Exception as e:
             raise CommandError(str(e))
+
+        self._summary(importer)
+        if rejected and opts["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"Would reject {rejected} row(s)"))
+        elif rejected:
+            self.stdout.write(self.style.WARNING(f"Rejected {rejected} row(s), see {rejects_path}"))
+
+    def _progress(self, importer):
+        self.stdout.write(
+            f"  {importer.rows} rows processed "
+            f"(created={importer.created}, updated={importer.updated}, skipped={importer.skipped}) "
+            f"{importer.rate:.0f} rows/s"
+        )
+
+    def _summary(self, importer):
+        if importer.dry_run:
+            self.stdout.write(self.style.WARNING("Dry run, nothing was written."))
+            changed = ", ".join(f"{k}={v}" for k, v in importer.changed_fields.items() if v)
+            self.stdout.write(
+                f"Would create={importer.created}, update={importer.updated}, "
+                f"unchanged={importer.unchanged}, skip={importer.skipped}"
+            )
+            if changed:
+                self.stdout.write(f"Changed fields: {changed}")
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done. created={importer.created}, updated={importer.updated}, "
+                f"unchanged={importer.unchanged}, skipped={importer.skipped}"
+            )
+        )
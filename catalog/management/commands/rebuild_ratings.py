@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from catalog.cache import bump_catalog_version
+from catalog.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Recompute Product.review_count, rating_sum and rating from all reviews"
+
+    @transaction.atomic
+    def handle(self, *args, **opts):
+        updated = rebuild_ratings()
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"Done. products={updated}"))
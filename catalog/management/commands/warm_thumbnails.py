@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import thumbnails
+from catalog.models import Product
+
+
+class Command(BaseCommand):
+    help = "Pre-generate thumbnail variants (all widths, WebP + JPEG) for every product image"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Images fetched and resized concurrently",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate variants even if they already exist",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        urls = set(
+            Product.objects.exclude(image__isnull=True).exclude(image="")
+            .values_list("image", flat=True).iterator(chunk_size=2000)
+        )
+        generated = skipped = failed = 0
+        started = time.monotonic()
+
+        # Fetch gambar dominan I/O dan Pillow melepas GIL saat resize/encode
+        with ThreadPoolExecutor(max_workers=opts["workers"]) as pool:
+            futures = {pool.submit(thumbnails.generate, url, opts["force"]): url for url in urls}
+            for future in as_completed(futures):
+                try:
+                    if future.result():
+                        generated += 1
+                    else:
+                        skipped += 1
+                except thumbnails.ThumbnailError as e:
+                    failed += 1
+                    self.stderr.write(f"  {futures[future]}: {e}")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done. images={len(urls)}, generated={generated}, skipped={skipped}, "
+                f"failed={failed} ({elapsed:.1f}s)"
+            )
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+from catalog.ratings import rebuild_ratings
+from catalog.search import install_search_index
+
+
+def backfill_ratings(apps, schema_editor):
+    rebuild_ratings(apps.get_model('catalog', 'Product'), apps.get_model('review', 'Review'))
+
+
+def reinstall_search_index(apps, schema_editor):
+    # AddField me-remake tabel catalog_product di SQLite, trigger FTS ikut hilang
+    install_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_product_search'),
+        ('review', '0001_initial'),
+    ]
+
+    operations = [
+        # Saat rollback, RemoveField juga me-remake tabel; pasang lagi triggernya
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search_index),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
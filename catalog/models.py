@@ -18,7 +18,38 @@ class Product(models.Model):
     image = models.URLField(max_length=1000, blank=True, null=True)
     release_date = models.DateField(blank=True, null=True)
     is_available = models.BooleanField(default=True)
+    # Agregat rating (dikelola catalog.ratings, jangan diubah manual)
     rating = models.FloatField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Katalog publik selalu difilter is_available=True, jadi cukup index parsial
+            models.Index(
+                fields=['category', 'price'], condition=models.Q(is_available=True),
+                name='product_avail_cat_price_idx',
+            ),
+            # Urutan ?sort=price / ?sort=rating di products_page_json (keyset pada id)
+            models.Index(
+                fields=['price', 'id'], condition=models.Q(is_available=True),
+                name='product_avail_price_idx',
+            ),
+            models.Index(
+                fields=['rating', 'id'], condition=models.Q(is_available=True),
+                name='product_avail_rating_idx',
+            ),
+            # Covering index untuk GROUP BY facet (catalog.facets), tanpa membaca tabel
+            models.Index(
+                fields=['category', 'brand', 'price'], condition=models.Q(is_available=True),
+                name='product_avail_facets_idx',
+            ),
+        ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+class CatalogVersion(models.Model):
+    """Satu baris counter yang naik setiap kali data produk berubah (lihat catalog.cache)."""
+    value = models.PositiveBigIntegerField(default=0)
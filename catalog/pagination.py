@@ -0,0 +1,129 @@
+import base64
+import datetime
+import json
+from decimal import Decimal
+
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+
+# Field yang boleh diminta lewat ?fields=
+PRODUCT_JSON_FIELDS = (
+    "id", "name", "brand", "category", "price",
+    "release_date", "is_available", "image", "description", "stock",
+)
+# Field tambahan yang hanya tersedia di endpoint paginasi
+PAGE_FIELDS = PRODUCT_JSON_FIELDS + ("rating", "review_count")
+# Default tanpa description supaya payload grid tetap kecil
+DEFAULT_PAGE_FIELDS = tuple(f for f in PAGE_FIELDS if f != "description")
+
+DEFAULT_PAGE_LIMIT = 20
+MAX_PAGE_LIMIT = 100
+
+# release_date boleh NULL, jadi dipetakan ke tanggal minimum agar urutannya stabil
+_NULL_DATE = datetime.date(1, 1, 1)
+
+SORT_KEYS = {
+    "price": F("price"),
+    "release_date": Coalesce("release_date", Value(_NULL_DATE)),
+    "rating": F("rating"),
+    "id": F("id"),
+}
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def parse_fields(raw):
+    if not raw:
+        return DEFAULT_PAGE_FIELDS
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in PAGE_FIELDS]
+    if unknown:
+        raise InvalidPageRequest(f"Unknown field(s): {', '.join(unknown)}")
+    if "id" not in fields:
+        fields.insert(0, "id")
+    return tuple(dict.fromkeys(fields))
+
+
+def parse_limit(raw):
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_LIMIT
+    return max(1, min(limit, MAX_PAGE_LIMIT))
+
+
+def parse_sort(raw):
+    sort = raw or "id"
+    if sort.lstrip("-") not in SORT_KEYS:
+        raise InvalidPageRequest(f"Unknown sort: {sort}")
+    return sort
+
+
+def encode_cursor(sort, value, pk):
+    if isinstance(value, datetime.date):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    payload = json.dumps({"s": sort, "v": value, "id": pk}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["s"] != sort:
+            raise InvalidPageRequest("Cursor does not match sort")
+        value = data["v"]
+        key = sort.lstrip("-")
+        if key == "price":
+            value = Decimal(value)
+        elif key == "release_date":
+            value = datetime.date.fromisoformat(value)
+        elif key == "rating":
+            value = float(value)
+        else:
+            value = int(value)
+        return value, int(data["id"])
+    except InvalidPageRequest:
+        raise
+    except Exception:
+        raise InvalidPageRequest("Invalid cursor")
+
+
+def sort_products(products, sort):
+    """Urutkan berdasarkan `sort` lalu id, dengan anotasi `sort_key` (dipakai keyset_page)."""
+    products = products.annotate(sort_key=SORT_KEYS[sort.lstrip("-")])
+    if sort.startswith("-"):
+        return products.order_by("-sort_key", "-id")
+    return products.order_by("sort_key", "id")
+
+
+def keyset_page(products, sort, limit, fields, cursor=None):
+    """
+    Ambil satu halaman produk dengan keyset pagination (urut berdasarkan
+    `sort` lalu `id` sebagai tie-breaker). Mengembalikan (rows, next_cursor).
+    """
+    descending = sort.startswith("-")
+    products = sort_products(products, sort)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        if descending:
+            products = products.filter(Q(sort_key__lt=value) | Q(sort_key=value, id__lt=last_id))
+        else:
+            products = products.filter(Q(sort_key__gt=value) | Q(sort_key=value, id__gt=last_id))
+
+    # Ambil satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+    rows = list(products.values(*fields, "sort_key")[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, last["sort_key"], last["id"])
+
+    for row in rows:
+        del row["sort_key"]
+    return rows, next_cursor
@@ -0,0 +1,59 @@
+from django.db.models import Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.db.models.lookups import GreaterThan
+
+from catalog.cache import bump_catalog_version
+
+
+def _average(count, total):
+    return Case(
+        When(GreaterThan(count, 0), then=Cast(total, FloatField()) / count),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def apply_review_change(product_id, count_delta=0, sum_delta=0):
+    """
+    Perbarui agregat rating produk secara atomik (satu UPDATE dengan F()).
+    Contoh: review baru -> (1, rating), edit -> (0, baru - lama),
+    hapus -> (-1, -rating).
+
+    Hasilnya di-clamp ke 0 supaya data lama yang belum di-backfill tidak
+    membuat count negatif; jalankan `rebuild_ratings` untuk menyelaraskan.
+    """
+    from catalog.models import Product
+
+    new_count = Greatest(F("review_count") + count_delta, Value(0))
+    new_sum = Case(
+        When(GreaterThan(new_count, 0), then=F("rating_sum") + sum_delta),
+        default=Value(0),
+    )
+    Product.objects.filter(pk=product_id).update(
+        review_count=new_count,
+        rating_sum=new_sum,
+        rating=_average(new_count, new_sum),
+    )
+    bump_catalog_version()
+
+
+def rebuild_ratings(product_model=None, review_model=None):
+    """
+    Hitung ulang agregat rating semua produk dari tabel Review
+    (dua UPDATE massal). Model bisa di-inject untuk dipakai di migration.
+    """
+    if product_model is None:
+        from catalog.models import Product as product_model
+    if review_model is None:
+        from review.models import Review as review_model
+
+    reviews = review_model.objects.filter(product=OuterRef("pk")).order_by().values("product")
+    review_count = reviews.annotate(n=Count("pk")).values("n")
+    rating_sum = reviews.annotate(total=Sum("rating")).values("total")
+
+    updated = product_model.objects.update(
+        review_count=Coalesce(Subquery(review_count), 0),
+        rating_sum=Coalesce(Subquery(rating_sum), 0),
+    )
+    product_model.objects.update(rating=_average(F("review_count"), F("rating_sum")))
+    return updated
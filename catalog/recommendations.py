@@ -0,0 +1,206 @@
+"""
+Rekomendasi "produk terkait" berbasis interaksi user (item-item cosine).
+
+Dibangun offline oleh perintah build_recommendations:
+
+1. Matriks sparse user x produk (scipy.sparse) dari Wishlist, CartItem dan
+   OrderItem, dengan bobot per sumber (INTERACTION_WEIGHTS). Interaksi yang
+   sama dijumlahkan lalu di-log1p supaya pembeli besar tidak mendominasi.
+2. Kolom dinormalisasi (norma L2), jadi X.T @ X langsung berisi cosine.
+3. Similarity dihitung per blok produk (X[:, blok].T @ X), sehingga memori
+   puncak hanya blok x jumlah produk, bukan produk x produk. Dari setiap
+   baris diambil top-K tetangga dengan argpartition.
+4. Hasilnya satu file .npy berisi array terstruktur (id, neighbors[K],
+   scores[K]) urut id, ditulis atomik.
+
+Saat melayani request file dibuka dengan mmap (np.load mmap_mode="r"),
+sekali per proses dan dibuka ulang kalau file diganti build baru. Lookup
+produk = searchsorted di kolom id (O(log n)) lalu membaca satu baris K
+elemen, tanpa query database.
+"""
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+from cart.models import CartItem, OrderItem
+from catalog.models import Product
+from wishlist.models import Wishlist
+
+DEFAULT_K = 20
+# Batas elemen matriks padat per blok (blok x jumlah produk, float32)
+BLOCK_ELEMENTS = 4_000_000
+INTERACTION_WEIGHTS = {
+    "wishlist": 1.0,
+    "cart": 2.0,
+    "order": 3.0,
+}
+
+
+def index_path():
+    return Path(getattr(settings, "RECOMMENDATIONS_PATH", settings.BASE_DIR / ".cache" / "recommendations" / "related.npy"))
+
+
+def _interactions():
+    """(user_id, product_id, bobot) dari semua sumber interaksi."""
+    sources = (
+        ("wishlist", Wishlist.objects.values_list("user_id", "product_id")),
+        ("cart", CartItem.objects.values_list("user_id", "product_id")),
+        ("order", OrderItem.objects.filter(order__user__isnull=False).values_list("order__user_id", "product_id")),
+    )
+    users, products, weights = [], [], []
+    for name, rows in sources:
+        for user_id, product_id in rows.iterator(chunk_size=5000):
+            users.append(user_id)
+            products.append(product_id)
+            weights.append(INTERACTION_WEIGHTS[name])
+    return np.asarray(users, dtype=np.int64), np.asarray(products, dtype=np.int64), np.asarray(weights, dtype=np.float32)
+
+
+def interaction_matrix(product_ids, users, products, weights):
+    """Matriks CSC user x produk; kolom mengikuti urutan `product_ids` (urut naik)."""
+    if not len(product_ids):
+        return sparse.csc_matrix((0, 0), dtype=np.float32)
+    columns = np.searchsorted(product_ids, products)
+    known = (columns < len(product_ids)) & (product_ids[np.minimum(columns, len(product_ids) - 1)] == products)
+    user_ids, rows = np.unique(users[known], return_inverse=True)
+    matrix = sparse.coo_matrix(
+        (weights[known], (rows, columns[known])), shape=(len(user_ids), len(product_ids)), dtype=np.float32,
+    ).tocsr()  # duplikat (user, produk) dijumlahkan di sini
+    matrix.data = np.log1p(matrix.data)
+    return matrix.tocsc()
+
+
+def _normalize_columns(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    return matrix @ sparse.diags(1 / norms, format="csc")
+
+
+def top_k_neighbours(matrix, k, block_size=None):
+    """
+    (neighbors, scores) berukuran (produk, k): indeks kolom tetangga paling
+    mirip per produk (cosine, urut turun) dan skornya. Slot kosong = -1 / 0.
+    """
+    n = matrix.shape[1]
+    k = min(k, max(n - 1, 0))
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if not n or not k:
+        return neighbors, scores
+
+    normalized = _normalize_columns(matrix).astype(np.float32)
+    transposed = normalized.T.tocsr()
+    block_size = block_size or max(1, BLOCK_ELEMENTS // n)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = (transposed[start:stop] @ normalized).toarray()
+        block[np.arange(stop - start), np.arange(start, stop)] = 0  # bukan tetangga dirinya sendiri
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        empty = top_scores <= 0
+        neighbors[start:stop] = np.where(empty, -1, top)
+        scores[start:stop] = np.where(empty, 0, top_scores)
+    return neighbors, scores
+
+
+def build(k=DEFAULT_K, path=None, block_size=None):
+    """Bangun index dari database dan tulis ke `path`. Mengembalikan statistik build."""
+    started = time.perf_counter()
+    product_ids = np.asarray(Product.objects.order_by("id").values_list("id", flat=True), dtype=np.int64)
+    users, products, weights = _interactions()
+    matrix = interaction_matrix(product_ids, users, products, weights)
+    neighbors, scores = top_k_neighbours(matrix, k, block_size)
+
+    k = neighbors.shape[1]
+    index = np.zeros(len(product_ids), dtype=[("id", np.int64), ("neighbors", np.int64, (k,)), ("scores", np.float32, (k,))])
+    index["id"] = product_ids
+    # Simpan id produk, bukan indeks kolom, supaya lookup tidak butuh tabel lain
+    index["neighbors"] = np.where(neighbors >= 0, product_ids[np.maximum(neighbors, 0)], -1)
+    index["scores"] = scores
+    _write_atomic(Path(path or index_path()), index)
+    return {
+        "products": len(product_ids),
+        "users": matrix.shape[0],
+        "interactions": len(users),
+        "with_neighbors": int((scores[:, 0] > 0).sum()) if k else 0,
+        "k": k,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _write_atomic(path, array):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".npy.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class _Index:
+    """Index yang sedang dipakai proses ini, dibuka ulang kalau file berubah."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._array = None
+
+    def get(self):
+        path = index_path()
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        if key != self._key:
+            with self._lock:
+                if key != self._key:
+                    array = np.load(path, mmap_mode="r")
+                    # Kolom id disalin sekali (8 byte per produk) supaya searchsorted tidak
+                    # membaca array terstruktur yang strided di setiap request
+                    self._array = (np.ascontiguousarray(array["id"]), array)
+                    self._key = key
+        return self._array
+
+    def clear(self):
+        with self._lock:
+            self._key = self._array = None
+
+
+_index = _Index()
+
+
+def related_ids(product_id, limit=DEFAULT_K):
+    """
+    [(product_id, skor)] tetangga terdekat, atau None kalau index belum
+    dibangun. Produk yang belum ada di index (produk baru) menghasilkan [].
+    """
+    loaded = _index.get()
+    if loaded is None:
+        return None
+    ids, index = loaded
+    pos = int(np.searchsorted(ids, product_id))
+    if pos >= len(ids) or ids[pos] != product_id:
+        return []
+    row = index[pos]
+    return [
+        (int(neighbor), float(score))
+        for neighbor, score in zip(row["neighbors"][:limit], row["scores"][:limit])
+        if neighbor >= 0
+    ]
+
+
+def clear_index_cache():
+    _index.clear()
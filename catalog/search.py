@@ -0,0 +1,159 @@
+"""
+Full-text search untuk Product.
+
+Index dikelola sepenuhnya oleh database (lihat migration 0002_product_search):
+- SQLite: tabel virtual FTS5 `catalog_product_fts` (external content) yang
+  di-sync lewat trigger insert/update/delete.
+- PostgreSQL: kolom `search_vector` (tsvector, generated stored) + index GIN.
+
+Jadi create/edit/delete produk (termasuk bulk_create dan queryset.update)
+otomatis memperbarui index tanpa kode tambahan di view.
+"""
+import re
+
+from django.db import connection
+
+FTS_TABLE = "catalog_product_fts"
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER catalog_product_fts_ai AFTER INSERT ON catalog_product BEGIN
+        INSERT INTO catalog_product_fts(rowid, name, brand, description)
+        VALUES (new.id, new.name, new.brand, coalesce(new.description, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER catalog_product_fts_ad AFTER DELETE ON catalog_product BEGIN
+        INSERT INTO catalog_product_fts(catalog_product_fts, rowid, name, brand, description)
+        VALUES ('delete', old.id, old.name, old.brand, coalesce(old.description, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER catalog_product_fts_au AFTER UPDATE OF name, brand, description ON catalog_product BEGIN
+        INSERT INTO catalog_product_fts(catalog_product_fts, rowid, name, brand, description)
+        VALUES ('delete', old.id, old.name, old.brand, coalesce(old.description, ''));
+        INSERT INTO catalog_product_fts(rowid, name, brand, description)
+        VALUES (new.id, new.name, new.brand, coalesce(new.description, ''));
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS catalog_product_fts_au",
+    "DROP TRIGGER IF EXISTS catalog_product_fts_ad",
+    "DROP TRIGGER IF EXISTS catalog_product_fts_ai",
+    "DROP TABLE IF EXISTS catalog_product_fts",
+]
+
+POSTGRES_CREATE = [
+    """
+    ALTER TABLE catalog_product ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(brand, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS catalog_product_search_gin ON catalog_product USING GIN (search_vector)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS catalog_product_search_gin",
+    "ALTER TABLE catalog_product DROP COLUMN IF EXISTS search_vector",
+]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_fts_available = None
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return "ENABLE_FTS5" in {row[0] for row in cursor.fetchall()}
+
+
+def install_search_index(schema_editor):
+    """
+    Buat (atau buat ulang) index full-text. Aman dipanggil berulang kali;
+    migration yang me-remake tabel catalog_product di SQLite (AddField dsb.)
+    harus memanggil ini lagi karena trigger ikut terhapus.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        # Tanpa FTS5, search_products otomatis fallback ke icontains
+        if not _sqlite_has_fts5(schema_editor.connection):
+            return
+        for sql in SQLITE_DROP[:3]:
+            schema_editor.execute(sql)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, brand, description, "
+            "content='catalog_product', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        for sql in SQLITE_TRIGGERS:
+            schema_editor.execute(sql)
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif vendor == "postgresql":
+        for sql in POSTGRES_CREATE:
+            schema_editor.execute(sql)
+
+
+def uninstall_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for sql in SQLITE_DROP:
+            schema_editor.execute(sql)
+    elif vendor == "postgresql":
+        for sql in POSTGRES_DROP:
+            schema_editor.execute(sql)
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall((query or "").lower())
+
+
+def search_backend():
+    """'sqlite', 'postgresql', atau None kalau index tidak tersedia."""
+    global _fts_available
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    if connection.vendor == "sqlite":
+        if _fts_available is None:
+            _fts_available = FTS_TABLE in connection.introspection.table_names()
+        return "sqlite" if _fts_available else None
+    return None
+
+
+def search_products(products, query):
+    """
+    Filter queryset Product dengan full-text query dan tambahkan anotasi
+    `search_rank` (semakin besar semakin relevan). Setiap token dicocokkan
+    sebagai prefix terhadap name, brand, dan description.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return products.none()
+
+    backend = search_backend()
+    if backend == "sqlite":
+        match = " ".join(f'"{t}"*' for t in tokens)
+        return products.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = catalog_product.id", f"{FTS_TABLE} MATCH %s"],
+            params=[match],
+            # bm25 bernilai negatif (lebih kecil = lebih relevan), jadi dibalik
+            select={"search_rank": f"-bm25({FTS_TABLE}, 10.0, 5.0, 1.0)"},
+        ).order_by("-search_rank", "id")
+
+    if backend == "postgresql":
+        tsquery = " & ".join(f"{t}:*" for t in tokens)
+        return products.extra(
+            where=["catalog_product.search_vector @@ to_tsquery('simple', %s)"],
+            params=[tsquery],
+            select={"search_rank": "ts_rank(catalog_product.search_vector, to_tsquery('simple', %s))"},
+            select_params=[tsquery],
+        ).order_by("-search_rank", "id")
+
+    # Fallback kalau index tidak tersedia (mis. SQLite tanpa FTS5)
+    return products.filter(name__icontains=query)
@@ -0,0 +1,380 @@
+"""
+Index "produk mirip" berbasis teks (nama, brand, kategori, deskripsi),
+untuk produk yang belum punya data interaksi (lihat catalog.recommendations).
+
+Vektor produk = TF-IDF dari term yang di-hash:
+
+1. Term = kata dan pasangan kata dari nama/brand/kategori (bobot
+   HEAD_WEIGHT), brand dan kategori utuh, serta kata dari deskripsi.
+2. Setiap term di-hash dengan crc32 (stabil antar proses). 20 bit bawah
+   menjadi bucket IDF, 8 bit berikutnya dimensi vektor dan bit teratas
+   tandanya. Proyeksi bertanda ini (feature hashing) menjaga dot product
+   secara rata-rata, jadi vektor cukup DIM float32 per produk.
+3. Baris dinormalisasi L2, sehingga dot product = cosine.
+
+Perintah build_similarity_index membangun semuanya sekaligus (hitung DF,
+lalu bobot + proyeksi per chunk dengan numpy) ke direktori index:
+manifest.json menunjuk ke vectors-/ids-/idf-<versi>.npy, dan manifest
+ditulis terakhir secara atomik. Produk yang dibuat atau diedit lewat view
+ditulis ulang satu per satu ke delta-<versi>/<id>.npy memakai IDF build
+terakhir (refresh_products); delta menggantikan baris lama di index dan
+hilang sendiri pada build berikutnya. Delta yang ditulis selama build
+berjalan (bisa saja setelah produknya dibaca build) dihitung ulang dari
+database dengan IDF baru ke delta versi baru sebelum versi lama dihapus.
+
+Query membaca matriks (mmap) per blok BLOCK_ROWS baris: blok @ vektor
+query, ambil top-N dengan argpartition, gabungkan dengan hasil blok
+sebelumnya. Kalau batas waktu habis, blok sisanya dilewati dan hasilnya
+ditandai tidak lengkap.
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from catalog.models import Product
+
+DIM = 256
+IDF_BUCKETS = 1 << 20
+HEAD_WEIGHT = 2
+BLOCK_ROWS = 16384
+BUILD_CHUNK = 2000
+DEFAULT_BUDGET_MS = 50
+TEXT_FIELDS = ("name", "brand", "category", "description")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def index_dir():
+    return Path(getattr(settings, "SIMILARITY_INDEX_DIR", settings.BASE_DIR / ".cache" / "similarity"))
+
+
+def budget_ms():
+    return getattr(settings, "SIMILARITY_BUDGET_MS", DEFAULT_BUDGET_MS)
+
+
+def terms(name, brand, category, description):
+    """Counter term -> bobot untuk satu produk."""
+    head = _WORD.findall(f"{name or ''} {brand or ''} {category or ''}".lower())
+    counts = Counter()
+    for term in head + [f"{a} {b}" for a, b in zip(head, head[1:])]:
+        counts[term] += HEAD_WEIGHT
+    for prefix, value in (("brand:", brand), ("category:", category)):
+        if value:
+            counts[prefix + value.strip().lower()] += HEAD_WEIGHT
+    counts.update(_WORD.findall((description or "").lower()))
+    return counts
+
+
+def hash_rows(rows):
+    """
+    (doc, hash, count) untuk setiap term dari `rows` berisi (name, brand,
+    category, description); doc = posisi baris.
+    """
+    cache = {}
+    docs, hashes, counts = [], [], []
+    for doc, row in enumerate(rows):
+        for term, count in terms(*row).items():
+            value = cache.get(term)
+            if value is None:
+                value = cache[term] = zlib.crc32(term.encode())
+            docs.append(doc)
+            hashes.append(value)
+            counts.append(count)
+    return np.asarray(docs, dtype=np.int64), np.asarray(hashes, dtype=np.uint32), np.asarray(counts, dtype=np.float32)
+
+
+def inverse_document_frequency(hashes, documents):
+    df = np.bincount(hashes & (IDF_BUCKETS - 1), minlength=IDF_BUCKETS)
+    return (np.log((1 + documents) / (1 + df)) + 1).astype(np.float32)
+
+
+def vectors(docs, hashes, counts, idf, n):
+    """Matriks (n, DIM) float32 ter-normalisasi dari hasil hash_rows."""
+    weights = (1 + np.log(counts)) * idf[hashes & (IDF_BUCKETS - 1)]
+    weights = np.where(hashes >> 31, -weights, weights)
+    cells = docs * DIM + ((hashes >> 20) & (DIM - 1))
+    matrix = np.bincount(cells, weights=weights, minlength=n * DIM).reshape(n, DIM).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def build(path=None, chunk_size=BUILD_CHUNK):
+    """Bangun index dari semua produk ke direktori `path`. Mengembalikan statistik build."""
+    started = time.perf_counter()
+    # Delta yang lebih baru dari titik ini mungkin belum terbaca build
+    marker = time.time_ns()
+    directory = Path(path or index_dir())
+    rows = Product.objects.order_by("id").values_list("id", *TEXT_FIELDS)
+
+    ids, parts = [], []
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        ids.append(row[0])
+        chunk.append(row[1:])
+        if len(chunk) == chunk_size:
+            parts.append((len(chunk),) + hash_rows(chunk))
+            chunk = []
+    if chunk:
+        parts.append((len(chunk),) + hash_rows(chunk))
+
+    ids = np.asarray(ids, dtype=np.int64)
+    idf = inverse_document_frequency(
+        np.concatenate([part[2] for part in parts]) if parts else np.zeros(0, dtype=np.uint32), len(ids),
+    )
+    matrix = np.zeros((len(ids), DIM), dtype=np.float32)
+    start = 0
+    for n, docs, hashes, counts in parts:
+        matrix[start:start + n] = vectors(docs, hashes, counts, idf, n)
+        start += n
+
+    version = f"{time.time_ns():x}"
+    directory.mkdir(parents=True, exist_ok=True)
+    np.save(directory / f"ids-{version}.npy", ids)
+    np.save(directory / f"idf-{version}.npy", idf)
+    np.save(directory / f"vectors-{version}.npy", matrix)
+    _write_json_atomic(directory / "manifest.json", {"version": version, "dim": DIM, "products": len(ids)})
+    replayed = _replay_deltas(directory, version, idf, marker)
+    _remove_old_versions(directory, version)
+    return {
+        "products": len(ids),
+        "replayed": replayed,
+        "terms": int(sum(len(part[2]) for part in parts)),
+        "megabytes": round(matrix.nbytes / 2**20, 2),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _write_json_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _write_delta(delta_dir, product_id, row):
+    fd, tmp = tempfile.mkstemp(dir=delta_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, row)
+        os.replace(tmp, delta_dir / f"{product_id}.npy")
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _replay_deltas(directory, version, idf, since_ns):
+    """
+    Vektorisasi ulang (dengan `idf` versi baru) produk yang delta-nya di
+    versi lama ditulis setelah `since_ns`. Mengembalikan jumlah produknya.
+    """
+    ids = set()
+    for entry in directory.glob("delta-*/*.npy"):
+        if entry.parent.name == f"delta-{version}":
+            continue
+        try:
+            if entry.stat().st_mtime_ns >= since_ns:
+                ids.add(int(entry.stem))
+        except (OSError, ValueError):
+            continue
+    rows = list(Product.objects.filter(pk__in=ids).order_by("id").values_list("id", *TEXT_FIELDS))
+    if not rows:
+        return 0
+    matrix = vectors(*hash_rows([row[1:] for row in rows]), idf, len(rows))
+    delta_dir = directory / f"delta-{version}"
+    delta_dir.mkdir(exist_ok=True)
+    for row, vector in zip(rows, matrix):
+        _write_delta(delta_dir, row[0], vector)
+    return len(rows)
+
+
+def _remove_old_versions(directory, version):
+    # Worker yang masih memakai versi lama tetap bisa membaca file mmap-nya di Linux
+    for entry in directory.iterdir():
+        match = re.fullmatch(r"(?:ids|idf|vectors)-(\w+)\.npy|delta-(\w+)", entry.name)
+        if match and version not in match.groups():
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                try:
+                    entry.unlink()
+                except OSError:
+                    pass
+
+
+class _Loaded:
+    """Index versi tertentu beserta delta-nya."""
+
+    def __init__(self, directory, version):
+        self.directory = directory
+        self.version = version
+        self.ids = np.load(directory / f"ids-{version}.npy")
+        self.idf = np.load(directory / f"idf-{version}.npy", mmap_mode="r")
+        self.vectors = np.load(directory / f"vectors-{version}.npy", mmap_mode="r")
+        self.delta_key = None
+        self.delta_ids = np.zeros(0, dtype=np.int64)
+        self.delta_vectors = np.zeros((0, DIM), dtype=np.float32)
+        # Baris index yang sudah digantikan delta
+        self.stale = np.zeros(len(self.ids), dtype=bool)
+
+    @property
+    def delta_dir(self):
+        return self.directory / f"delta-{self.version}"
+
+    def load_delta(self, key):
+        ids, rows = [], []
+        for entry in self.delta_dir.glob("*.npy"):
+            try:
+                product_id, row = int(entry.stem), np.load(entry)
+            except (OSError, ValueError):
+                continue  # sedang ditulis / dihapus
+            ids.append(product_id)
+            rows.append(row)
+        self.delta_ids = np.asarray(ids, dtype=np.int64)
+        self.delta_vectors = np.asarray(rows, dtype=np.float32).reshape(len(rows), DIM)
+        self.stale = np.isin(self.ids, self.delta_ids)
+        self.delta_key = key
+
+    def vector(self, product_id):
+        hit = np.flatnonzero(self.delta_ids == product_id)
+        if len(hit):
+            return self.delta_vectors[hit[0]]
+        pos = int(np.searchsorted(self.ids, product_id))
+        if pos < len(self.ids) and self.ids[pos] == product_id:
+            return np.asarray(self.vectors[pos])
+        return None
+
+
+class _Index:
+    """Index yang sedang dipakai proses ini; dibuka ulang kalau manifest atau delta berubah."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._loaded = None
+
+    def get(self):
+        directory = index_dir()
+        manifest = directory / "manifest.json"
+        try:
+            stat = manifest.stat()
+        except FileNotFoundError:
+            return None
+        key = (str(directory), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key != self._key:
+                version = json.loads(manifest.read_text())["version"]
+                self._loaded = _Loaded(directory, version)
+                self._key = key
+            loaded = self._loaded
+            try:
+                delta_key = loaded.delta_dir.stat().st_mtime_ns
+            except FileNotFoundError:
+                delta_key = None
+            if delta_key != loaded.delta_key:
+                loaded.load_delta(delta_key)
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._key = self._loaded = None
+
+
+_index = _Index()
+
+
+def refresh_products(products):
+    """
+    Tulis ulang vektor produk yang baru dibuat/diedit ke delta index yang
+    sedang aktif. Tidak melakukan apa-apa kalau index belum pernah dibangun.
+    """
+    loaded = _index.get()
+    if loaded is None:
+        return
+    products = list(products)
+    docs, hashes, counts = hash_rows([[getattr(p, field) for field in TEXT_FIELDS] for p in products])
+    matrix = vectors(docs, hashes, counts, loaded.idf, len(products))
+    loaded.delta_dir.mkdir(exist_ok=True)
+    for product, row in zip(products, matrix):
+        _write_delta(loaded.delta_dir, product.pk, row)
+    # mtime direktori bisa sama untuk dua penulisan yang berdekatan
+    loaded.delta_key = None
+
+
+def refresh_on_commit(product):
+    """refresh_products setelah transaksi commit; kegagalan menulis file hanya di-log."""
+    transaction.on_commit(lambda: refresh_products([product]), robust=True)
+
+
+def _merge_top(best_ids, best_scores, ids, scores, limit):
+    ids = np.concatenate([best_ids, ids])
+    scores = np.concatenate([best_scores, scores])
+    if len(scores) > limit:
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        ids, scores = ids[top], scores[top]
+    return ids, scores
+
+
+def similar_ids(product_id, limit, budget=None):
+    """
+    ([(product_id, skor)], lengkap) urut skor turun, atau None kalau index
+    belum dibangun. Produk yang belum masuk index (mis. hasil import setelah
+    build terakhir) di-vektorisasi dari database saat itu juga. `lengkap`
+    False kalau batas waktu (ms) habis sebelum semua blok terbaca.
+    """
+    loaded = _index.get()
+    if loaded is None:
+        return None
+    started = time.perf_counter()
+    deadline = started + (budget_ms() if budget is None else budget) / 1000
+
+    query = loaded.vector(product_id)
+    if query is None:
+        row = Product.objects.filter(pk=product_id).values_list(*TEXT_FIELDS).first()
+        if row is None:
+            return [], True
+        query = vectors(*hash_rows([row]), loaded.idf, 1)[0]
+
+    best_ids = np.zeros(0, dtype=np.int64)
+    best_scores = np.zeros(0, dtype=np.float32)
+    if len(loaded.delta_ids):
+        scores = loaded.delta_vectors @ query
+        scores[loaded.delta_ids == product_id] = -np.inf
+        best_ids, best_scores = _merge_top(best_ids, best_scores, loaded.delta_ids, scores, limit)
+
+    complete = True
+    for start in range(0, len(loaded.ids), BLOCK_ROWS):
+        if start and time.perf_counter() > deadline:
+            complete = False
+            break
+        stop = start + BLOCK_ROWS
+        ids = loaded.ids[start:stop]
+        scores = loaded.vectors[start:stop] @ query
+        scores[loaded.stale[start:stop] | (ids == product_id)] = -np.inf
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            ids, scores = ids[top], scores[top]
+        best_ids, best_scores = _merge_top(best_ids, best_scores, ids, scores, limit)
+
+    order = np.argsort(-best_scores, kind="stable")
+    return [
+        (int(best_ids[i]), float(best_scores[i])) for i in order if best_scores[i] > 0
+    ], complete
+
+
+def clear_index_cache():
+    _index.clear()
@@ -0,0 +1,162 @@
+"""
+Snapshot katalog di memori proses untuk products_filtered_json.
+
+Aktif kalau setting CATALOG_SNAPSHOT = True. Snapshot menyimpan kolom
+NumPy (id, harga, kode kategori, kode brand, ketersediaan, rating,
+tanggal rilis) ditambah JSON setiap produk yang sudah di-encode, urut id.
+Filter dievaluasi sebagai mask vektor, urutan dengan lexsort (kunci lalu
+id, sama dengan pagination.sort_products), dan body response dirakit
+dengan menggabungkan potongan JSON, jadi isinya byte-per-byte sama dengan
+jalur ORM (ETag pun sama).
+
+Konsistensi antar worker gunicorn: setiap request membaca CatalogVersion
+dari database dan snapshot hanya dipakai kalau versinya sama. Versi dibaca
+sebelum produk dimuat, sehingga snapshot tidak pernah diberi label versi
+yang lebih baru dari datanya; paling buruk dibangun ulang sekali lagi.
+Selama satu thread membangun ulang, request lain memakai ORM alih-alih
+menunggu. Query pencarian (?q=) selalu lewat ORM karena butuh index
+full-text.
+"""
+import datetime
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .cache import current_version
+from .models import Product
+from .pagination import PRODUCT_JSON_FIELDS
+
+# Tanggal rilis kosong diurutkan paling awal, seperti pagination.SORT_KEYS
+_NULL_DATE = datetime.date(1, 1, 1).toordinal()
+
+
+def enabled():
+    return getattr(settings, "CATALOG_SNAPSHOT", False)
+
+
+class Snapshot:
+    def __init__(self, version, rows):
+        self.version = version
+        encoder = DjangoJSONEncoder()
+        ids, prices, available, ratings, released = [], [], [], [], []
+        categories, brands, self.fragments = [], [], []
+        for row in rows:
+            rating = row.pop("rating")
+            ids.append(row["id"])
+            prices.append(int(row["price"]))
+            available.append(row["is_available"])
+            ratings.append(rating)
+            released.append(row["release_date"].toordinal() if row["release_date"] else _NULL_DATE)
+            categories.append(row["category"])
+            brands.append(row["brand"])
+            self.fragments.append(encoder.encode(row).encode())
+
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.available = np.asarray(available, dtype=bool)
+        self.sort_keys = {
+            "id": self.ids,
+            "price": np.asarray(prices, dtype=np.int64),
+            "rating": np.asarray(ratings, dtype=np.float64),
+            "release_date": np.asarray(released, dtype=np.int64),
+        }
+        self.categories, category = np.unique(np.asarray(categories, dtype=object), return_inverse=True)
+        self.brands, brand = np.unique(np.asarray(brands, dtype=object), return_inverse=True)
+        self.category = category.astype(np.int32)
+        self.brand = brand.astype(np.int32)
+        self.category_codes = {value: code for code, value in enumerate(self.categories)}
+        self.brands_lower = [brand.lower() for brand in self.brands]
+
+    @classmethod
+    def load(cls, version):
+        rows = Product.objects.order_by("id").values(*PRODUCT_JSON_FIELDS, "rating")
+        return cls(version, rows.iterator(chunk_size=2000))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select(self, params, sort="id"):
+        """
+        Posisi produk tersedia yang lolos filter katalog (lihat
+        filters.filter_products), terurut `sort`. None kalau filter tidak
+        bisa dievaluasi di sini (pencarian, atau angka tidak valid; view
+        sudah menolaknya lewat filters.validate_filters).
+        """
+        if params.get('q'):
+            return None
+        mask = self.available.copy()
+        category = params.get('category')
+        if category:
+            code = self.category_codes.get(category)
+            if code is None:
+                return np.zeros(0, dtype=np.int64)
+            mask &= self.category == code
+        brand = params.get('brand')
+        if brand:
+            # Sama dengan brand__icontains; dicocokkan sekali per brand, bukan per produk
+            brand = brand.lower()
+            allowed = np.fromiter((brand in value for value in self.brands_lower), dtype=bool, count=len(self.brands))
+            mask &= allowed[self.brand]
+        try:
+            if params.get('min_price'):
+                mask &= self.sort_keys["price"] >= float(params['min_price'])
+            if params.get('max_price'):
+                mask &= self.sort_keys["price"] <= float(params['max_price'])
+            if params.get('min_rating'):
+                mask &= self.sort_keys["rating"] >= float(params['min_rating'])
+        except ValueError:
+            return None
+
+        positions = np.flatnonzero(mask)
+        key = sort.lstrip("-")
+        if key != "id":
+            # Kunci terakhir lexsort adalah kunci utama; id sebagai tie-breaker
+            positions = positions[np.lexsort((self.ids[positions], self.sort_keys[key][positions]))]
+        if sort.startswith("-"):
+            positions = positions[::-1]
+        return positions
+
+    def render(self, positions):
+        """Body JSON list produk, sama dengan JsonResponse(list(...), safe=False)."""
+        fragments = self.fragments
+        return b"[" + b", ".join([fragments[i] for i in positions]) + b"]"
+
+
+class _Holder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def get(self):
+        """Snapshot untuk versi katalog saat ini, atau None (nonaktif / sedang dibangun ulang)."""
+        if not enabled():
+            return None
+        version = current_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._snapshot = Snapshot.load(version)
+            return snapshot
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+
+
+_holder = _Holder()
+
+
+def get_snapshot():
+    return _holder.get()
+
+
+def clear_snapshot():
+    _holder.clear()
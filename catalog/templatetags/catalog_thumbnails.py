@@ -0,0 +1,11 @@
+from django import template
+
+from catalog.thumbnails import thumbnail_url
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def thumbnail(context, product, width=320, fmt="webp"):
+    """{% thumbnail p 320 %} -> URL thumbnail produk (kosong kalau tidak ada gambar)."""
+    return thumbnail_url(context["request"], product, width, fmt)
@@ -4,7 +4,43 @@ from datetime import date
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from review.models import Review
+from catalog.csv_parsing import BRAND_MAX_LENGTH, NAME_MAX_LENGTH, iter_parsed_chunks, read_header
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from io import StringIO
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+from catalog import recommendations, similarity, snapshot, thumbnails
+from catalog.cache import bump_catalog_version, current_version
+from catalog.ratings import apply_review_change
+from cart.models import CartItem, Order, OrderItem
+from wishlist.models import Wishlist
+import numpy as np
+from scipy import sparse
+from django.core.cache import cache
+import csv
+import io
 import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+
+class CatalogJsonTestCase(TestCase):
+    """
+    Response JSON katalog di-cache per versi, dan di dalam TestCase versi
+    hanya naik lewat captureOnCommitCallbacks(execute=True). Cache
+    dikosongkan sebelum setiap test supaya tidak membaca response test lain.
+    """
+    def setUp(self):
+        cache.clear()
+
 
 class ProductModelTest(TestCase):
     def setUp(self):
@@ -100,8 +136,9 @@ Country/Region of Origin: China""",
         self.assertEqual(Jersey.count(), 2)
         self.assertEqual(Pants.count(), 2)
 
-class CatalogViewsTest(TestCase):
+class CatalogViewsTest(CatalogJsonTestCase):
     def setUp(self):
+        super().setUp()
         self.client = Client()
         self.user = get_user_model().objects.create_user(username='testuser', password='testpassword')
         
@@ -188,4 +225,809 @@ class CatalogViewsTest(TestCase):
         
         response = self.client.post(reverse('catalog:product_delete', args=[self.product1.pk]))
         self.assertEqual(response.status_code, 200)
-        self.assertFalse(Product.objects.filter(pk=self.product1.pk).exists())
\ No newline at end of file
+        self.assertFalse(Product.objects.filter(pk=self.product1.pk).exists())
+
+class ProductsPageJsonTest(CatalogJsonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        prices = [500000, 300000, 300000, 900000, 100000]
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                brand="Nike" if i % 2 == 0 else "Adidas",
+                category="Shoes",
+                price=price,
+                stock=5,
+                description="long description " * 50,
+                release_date=date(2025, 1, i + 1) if i != 2 else None,
+            )
+            for i, price in enumerate(prices)
+        ]
+        Product.objects.create(name="Hidden", brand="Nike", category="Shoes", price=1, is_available=False)
+        self.url = reverse('catalog:products_page_json')
+
+    def _collect(self, params):
+        ids, cursor, pages = [], None, 0
+        while True:
+            query = dict(params)
+            if cursor:
+                query['cursor'] = cursor
+            data = json.loads(self.client.get(self.url, query).content)
+            ids += [row['id'] for row in data['results']]
+            cursor = data['next_cursor']
+            pages += 1
+            if not cursor:
+                return ids, pages
+
+    def test_default_page_excludes_description(self):
+        data = json.loads(self.client.get(self.url).content)
+        self.assertEqual(len(data['results']), 5)
+        self.assertNotIn('description', data['results'][0])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_fields_projection(self):
+        data = json.loads(self.client.get(self.url, {'fields': 'name,price'}).content)
+        self.assertEqual(set(data['results'][0]), {'id', 'name', 'price'})
+
+    def test_unknown_field_rejected(self):
+        response = self.client.get(self.url, {'fields': 'name,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_walk_pages_sorted_by_price(self):
+        ids, pages = self._collect({'sort': 'price', 'limit': 2})
+        self.assertEqual(pages, 3)
+        expected = list(Product.objects.filter(is_available=True).order_by('price', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_walk_pages_sorted_by_release_date_desc(self):
+        ids, _ = self._collect({'sort': '-release_date', 'limit': 2})
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+        # Produk tanpa release_date berada di paling akhir
+        self.assertEqual(ids[-1], self.products[2].id)
+
+    def test_filters_are_applied(self):
+        ids, _ = self._collect({'brand': 'nike', 'max_price': 500000, 'limit': 1})
+        self.assertEqual(ids, [self.products[0].id, self.products[2].id, self.products[4].id])
+
+    def test_limit_is_capped(self):
+        data = json.loads(self.client.get(self.url, {'limit': 10000}).content)
+        self.assertEqual(data['limit'], 100)
+
+    def test_sort_and_filter_by_rating(self):
+        for product, rating in zip(self.products, [4.5, 2.0, 5.0, 3.0, 4.5]):
+            Product.objects.filter(pk=product.pk).update(rating=rating)
+        ids, _ = self._collect({'sort': '-rating', 'min_rating': 3, 'limit': 2})
+        p = self.products
+        self.assertEqual(ids, [p[2].id, p[4].id, p[0].id, p[3].id])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductSearchTest(CatalogJsonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.shoe = Product.objects.create(
+            name="LeBron XXII Basketball Shoes", brand="Nike", category="Shoes",
+            price=2500000, description="Responsive cushioning for explosive players.",
+        )
+        self.ball = Product.objects.create(
+            name="Spalding TF-1000 Ball", brand="Spalding", category="Ball",
+            price=900000, description="Indoor composite basketball.",
+        )
+        self.jersey = Product.objects.create(
+            name="Lakers Jersey", brand="Nike", category="Jersey",
+            price=1200000, description="Dri-FIT jersey worn by LeBron fans.",
+        )
+        self.url = reverse('catalog:products_filtered_json')
+
+    def _search(self, q):
+        return [row['id'] for row in json.loads(self.client.get(self.url, {'q': q}).content)]
+
+    def test_search_matches_name_brand_and_description(self):
+        self.assertEqual(self._search('spalding'), [self.ball.id])
+        self.assertEqual(set(self._search('basketball')), {self.shoe.id, self.ball.id})
+
+    def test_search_is_ranked(self):
+        # Kecocokan di name lebih relevan daripada di description
+        self.assertEqual(self._search('lebron'), [self.shoe.id, self.jersey.id])
+
+    def test_search_prefix_and_multiple_tokens(self):
+        self.assertEqual(self._search('bask nik'), [self.shoe.id])
+
+    def test_index_follows_create_edit_delete(self):
+        # execute=True menjalankan bump versi katalog seperti setelah commit
+        with self.captureOnCommitCallbacks(execute=True):
+            new = Product.objects.create(name="Curry Flow 11", brand="Under Armour", category="Shoes", price=1)
+        self.assertEqual(self._search('curry'), [new.id])
+
+        new.name = "Harden Vol 8"
+        with self.captureOnCommitCallbacks(execute=True):
+            new.save()
+        self.assertEqual(self._search('curry'), [])
+        self.assertEqual(self._search('harden'), [new.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new.delete()
+        self.assertEqual(self._search('harden'), [])
+
+    def test_search_combines_with_filters_and_pagination(self):
+        response = self.client.get(reverse('catalog:products_page_json'), {'q': 'nike', 'sort': '-price'})
+        ids = [row['id'] for row in json.loads(response.content)['results']]
+        self.assertEqual(ids, [self.shoe.id, self.jersey.id])
+
+    def test_product_list_uses_search(self):
+        response = self.client.get(reverse('catalog:product_list'), {'q': 'composite'})
+        self.assertContains(response, "Spalding TF-1000 Ball")
+        self.assertNotContains(response, "Lakers Jersey")
+
+
+class ImportProductsCommandTest(TestCase):
+    HEADER = "Link,Product Name,Brand,Description,Price,Category,Released Date,Stock\n"
+
+    def _csv(self, rows):
+        handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8")
+        handle.write(self.HEADER + "".join(rows))
+        handle.close()
+        self.addCleanup(os.unlink, handle.name)
+        return handle.name
+
+    def _import(self, path, *args):
+        out = StringIO()
+        call_command("import_products", path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_creates_in_batches_and_skips_existing(self):
+        rows = [f'https://x/{i}.png,Shoe {i},Nike,"Line one\nline two",1.299.000,Shoes,2025-10-23,{i}\n' for i in range(7)]
+        path = self._csv(rows)
+
+        out = self._import(path, "--batch-size", "3")
+        self.assertIn("created=7", out)
+        self.assertEqual(Product.objects.count(), 7)
+        shoe = Product.objects.get(name="Shoe 3")
+        self.assertEqual(shoe.price, 1299000)
+        self.assertEqual(shoe.release_date, date(2025, 10, 23))
+        self.assertEqual(shoe.description, "Line one\nline two")
+        self.assertFalse(Product.objects.get(name="Shoe 0").is_available)
+
+        out = self._import(path, "--batch-size", "3")
+        self.assertIn("skipped=7", out)
+        self.assertEqual(Product.objects.count(), 7)
+
+    def test_update_only_writes_changed_rows(self):
+        self._import(self._csv([
+            "https://x/a.png,Ball A,Spalding,desc,100000,Ball,10/23/2025,5\n",
+            "https://x/b.png,Ball B,Spalding,desc,200000,Ball,2025/10/23,5\n",
+        ]))
+        path = self._csv([
+            "https://x/a.png,Ball A,Spalding,desc,150000,Ball,10/23/2025,5\n",
+            "https://x/b.png,Ball B,Spalding,desc,200000,Ball,2025/10/23,5\n",
+            "https://x/c.png,Ball C,Spalding,desc,300000,Ball,,5\n",
+        ])
+
+        out = self._import(path, "--update", "--dry-run")
+        self.assertIn("Would create=1, update=1, unchanged=1", out)
+        self.assertIn("price=1", out)
+        self.assertEqual(Product.objects.get(name="Ball A").price, 100000)
+        self.assertFalse(Product.objects.filter(name="Ball C").exists())
+
+        out = self._import(path, "--update")
+        self.assertIn("created=1, updated=1, unchanged=1", out)
+        self.assertEqual(Product.objects.get(name="Ball A").price, 150000)
+
+    def test_duplicate_keys_in_same_feed(self):
+        path = self._csv([
+            "https://x/a.png,Jersey,Nike,first,100,Jersey,,1\n",
+            "https://x/a.png,Jersey,Nike,second,200,Jersey,,1\n",
+        ])
+        self._import(path, "--update")
+        self.assertEqual(Product.objects.get(name="Jersey").price, 200)
+
+    def test_rejected_rows_go_to_side_file(self):
+        path = self._csv([
+            'https://x/1.png,Good One,Nike,"multi\nline",100,Shoes,2025-10-23,1\n',
+            'https://x/2.png,,Nike,no name,100,Shoes,,1\n',
+            'https://x/3.png,Bad Date,Nike,"a\nb\nc",100,Shoes,23 Oct 2025,1\n',
+            'https://x/4.png,Bad Price,Nike,x,abc,Shoes,,1\n',
+            'https://x/5.png,Good Two,Nike,x,100,Ball,,1\n',
+        ])
+        rejects = path + ".rejects"
+        self.addCleanup(lambda: os.path.exists(rejects) and os.unlink(rejects))
+
+        out = self._import(path, "--rejects", rejects, "--dry-run")
+        self.assertIn("Would reject 3 row(s)", out)
+        self.assertFalse(os.path.exists(rejects))
+
+        out = self._import(path, "--rejects", rejects, "--chunk-size", "16")
+        self.assertIn("created=2", out)
+        self.assertIn("Rejected 3 row(s)", out)
+        with open(rejects, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["line", "reason"])
+        self.assertEqual([r[0] for r in rows[1:]], ["4", "5", "8"])
+        self.assertIn("Product Name", rows[1][1])
+        self.assertIn("date", rows[2][1])
+        self.assertIn("Price", rows[3][1])
+
+    def test_chunking_keeps_multiline_records_intact(self):
+        rows = [
+            f'https://x/{i}.png,"Shoe\n{i}",Nike,"desc ""quoted""\nline {i}\nmore",{i},Shoes,,1\n'
+            for i in range(25)
+        ]
+        path = self._csv(rows)
+        fieldnames, _ = read_header(path)
+        expected = [r for chunk, _ in iter_parsed_chunks(path, fieldnames, 1, 10**9) for r in chunk]
+        self.assertEqual(len(expected), 25)
+        for chunk_bytes in (1, 50, 333):
+            with self.subTest(chunk_bytes=chunk_bytes):
+                parsed = [r for chunk, _ in iter_parsed_chunks(path, fieldnames, 1, chunk_bytes) for r in chunk]
+                self.assertEqual(parsed, expected)
+        parallel = [r for chunk, _ in iter_parsed_chunks(path, fieldnames, 2, 100) for r in chunk]
+        self.assertEqual(parallel, expected)
+        self.assertEqual(expected[3]["description"], 'desc "quoted"\nline 3\nmore')
+
+    def test_parallel_parsing_with_spawn(self):
+        # Proses anak hanya meng-import catalog.csv_parsing, tanpa django.setup()
+        rows = [f'https://x/{i}.png,Shoe {i},Nike,desc,{i},Shoes,,1\n' for i in range(10)]
+        path = self._csv(rows)
+        fieldnames, _ = read_header(path)
+        parsed = iter_parsed_chunks(path, fieldnames, 2, 100, mp_context=multiprocessing.get_context("spawn"))
+        self.assertEqual([r["name"] for chunk, _ in parsed for r in chunk], [f"Shoe {i}" for i in range(10)])
+
+    def test_length_limits_match_model(self):
+        self.assertEqual(NAME_MAX_LENGTH, Product._meta.get_field("name").max_length)
+        self.assertEqual(BRAND_MAX_LENGTH, Product._meta.get_field("brand").max_length)
+
+    def test_missing_headers(self):
+        path = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        path.write("Foo,Bar\n1,2\n")
+        path.close()
+        self.addCleanup(os.unlink, path.name)
+        with self.assertRaises(CommandError):
+            self._import(path.name)
+
+
+class _PhotoHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        if self.path.startswith("/redirect"):
+            # Host tujuan ("localhost") tidak ada di allowlist test
+            self.send_response(302)
+            self.send_header("Location", f"http://localhost:{self.server.server_port}/shoe.jpg")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        buf = io.BytesIO()
+        Image.new("RGB", (1200, 900), (200, 30, 30)).save(buf, format="JPEG")
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(buf.getvalue())))
+        self.end_headers()
+        self.wfile.write(buf.getvalue())
+
+    def log_message(self, *args):
+        pass
+
+
+class ProductThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _PhotoHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        thumb_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, thumb_dir, ignore_errors=True)
+        overrides = override_settings(IMAGE_PROXY_ALLOWED_HOSTS=["127.0.0.1"], THUMBNAIL_DIR=thumb_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        _PhotoHandler.hits = 0
+
+        self.image = f"http://127.0.0.1:{self.server.server_port}/shoe.jpg"
+        self.product = Product.objects.create(
+            name="Air Zoom", brand="Nike", category="Shoes", price=1000, stock=5, image=self.image,
+        )
+
+    def get(self, width, **params):
+        url = reverse('catalog:product_thumbnail', args=[self.product.pk, width])
+        return self.client.get(url, params)
+
+    def test_serves_resized_webp_with_long_cache(self):
+        response = self.get(320, v=thumbnails.version(self.image))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("immutable", response["Cache-Control"])
+        img = Image.open(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual((img.format, img.width, img.height), ("WEBP", 320, 240))
+
+        response = self.get(160, v=thumbnails.version(self.image), format="jpeg")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(_PhotoHandler.hits, 1)  # semua varian dibuat dari satu fetch
+
+    def test_upstream_redirect_outside_allowlist(self):
+        image = f"http://127.0.0.1:{self.server.server_port}/redirect.jpg"
+        Product.objects.filter(pk=self.product.pk).update(image=image)
+        self.assertEqual(self.get(320, v=thumbnails.version(image)).status_code, 502)
+        self.assertEqual(_PhotoHandler.hits, 1)
+
+    def test_decompression_bomb_is_rejected(self):
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            self.assertEqual(self.get(320, v=thumbnails.version(self.image)).status_code, 502)
+        self.assertFalse(thumbnails.has_variants(self.image))
+
+    def test_stale_version_redirects_to_current(self):
+        response = self.get(300, v="old")
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(f"/thumbnail/320/?v={thumbnails.version(self.image)}", response["Location"])
+        self.assertEqual(self.get(320, v="x", format="gif").status_code, 400)
+
+    def test_cart_json_uses_thumbnail(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username="buyer", password="pass12345")
+        CartItem.objects.create(user=user, product=self.product, quantity=1)
+        self.client.login(username="buyer", password="pass12345")
+        data = json.loads(self.client.get(reverse('cart:get_cart_json')).content)
+        self.assertTrue(data[0]["fields"]["thumbnail_url"].startswith("http://testserver/catalog/"))
+        self.assertIn(thumbnails.version(self.image), data[0]["fields"]["thumbnail_url"])
+
+    def test_warm_thumbnails_command(self):
+        out = StringIO()
+        call_command("warm_thumbnails", "--workers", "2", stdout=out)
+        self.assertIn("generated=1", out.getvalue())
+        self.assertTrue(thumbnails.has_variants(self.image))
+
+        out = StringIO()
+        call_command("warm_thumbnails", stdout=out)
+        self.assertIn("skipped=1", out.getvalue())
+        self.assertEqual(_PhotoHandler.hits, 1)
+
+
+class ProductsJsonStreamingTest(CatalogJsonTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            Product.objects.create(name=f"P{i}", brand="Nike", category="Shoes", price=100 + i, stock=1)
+
+    def test_stream_matches_buffered(self):
+        url = reverse('catalog:products_json')
+        buffered = json.loads(self.client.get(url).content)
+        response = self.client.get(url, {"stream": "1"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), buffered)
+
+        response = self.client.get(url, {"stream": "ndjson"})
+        lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 5)
+
+    async def test_asgi_stream_is_async(self):
+        url = reverse('catalog:products_json')
+        buffered = json.loads((await self.async_client.get(url)).content)
+        response = await self.async_client.get(url, {"stream": "1"})
+        # Di ASGI body berupa async iterator dari QuerySet.aiterator()
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response])
+        self.assertEqual(json.loads(body), buffered)
+
+    async def test_asgi_cached_response_and_etag(self):
+        url = reverse('catalog:products_filtered_json')
+        first = await self.async_client.get(url, {"category": "Shoes"})
+        self.assertEqual(len(json.loads(first.content)), 5)
+        again = await self.async_client.get(url, {"category": "Shoes"}, headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+
+class CatalogCacheTest(CatalogJsonTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(name="Air Zoom", brand="Nike", category="Shoes", price=1000, stock=3)
+        self.url = reverse('catalog:products_filtered_json')
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get(self.url, {'brand': 'nike'})
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+
+        response = self.client.get(self.url, {'brand': 'nike'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_cached_until_version_bump(self):
+        self.client.get(self.url, {'brand': 'nike'})
+        # Parameter dinormalisasi: urutan, spasi, dan parameter lain diabaikan
+        with self.assertNumQueries(1):  # hanya baca versi katalog
+            response = self.client.get(self.url, {'_': '123', 'brand': ' nike '})
+        self.assertEqual(json.loads(response.content)[0]['name'], "Air Zoom")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "Air Zoom 2"
+            self.product.save()
+        response = self.client.get(self.url, {'brand': 'nike'})
+        self.assertEqual(json.loads(response.content)[0]['name'], "Air Zoom 2")
+
+    def test_bulk_paths_bump_version(self):
+        before = current_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_review_change(self.product.pk, 1, 5)
+        self.assertEqual(current_version(), before + 1)
+
+    def test_errors_are_not_cached(self):
+        url = reverse('catalog:products_page_json')
+        self.assertEqual(self.client.get(url, {'cursor': 'bad'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': 'bad'}).status_code, 400)
+        self.assertNotIn('ETag', self.client.get(url, {'cursor': 'bad'}))
+
+
+class ProductFacetsTest(CatalogJsonTestCase):
+    def setUp(self):
+        super().setUp()
+        rows = [
+            ("Air Zoom", "Nike", "Shoes", 1_500_000), ("Pegasus", "Nike", "Shoes", 900_000),
+            ("Lakers Jersey", "Nike", "Jersey", 600_000), ("NBA Ball", "Spalding", "Ball", 400_000),
+            ("Street Ball", "Spalding", "Ball", 200_000), ("Ultraboost", "Adidas", "Shoes", 2_500_000),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, brand, category, price in rows:
+                Product.objects.create(name=name, brand=brand, category=category, price=price, stock=3)
+            Product.objects.create(name="Old Shoe", brand="Nike", category="Shoes", price=100, stock=0, is_available=False)
+        self.url = reverse('catalog:products_facets_json')
+
+    def get(self, **params):
+        return json.loads(self.client.get(self.url, params).content)
+
+    def counts(self, facet):
+        return {row["value"]: row["count"] for row in facet}
+
+    def test_counts_without_filters(self):
+        data = self.get()
+        self.assertEqual(data["total"], 6)
+        self.assertEqual(data["category"][0], {"value": "Shoes", "count": 3})
+        self.assertEqual(self.counts(data["brand"]), {"Nike": 3, "Spalding": 2, "Adidas": 1})
+        self.assertEqual([b["count"] for b in data["price"]], [1, 1, 2, 1, 1, 0])
+        self.assertEqual(data["price"][-1], {"min": 5_000_000, "max": None, "count": 0})
+
+    def test_each_facet_ignores_its_own_filter(self):
+        data = self.get(category="Shoes", brand="nike", max_price="1000000")
+        self.assertEqual(data["total"], 1)
+        # Kategori lain tetap terlihat untuk brand + harga yang dipilih
+        self.assertEqual(self.counts(data["category"]), {"Shoes": 1, "Jersey": 1})
+        self.assertEqual(self.counts(data["brand"]), {"Nike": 1})
+        # Bucket harga memakai kategori + brand tapi tidak rentang harga
+        self.assertEqual([b["count"] for b in data["price"]], [0, 0, 1, 1, 0, 0])
+
+        filtered = self.client.get(reverse('catalog:products_filtered_json'), {
+            "category": "Shoes", "brand": "nike", "max_price": "1000000",
+        })
+        self.assertEqual(len(json.loads(filtered.content)), data["total"])
+
+    def test_search_filter(self):
+        data = self.get(q="ball")
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(self.counts(data["brand"]), {"Spalding": 2})
+
+    def test_single_grouped_query_and_cache(self):
+        with self.assertNumQueries(2):  # versi katalog + satu GROUP BY
+            first = self.get(category="Ball")
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(category="Ball"), first)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Mini Ball", brand="Molten", category="Ball", price=100_000, stock=1)
+        self.assertEqual(self.get(category="Ball")["total"], 3)
+
+    def test_invalid_numbers(self):
+        names = ('products_facets_json', 'products_filtered_json', 'products_page_json')
+        for params in ({"min_price": "abc"}, {"max_price": "nan"}, {"min_rating": "abc"}):
+            for name in names:
+                response = self.client.get(reverse(f'catalog:{name}'), params)
+                self.assertEqual(response.status_code, 400, (name, params))
+                self.assertEqual(json.loads(response.content)["status"], "error")
+        self.assertEqual(self.get(min_price="1e6", min_rating="0")["total"], 2)
+
+
+class CatalogSnapshotTest(CatalogJsonTestCase):
+    def setUp(self):
+        super().setUp()
+        snapshot.clear_snapshot()
+        self.addCleanup(snapshot.clear_snapshot)
+        rows = [
+            ("Air Zoom", "Nike", "Shoes", 1_500_000, date(2024, 5, 1), 4.5),
+            ("Pegasus", "Nike", "Shoes", 900_000, None, 4.5),
+            ("Lakers Jersey", "Nike SB", "Jersey", 600_000, date(2023, 1, 1), 3.0),
+            ("NBA Ball", "Spalding", "Ball", 400_000, date(2024, 1, 1), 5.0),
+            ("Street Ball", "spalding", "Ball", 400_000, None, 0),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, brand, category, price, released, rating in rows:
+                Product.objects.create(
+                    name=name, brand=brand, category=category, price=price, stock=3,
+                    release_date=released, rating=rating, description=f"{name} \u00e9",
+                )
+            Product.objects.create(name="Old", brand="Nike", category="Shoes", price=1, stock=0, is_available=False)
+        self.url = reverse('catalog:products_filtered_json')
+
+    def fetch(self, enabled, params):
+        cache.clear()
+        with override_settings(CATALOG_SNAPSHOT=enabled):
+            return self.client.get(self.url, params)
+
+    def test_matches_orm_path(self):
+        combos = [
+            {}, {"category": "Shoes"}, {"brand": "nike"}, {"brand": "SPALD", "sort": "-price"},
+            {"min_price": "500000", "max_price": "1500000"}, {"min_rating": "4"}, {"category": "Hoop"},
+            {"sort": "release_date"}, {"sort": "-release_date"}, {"sort": "rating"}, {"sort": "-id"},
+        ]
+        for params in combos:
+            with self.subTest(params=params):
+                orm = self.fetch(False, params)
+                fast = self.fetch(True, params)
+                self.assertEqual(fast.content, orm.content)
+                self.assertEqual(fast["ETag"], orm["ETag"])
+        ids = [row["id"] for row in json.loads(self.fetch(True, {"sort": "-price"}).content)]
+        self.assertEqual(len(ids), 5)
+
+    def test_snapshot_skips_database_rows(self):
+        self.fetch(True, {})
+        cache.clear()
+        with override_settings(CATALOG_SNAPSHOT=True), CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {"category": "Ball"})
+        self.assertFalse(any("catalog_product" in q["sql"] for q in queries.captured_queries))
+
+    def test_rebuilt_after_version_bump(self):
+        self.fetch(True, {})
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(name="Pegasus").update(price=100)
+            bump_catalog_version()
+        data = json.loads(self.fetch(True, {"max_price": "200"}).content)
+        self.assertEqual([row["name"] for row in data], ["Pegasus"])
+
+    def test_search_and_bad_input_use_orm(self):
+        with override_settings(CATALOG_SNAPSHOT=True):
+            snap = snapshot.get_snapshot()
+        self.assertIsNone(snap.select({"q": "ball"}))
+        self.assertIsNone(snap.select({"min_price": "abc"}))
+        data = json.loads(self.fetch(True, {"q": "ball"}).content)
+        self.assertEqual({row["name"] for row in data}, {"NBA Ball", "Street Ball"})
+        self.assertEqual(self.fetch(True, {"sort": "name"}).status_code, 400)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("bench_catalog_snapshot", "--products", "300", "--requests", "20", stdout=out)
+        self.assertIn("snapshot", out.getvalue())
+        self.assertEqual(Product.objects.count(), 6)
+
+
+class RecommendationsTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "related.npy")
+        override = override_settings(
+            RECOMMENDATIONS_PATH=self.path, SIMILARITY_INDEX_DIR=os.path.join(self.tmp, "similarity"),
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.addCleanup(recommendations.clear_index_cache)
+        recommendations.clear_index_cache()
+
+        self.shoe, self.sock, self.ball, self.jersey, self.lonely = [
+            Product.objects.create(name=name, brand="Nike", category=category, price=1000, stock=5)
+            for name, category in (
+                ("Shoe", "Shoes"), ("Sock", "Shoes"), ("Ball", "Ball"), ("Jersey", "Jersey"), ("Lonely", "Shoes"),
+            )
+        ]
+        users = [get_user_model().objects.create_user(username=f"u{i}", password="pass12345") for i in range(4)]
+        # Sepatu hampir selalu dibeli bersama kaus kaki, kadang dengan bola
+        for user in users[:3]:
+            Wishlist.objects.create(user=user, product=self.shoe)
+        for user in users:
+            CartItem.objects.create(user=user, product=self.sock)
+        order = Order.objects.create(user=users[3], full_name="A", address="B", city="C", postal_code="1", total_price=0)
+        OrderItem.objects.create(order=order, product=self.shoe, quantity=1, price_at_checkout=1000)
+        OrderItem.objects.create(order=order, product=self.ball, quantity=1, price_at_checkout=1000)
+        Wishlist.objects.create(user=users[0], product=self.jersey)
+
+    def test_blocked_top_k_matches_dense_cosine(self):
+        rng = np.random.default_rng(0)
+        dense = (rng.random((30, 12)) < 0.3) * rng.integers(1, 4, (30, 12))
+        matrix = sparse.csc_matrix(dense.astype(np.float32))
+        norms = np.linalg.norm(dense, axis=0)
+        norms[norms == 0] = 1
+        cosine = (dense.T @ dense) / np.outer(norms, norms)
+        np.fill_diagonal(cosine, 0)
+
+        neighbors, scores = recommendations.top_k_neighbours(matrix, 3, block_size=5)
+        full_neighbors, full_scores = recommendations.top_k_neighbours(matrix, 3)
+        np.testing.assert_allclose(scores, full_scores, rtol=1e-5)
+        np.testing.assert_allclose(scores, -np.sort(-cosine, axis=1)[:, :3], rtol=1e-5)
+        for row in range(12):
+            for col, score in zip(neighbors[row], scores[row]):
+                if score > 0:
+                    self.assertAlmostEqual(cosine[row, col], score, places=5)
+
+    def test_build_and_related_endpoint(self):
+        stats = recommendations.build(k=3)
+        self.assertEqual(stats["products"], 5)
+
+        neighbours = recommendations.related_ids(self.shoe.pk)
+        self.assertEqual(neighbours[0][0], self.sock.pk)
+        self.assertIn(self.ball.pk, [pk for pk, _ in neighbours])
+        self.assertEqual(recommendations.related_ids(self.lonely.pk), [])
+
+        response = self.client.get(reverse("catalog:related_products", args=[self.shoe.pk]))
+        data = json.loads(response.content)
+        self.assertEqual(data["source"], "similar")
+        self.assertEqual(data["results"][0]["id"], self.sock.pk)
+        self.assertGreater(data["results"][0]["score"], data["results"][-1]["score"])
+
+    def test_unavailable_neighbours_are_skipped(self):
+        recommendations.build(k=3)
+        Product.objects.filter(pk=self.sock.pk).update(is_available=False)
+        data = json.loads(self.client.get(reverse("catalog:related_products", args=[self.shoe.pk])).content)
+        self.assertNotIn(self.sock.pk, [row["id"] for row in data["results"]])
+
+    def test_rebuilt_index_is_picked_up(self):
+        recommendations.build(k=3)
+        self.assertEqual(recommendations.related_ids(self.lonely.pk), [])
+        Wishlist.objects.create(user=get_user_model().objects.get(username="u0"), product=self.lonely)
+        recommendations.build(k=3)
+        self.assertNotEqual(recommendations.related_ids(self.lonely.pk), [])
+
+    def test_falls_back_to_category_without_index(self):
+        self.assertIsNone(recommendations.related_ids(self.shoe.pk))
+        data = json.loads(self.client.get(reverse("catalog:related_products", args=[self.shoe.pk])).content)
+        self.assertEqual(data["source"], "category")
+        self.assertEqual({row["id"] for row in data["results"]}, {self.sock.pk, self.lonely.pk})
+
+    def test_unknown_product(self):
+        recommendations.build(k=3)
+        self.assertEqual(self.client.get(reverse("catalog:related_products", args=[999999])).status_code, 404)
+
+    def test_build_command(self):
+        out = StringIO()
+        call_command("build_recommendations", "--k", "2", stdout=out)
+        self.assertIn("products=5", out.getvalue())
+        self.assertEqual(np.load(self.path)["neighbors"].shape, (5, 2))
+
+
+class SimilarityTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        override = override_settings(SIMILARITY_INDEX_DIR=self.tmp, RECOMMENDATIONS_PATH=os.path.join(self.tmp, "related.npy"))
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.addCleanup(similarity.clear_index_cache)
+        similarity.clear_index_cache()
+
+        self.zoom, self.pegasus, self.ball, self.jersey = [
+            Product.objects.create(name=name, brand=brand, category=category, description=description, price=1000, stock=5)
+            for name, brand, category, description in (
+                ("Air Zoom Running Shoe", "Nike", "Shoes", "Lightweight running shoe with zoom cushioning"),
+                ("Pegasus Running Shoe", "Nike", "Shoes", "Daily running shoe with responsive cushioning"),
+                ("Street Basketball", "Spalding", "Ball", "Rubber outdoor basketball"),
+                ("Lakers Jersey", "Nike", "Jersey", "Breathable basketball jersey"),
+            )
+        ]
+        self.staff = get_user_model().objects.create_user(username="staff", password="pass12345", is_staff=True)
+
+    def similar(self, pk, **params):
+        return json.loads(self.client.get(reverse("catalog:similar_products", args=[pk]), params).content)
+
+    def test_vectors_are_normalized_cosine(self):
+        rows = [("Air Zoom", "Nike", "Shoes", "running"), ("Air Zoom", "Nike", "Shoes", "running"), ("", "", "", "")]
+        docs, hashes, counts = similarity.hash_rows(rows)
+        matrix = similarity.vectors(docs, hashes, counts, similarity.inverse_document_frequency(hashes, 3), 3)
+        self.assertEqual(matrix.dtype, np.float32)
+        self.assertEqual(matrix.shape, (3, similarity.DIM))
+        self.assertAlmostEqual(float(matrix[0] @ matrix[1]), 1.0, places=5)
+        self.assertEqual(float(np.abs(matrix[2]).sum()), 0.0)
+
+    def test_blocked_search_matches_full_scan(self):
+        Product.objects.bulk_create([
+            Product(name=f"Shoe {i}", brand="Adidas" if i % 2 else "Puma", category="Shoes",
+                    description=f"model {i % 7} running", price=100, stock=1)
+            for i in range(40)
+        ])
+        similarity.build(chunk_size=7)
+        full, complete = similarity.similar_ids(self.zoom.pk, 10)
+        self.assertTrue(complete)
+        with mock.patch.object(similarity, "BLOCK_ROWS", 5):
+            blocked, _ = similarity.similar_ids(self.zoom.pk, 10)
+        # Skor sama (produk kembar) boleh berbeda urutan id-nya
+        np.testing.assert_allclose([score for _, score in blocked], [score for _, score in full], rtol=1e-6)
+        self.assertEqual(full[0][0], self.pegasus.pk)
+
+    def test_budget_stops_after_first_block(self):
+        similarity.build()
+        with mock.patch.object(similarity, "BLOCK_ROWS", 2):
+            results, complete = similarity.similar_ids(self.zoom.pk, 3, budget=-1)
+        self.assertFalse(complete)
+        self.assertEqual([pk for pk, _ in results], [self.pegasus.pk])
+
+    def test_similar_endpoint(self):
+        similarity.build()
+        data = self.similar(self.zoom.pk, limit=2)
+        self.assertEqual(data["source"], "content")
+        self.assertTrue(data["complete"])
+        self.assertEqual([row["id"] for row in data["results"]], [self.pegasus.pk, self.jersey.pk])
+        self.assertIn("thumbnail_url", data["results"][0])
+        self.assertEqual(self.client.get(reverse("catalog:similar_products", args=[999999])).status_code, 404)
+
+    def test_without_index_uses_category(self):
+        data = self.similar(self.zoom.pk)
+        self.assertEqual(data["source"], "category")
+        self.assertEqual([row["id"] for row in data["results"]], [self.pegasus.pk])
+
+    def test_related_uses_content_without_interactions(self):
+        similarity.build()
+        data = json.loads(self.client.get(reverse("catalog:related_products", args=[self.ball.pk])).content)
+        self.assertEqual(data["source"], "content")
+        self.assertEqual(data["results"][0]["id"], self.jersey.pk)
+
+    def test_product_missing_from_index_is_vectorized_on_the_fly(self):
+        similarity.build()
+        imported = Product.objects.bulk_create([
+            Product(name="Pegasus Trail Running Shoe", brand="Nike", category="Shoes", price=1, stock=1),
+        ])[0]
+        results, _ = similarity.similar_ids(imported.pk, 1)
+        self.assertEqual(results[0][0], self.pegasus.pk)
+
+    def test_create_and_edit_refresh_index(self):
+        similarity.build()
+        self.client.login(username="staff", password="pass12345")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("catalog:product_create"), {
+                "name": "Spalding Indoor Basketball", "brand": "Spalding", "category": "Ball",
+                "description": "Composite basketball", "price": 500, "stock": 3, "is_available": "on",
+            })
+        created = Product.objects.get(name="Spalding Indoor Basketball")
+        self.assertEqual(self.similar(self.ball.pk, limit=1)["results"][0]["id"], created.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("catalog:edit_product", args=[self.jersey.pk]), {
+                "name": "Pegasus Running Shoe Trail", "category": "Shoes", "description": "Trail running shoe",
+            })
+        ids = [row["id"] for row in self.similar(self.pegasus.pk)["results"]]
+        self.assertEqual(ids[0], self.jersey.pk)
+
+        # Build ulang menggabungkan delta ke index utama
+        similarity.build()
+        self.assertEqual(os.listdir(self.tmp).count(f"delta-{similarity._index.get().version}"), 0)
+        self.assertEqual([row["id"] for row in self.similar(self.pegasus.pk)["results"]][0], self.jersey.pk)
+
+    def test_delta_written_during_build_survives(self):
+        similarity.build()
+        real_idf = similarity.inverse_document_frequency
+
+        def edit_during_build(*args):
+            # Produk sudah dibaca build, lalu diedit dan delta-nya ditulis ke versi lama
+            Product.objects.filter(pk=self.jersey.pk).update(
+                name="Pegasus Running Shoe Trail", category="Shoes", description="Trail running shoe",
+            )
+            self.jersey.refresh_from_db()
+            similarity.refresh_products([self.jersey])
+            return real_idf(*args)
+
+        with mock.patch.object(similarity, "inverse_document_frequency", side_effect=edit_during_build):
+            stats = similarity.build()
+        self.assertEqual(stats["replayed"], 1)
+        self.assertEqual(self.similar(self.pegasus.pk)["results"][0]["id"], self.jersey.pk)
+
+    def test_build_command(self):
+        out = StringIO()
+        call_command("build_similarity_index", "--chunk-size", "2", stdout=out)
+        self.assertIn("products=4", out.getvalue())
@@ -0,0 +1,164 @@
+"""
+Thumbnail gambar produk.
+
+Gambar asli (Product.image) diambil sekali lewat image_proxy.fetch (allowlist
+dicek juga untuk setiap redirect), lalu semua varian lebar di THUMBNAIL_WIDTHS dibuat
+sekaligus dalam format WebP dan JPEG dan disimpan di THUMBNAIL_DIR.
+
+Nama direktori varian adalah hash dari URL gambar (`version`), jadi kalau
+URL gambar produk diganti, URL thumbnail ikut berubah dan cache browser
+yang lama tidak terpakai lagi. Karena itu file thumbnail aman dikirim
+dengan Cache-Control yang sangat panjang.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.urls import reverse
+from PIL import Image, UnidentifiedImageError
+
+from main import image_proxy
+
+THUMBNAIL_WIDTHS = (160, 320, 640)
+DEFAULT_WIDTH = 320
+FORMATS = {
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+DEFAULT_FORMAT = "webp"
+QUALITY = 80
+
+# Lock per URL (dibagi ke sejumlah tetap lock) supaya request bersamaan tidak
+# mengambil gambar yang sama berkali-kali, tanpa dict lock yang terus bertambah
+_LOCK_STRIPES = 64
+_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def _thumbnail_dir():
+    return Path(getattr(settings, "THUMBNAIL_DIR", settings.BASE_DIR / ".cache" / "thumbnails"))
+
+
+def version(image_url):
+    return hashlib.sha256(image_url.encode("utf-8")).hexdigest()[:16]
+
+
+def pick_width(width):
+    """Lebar varian terkecil yang >= width (atau varian terbesar)."""
+    for w in THUMBNAIL_WIDTHS:
+        if width <= w:
+            return w
+    return THUMBNAIL_WIDTHS[-1]
+
+
+def variant_path(image_url, width, fmt):
+    v = version(image_url)
+    return _thumbnail_dir() / v[:2] / v / f"{width}.{fmt}"
+
+
+def has_variants(image_url):
+    return all(
+        variant_path(image_url, w, fmt).exists()
+        for w in THUMBNAIL_WIDTHS for fmt in FORMATS
+    )
+
+
+def _fetch(image_url):
+    if not image_proxy.is_allowed(image_url):
+        raise ThumbnailError("Host not allowed")
+    max_bytes = getattr(settings, "IMAGE_PROXY_MAX_IMAGE_BYTES", 5 * 1024 * 1024)
+    try:
+        with image_proxy.fetch(image_url) as response:
+            response.raise_for_status()
+            data = bytearray()
+            for chunk in response.iter_content(image_proxy.CHUNK_SIZE):
+                data += chunk
+                if len(data) > max_bytes:
+                    raise ThumbnailError("Image too large")
+    except (requests.RequestException, image_proxy.UpstreamRedirectError) as e:
+        raise ThumbnailError(f"Error fetching image: {e}")
+    return bytes(data)
+
+
+def _encode(img, fmt):
+    if fmt == "jpeg" and img.mode != "RGB":
+        # JPEG tidak punya alpha, tempel di atas latar putih
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A") if "A" in img.getbands() else None)
+        img = background
+    out = io.BytesIO()
+    if fmt == "webp":
+        img.save(out, format="WEBP", quality=QUALITY, method=4)
+    else:
+        img.save(out, format="JPEG", quality=QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def render_variants(data):
+    """Buat semua varian dari bytes gambar asli. Mengembalikan {(width, fmt): bytes}."""
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.draft("RGB", (THUMBNAIL_WIDTHS[-1], THUMBNAIL_WIDTHS[-1]))  # decode JPEG langsung di skala kecil
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+    except Image.DecompressionBombError as e:
+        raise ThumbnailError(f"Image too large: {e}")
+    except (UnidentifiedImageError, OSError) as e:
+        raise ThumbnailError(f"Not an image: {e}")
+
+    variants = {}
+    # Dari besar ke kecil, setiap varian di-resize dari varian sebelumnya
+    for width in reversed(THUMBNAIL_WIDTHS):
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        for fmt in FORMATS:
+            variants[(width, fmt)] = _encode(img, fmt)
+    return variants
+
+
+def generate(image_url, force=False):
+    """Ambil gambar asli dan tulis semua varian ke disk (no-op kalau sudah ada)."""
+    with _locks[int(version(image_url), 16) % _LOCK_STRIPES]:
+        if not force and has_variants(image_url):
+            return False
+        for (width, fmt), data in render_variants(_fetch(image_url)).items():
+            _write(variant_path(image_url, width, fmt), data)
+        return True
+
+
+def get_variant(image_url, width, fmt=DEFAULT_FORMAT):
+    path = variant_path(image_url, width, fmt)
+    if not path.exists():
+        generate(image_url)
+    return path
+
+
+def thumbnail_url(request, product, width=DEFAULT_WIDTH, fmt=DEFAULT_FORMAT):
+    """URL absolut thumbnail produk, atau "" kalau produk tidak punya gambar."""
+    return thumbnail_url_for(request, product.pk, product.image, width, fmt)
+
+
+def thumbnail_url_for(request, pk, image_url, width=DEFAULT_WIDTH, fmt=DEFAULT_FORMAT):
+    """Sama dengan thumbnail_url, untuk data produk yang bukan instance Product."""
+    if not image_url:
+        return ""
+    path = reverse("catalog:product_thumbnail", args=[pk, pick_width(width)])
+    query = f"?v={version(image_url)}"
+    if fmt != DEFAULT_FORMAT:
+        query += f"&format={fmt}"
+    return request.build_absolute_uri(path + query)
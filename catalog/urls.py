@@ -6,12 +6,17 @@ app_name = 'catalog'
 urlpatterns = [
     path('json/', views.products_json, name='products_json'),
     path('json/filtered/', views.products_filtered_json, name='products_filtered_json'),
+    path('json/page/', views.products_page_json, name='products_page_json'),
+    path('json/facets/', views.products_facets_json, name='products_facets_json'),
     path('review/<int:pk>/', views.get_reviews, name='get_reviews'),
     path('create/', views.product_create, name='product_create'),
     path('edit/<int:id>/', views.edit_product, name='edit_product'), 
     path('delete/<int:pk>/', views.product_delete, name='product_delete'),
     path('', views.product_list, name='product_list'),
     path('<int:pk>/', views.product_detail, name='product_detail'),
+    path('<int:pk>/thumbnail/<int:width>/', views.product_thumbnail, name='product_thumbnail'),
+    path('<int:pk>/related/', views.related_products, name='related_products'),
+    path('<int:pk>/similar/', views.similar_products, name='similar_products'),
     path('edit-flutter/<int:id>/', views.edit_product_flutter, name='edit_product_flutter'),
     path('', views.product_list, name='product_list'),
     path('create/', views.product_create, name='product_create'),
@@ -1,7 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from .models import Product
+from .filters import FILTER_PARAMS, InvalidFilterRequest, filter_products, validate_filters
+from .cache import acached_json_response
+from .pagination import PRODUCT_JSON_FIELDS, InvalidPageRequest, keyset_page, parse_fields, parse_limit, parse_sort, sort_products
+from . import facets, recommendations, similarity, snapshot, thumbnails
+from main.streaming import astreaming_json_response, stream_format
+from review.serializers import product_review_to_dict, review_list_response
 from django import forms
-from django.http import JsonResponse
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from .models import Product
 import json
@@ -9,7 +15,7 @@ import json
 class ProductForm(forms.ModelForm):
     class Meta:
         model = Product
-        exclude = ['rating']
+        exclude = ['rating', 'review_count', 'rating_sum']
 @csrf_exempt
 def edit_product(request, id):
     if request.method != "POST":
@@ -32,6 +38,7 @@ def edit_product(request, id):
         product.stock = int(request.POST.get("stock", product.stock))
         product.image = request.POST.get("image", product.image)
         product.save()
+        similarity.refresh_on_commit(product)
     except Exception as e:
         return JsonResponse(
             {"success": False, "message": str(e)},
@@ -42,24 +49,10 @@ def edit_product(request, id):
 
 # ---------- VIEW: LIST + FILTER ----------
 def product_list(request):
-    query = request.GET.get('q')
-    category = request.GET.get('category')
-    brand = request.GET.get('brand')
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
-
-    products = Product.objects.all()
-
-    if query:
-        products = products.filter(name__icontains=query)
-    if category:
-        products = products.filter(category=category)
-    if brand:
-        products = products.filter(brand__icontains=brand)
-    if min_price:
-        products = products.filter(price__gte=min_price)
-    if max_price:
-        products = products.filter(price__lte=max_price)
+    try:
+        products = filter_products(Product.objects.all(), request.GET)
+    except InvalidFilterRequest as e:
+        return HttpResponseBadRequest(str(e))
 
     return render(request, 'catalog/product_list.html', {'products': products})
 
@@ -82,7 +75,7 @@ def product_create(request):
             )
 
         try:
-            Product.objects.create(
+            product = Product.objects.create(
                 name=request.POST.get("name"),
                 brand=request.POST.get("brand"),
                 category=request.POST.get("category"),
@@ -93,6 +86,7 @@ def product_create(request):
                 release_date=request.POST.get("release_date") or None,
                 is_available=request.POST.get("is_available") == "on",
             )
+            similarity.refresh_on_commit(product)
         except Exception as e:
             return JsonResponse(
                 {"success": False, "message": str(e)},
@@ -128,62 +122,199 @@ def product_delete(request, pk):
 
 
 # ---------- VIEW: JSON (untuk grid di frontend) ----------
-def products_json(request):
-    products = Product.objects.filter(is_available=True).values(
-        "id", "name", "brand", "category", "price",
-        "release_date", "is_available", "image", "description","stock",
-    )
-    return JsonResponse(list(products), safe=False)
+# View JSON katalog async: cache hit dan streaming tidak memakai thread worker,
+# query saat cache miss dijalankan di thread lewat acached_json_response.
+async def products_json(request):
+    products = Product.objects.filter(is_available=True).values(*PRODUCT_JSON_FIELDS)
+    fmt = stream_format(request)
+    if fmt:
+        return astreaming_json_response(request, products, fmt=fmt)
+    return await acached_json_response(request, 'products', (), lambda: JsonResponse(list(products), safe=False))
 
 def get_reviews(request, pk):
     product = get_object_or_404(Product, pk=pk)
-    reviews = product.reviews.all()
-    
-    data = [
-        {
-            'id': str(review.id),
-            'user': review.user.username,
-            'rating': review.rating,
-            'review': review.review,
-            'date': review.date.strftime('%d %B %Y')
-        }
-        for review in reviews
-    ]
-    return JsonResponse(data, safe=False)
-
-def products_filtered_json(request):
-    query = request.GET.get('q')
-    category = request.GET.get('category')
-    brand = request.GET.get('brand')
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
-
-    products = Product.objects.filter(is_available=True)
-
-    if query:
-        products = products.filter(name__icontains=query)
-    if category:
-        products = products.filter(category=category)
-    if brand:
-        products = products.filter(brand__icontains=brand)
-    if min_price:
-        products = products.filter(price__gte=min_price)
-    if max_price:
-        products = products.filter(price__lte=max_price)
-
-    data = list(products.values(
-        "id",
-        "name",
-        "brand",
-        "category",
-        "price",
-        "release_date",
-        "is_available",
-        "image",
-        "description",
-        "stock",
-    ))
-    return JsonResponse(data, safe=False)
+    return review_list_response(request, product.reviews.all(), product_review_to_dict)
+
+FILTERED_PARAMS = FILTER_PARAMS + ('sort',)
+
+async def products_filtered_json(request):
+    """
+    Semua produk tersedia yang lolos filter, urut id (atau relevansi untuk
+    ?q=) kecuali diberi ?sort= seperti products_page_json. Kalau
+    CATALOG_SNAPSHOT aktif, dijawab dari snapshot di memori (catalog.snapshot).
+    """
+    def build():
+        try:
+            validate_filters(request.GET)
+            sort = parse_sort(request.GET.get('sort')) if request.GET.get('sort') else None
+        except (InvalidFilterRequest, InvalidPageRequest) as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+        snap = snapshot.get_snapshot()
+        if snap is not None:
+            positions = snap.select(request.GET, sort or 'id')
+            if positions is not None:
+                return HttpResponse(snap.render(positions), content_type='application/json')
+
+        products = filter_products(Product.objects.filter(is_available=True), request.GET)
+        if sort:
+            products = sort_products(products, sort)
+        elif not request.GET.get('q'):
+            products = products.order_by('id')
+        data = list(products.values(*PRODUCT_JSON_FIELDS))
+        return JsonResponse(data, safe=False)
+
+    return await acached_json_response(request, 'filtered', FILTERED_PARAMS, build)
+
+async def products_facets_json(request):
+    """
+    Jumlah produk per kategori, brand dan rentang harga untuk filter yang
+    sama dengan products_filtered_json (lihat catalog.facets).
+    """
+    def build():
+        try:
+            data = facets.facet_counts(Product.objects.filter(is_available=True), request.GET)
+        except InvalidFilterRequest as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+        return JsonResponse(data)
+
+    return await acached_json_response(request, 'facets', FILTER_PARAMS, build)
+
+# ---------- VIEW: JSON per halaman (keyset pagination) ----------
+PAGE_PARAMS = FILTER_PARAMS + ('fields', 'sort', 'limit', 'cursor')
+
+async def products_page_json(request):
+    """
+    Versi paginasi dari products_filtered_json.
+    Query params: filter yang sama + sort (price, release_date, rating, id;
+    prefix "-" untuk descending), limit, cursor, dan fields (dipisah koma).
+    """
+    def build():
+        try:
+            fields = parse_fields(request.GET.get('fields'))
+            sort = parse_sort(request.GET.get('sort'))
+            limit = parse_limit(request.GET.get('limit'))
+            products = filter_products(Product.objects.filter(is_available=True), request.GET)
+            rows, next_cursor = keyset_page(products, sort, limit, fields, request.GET.get('cursor'))
+        except (InvalidFilterRequest, InvalidPageRequest) as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+        return JsonResponse({
+            "results": rows,
+            "next_cursor": next_cursor,
+            "limit": limit,
+        })
+
+    return await acached_json_response(request, 'page', PAGE_PARAMS, build)
+
+# ---------- VIEW: PRODUK TERKAIT ----------
+RELATED_FIELDS = ("id", "name", "brand", "category", "price", "image", "rating")
+DEFAULT_RELATED_LIMIT = 8
+MAX_SIMILAR_LIMIT = 50
+
+def _limit(request, maximum):
+    try:
+        return min(max(int(request.GET.get('limit', DEFAULT_RELATED_LIMIT)), 1), maximum)
+    except ValueError:
+        return DEFAULT_RELATED_LIMIT
+
+def _scored_rows(neighbours, limit):
+    """Produk tersedia dari [(id, skor)], urut skor turun."""
+    scores = dict(neighbours)
+    products = Product.objects.filter(pk__in=scores, is_available=True).values(*RELATED_FIELDS)
+    rows = sorted(products, key=lambda row: -scores[row["id"]])[:limit]
+    for row in rows:
+        row["score"] = round(scores[row["id"]], 4)
+    return rows
+
+def _same_category_rows(pk, limit):
+    product = get_object_or_404(Product.objects.only("category"), pk=pk)
+    return list(
+        Product.objects.filter(is_available=True, category=product.category)
+        .exclude(pk=pk).order_by("-rating", "id").values(*RELATED_FIELDS)[:limit]
+    )
+
+def _with_thumbnails(request, rows):
+    for row in rows:
+        row["thumbnail_url"] = thumbnails.thumbnail_url_for(request, row["id"], row["image"], 160)
+    return rows
+
+def related_products(request, pk):
+    """
+    Produk terkait dari index rekomendasi (catalog.recommendations, dibangun
+    offline). Produk yang belum punya tetangga (baru, belum ada interaksi,
+    atau index belum dibangun) memakai produk yang mirip secara teks
+    (catalog.similarity), lalu produk satu kategori dengan rating tertinggi.
+    """
+    limit = _limit(request, recommendations.DEFAULT_K)
+
+    source = "similar"
+    rows = []
+    # Ambil semua K tetangga: sebagian mungkin sudah tidak tersedia
+    neighbours = recommendations.related_ids(pk, recommendations.DEFAULT_K)
+    if neighbours:
+        rows = _scored_rows(neighbours, limit)
+    if not rows:
+        source = "content"
+        similar = similarity.similar_ids(pk, limit * 2)
+        if similar:
+            rows = _scored_rows(similar[0], limit)
+    if not rows:
+        source = "category"
+        rows = _same_category_rows(pk, limit)
+
+    return JsonResponse({
+        "status": "success", "product_id": pk, "source": source, "results": _with_thumbnails(request, rows),
+    })
+
+def similar_products(request, pk):
+    """
+    Top-N produk dengan nama/brand/kategori/deskripsi paling mirip
+    (catalog.similarity). Pencarian berhenti setelah SIMILARITY_BUDGET_MS;
+    `complete` false berarti hasilnya dari sebagian index saja. Kalau index
+    belum dibangun, dipakai produk satu kategori.
+    """
+    limit = _limit(request, MAX_SIMILAR_LIMIT)
+    # Lebih dari limit, karena sebagian mungkin sudah tidak tersedia
+    similar = similarity.similar_ids(pk, limit * 2)
+    if similar is None:
+        rows, source, complete = _same_category_rows(pk, limit), "category", True
+    else:
+        if not similar[0] and not Product.objects.filter(pk=pk).exists():
+            return JsonResponse({"status": "error", "message": "Product not found"}, status=404)
+        rows, source, complete = _scored_rows(similar[0], limit), "content", similar[1]
+
+    return JsonResponse({
+        "status": "success", "product_id": pk, "source": source, "complete": complete,
+        "results": _with_thumbnails(request, rows),
+    })
+
+# ---------- VIEW: THUMBNAIL ----------
+def product_thumbnail(request, pk, width):
+    """
+    Varian kecil gambar produk. ?v= adalah versi dari URL gambar; kalau
+    tidak cocok (gambar sudah diganti) client diarahkan ke URL versi terbaru,
+    jadi response dengan v yang benar boleh di-cache selamanya.
+    """
+    product = get_object_or_404(Product.objects.only('id', 'image'), pk=pk)
+    if not product.image:
+        return HttpResponse('Product has no image', status=404)
+
+    fmt = request.GET.get('format', thumbnails.DEFAULT_FORMAT)
+    if fmt not in thumbnails.FORMATS:
+        return HttpResponse('Unsupported format', status=400)
+    if width not in thumbnails.THUMBNAIL_WIDTHS or request.GET.get('v') != thumbnails.version(product.image):
+        return HttpResponseRedirect(thumbnails.thumbnail_url(request, product, width, fmt))
+
+    try:
+        path = thumbnails.get_variant(product.image, width, fmt)
+    except thumbnails.ThumbnailError as e:
+        return HttpResponse(str(e), status=502)
+
+    response = FileResponse(open(path, 'rb'), content_type=thumbnails.FORMATS[fmt])
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @csrf_exempt
 def edit_product_flutter(request, id):
     if request.method == 'POST':
@@ -201,6 +332,7 @@ def edit_product_flutter(request, id):
             product.image_url = data['image_url'] 
             
             product.save()
+            similarity.refresh_on_commit(product)
             
             return JsonResponse({"status": "success"}, status=200)
         except Product.DoesNotExist:
@@ -253,6 +385,7 @@ def create_product_flutter(request):
             )
 
             new_product.save()
+            similarity.refresh_on_commit(new_product)
 
             return JsonResponse({"status": "success"}, status=200)
         except Exception as e:
@@ -0,0 +1,86 @@
+"""
+Konfigurasi koneksi database dari environment variable.
+
+PostgreSQL (production) punya dua mode:
+- Koneksi persisten (default): satu koneksi per thread dipakai ulang
+  selama DB_CONN_MAX_AGE detik dan dicek dulu sebelum dipakai
+  (DB_CONN_HEALTH_CHECKS), jadi request tidak membayar handshake TCP+auth.
+- Pool psycopg bawaan Django 5.1+ (DB_POOL=true, butuh psycopg[pool]):
+  koneksi dipinjam dari pool per proses (DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE,
+  menunggu paling lama DB_POOL_TIMEOUT detik). Pilih mode ini di bawah ASGI,
+  karena koneksi persisten per thread tidak cocok dengan view async.
+  Total koneksi = jumlah worker x DB_POOL_MAX_SIZE, harus di bawah
+  max_connections server.
+
+SQLite (development) memakai WAL supaya pembaca tidak diblokir penulis,
+BEGIN IMMEDIATE supaya transaksi tulis tidak gagal "database is locked" di
+tengah jalan, dan koneksi persisten yang sama.
+"""
+import os
+
+DEFAULT_CONN_MAX_AGE = 60
+DEFAULT_POOL = {"min_size": 2, "max_size": 10, "timeout": 10}
+SQLITE_PRAGMAS = ("journal_mode=WAL", "synchronous=NORMAL")
+
+
+def _bool(env, name, default):
+    return env.get(name, str(default)).lower() in ("1", "true", "yes")
+
+
+def _int(env, name, default):
+    return int(env.get(name, default))
+
+
+def _persistence(env):
+    return {
+        "CONN_MAX_AGE": _int(env, "DB_CONN_MAX_AGE", DEFAULT_CONN_MAX_AGE),
+        "CONN_HEALTH_CHECKS": _bool(env, "DB_CONN_HEALTH_CHECKS", True),
+    }
+
+
+def pool_options(env=os.environ):
+    """Opsi `pool` untuk backend postgresql, atau None kalau DB_POOL mati."""
+    if not _bool(env, "DB_POOL", False):
+        return None
+    return {
+        "min_size": _int(env, "DB_POOL_MIN_SIZE", DEFAULT_POOL["min_size"]),
+        "max_size": _int(env, "DB_POOL_MAX_SIZE", DEFAULT_POOL["max_size"]),
+        "timeout": float(env.get("DB_POOL_TIMEOUT", DEFAULT_POOL["timeout"])),
+    }
+
+
+def postgres(env=os.environ):
+    options = {
+        "options": f"-c search_path={env.get('SCHEMA', 'public')}",
+        "connect_timeout": _int(env, "DB_CONNECT_TIMEOUT", 5),
+    }
+    config = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": env.get("DB_NAME"),
+        "USER": env.get("DB_USER"),
+        "PASSWORD": env.get("DB_PASSWORD"),
+        "HOST": env.get("DB_HOST"),
+        "PORT": env.get("DB_PORT"),
+        "OPTIONS": options,
+    }
+    pool = pool_options(env)
+    if pool:
+        options["pool"] = pool
+        # Pool Django menolak CONN_MAX_AGE selain 0; pool hanya memberi koneksi sehat
+        config.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+    else:
+        config.update(_persistence(env))
+    return config
+
+
+def sqlite(path, env=os.environ):
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path,
+        "OPTIONS": {
+            "init_command": ";".join(f"PRAGMA {pragma}" for pragma in SQLITE_PRAGMAS),
+            "transaction_mode": "IMMEDIATE",
+            "timeout": _int(env, "DB_BUSY_TIMEOUT", 20),
+        },
+        **_persistence(env),
+    }
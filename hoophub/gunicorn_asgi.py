@@ -0,0 +1,23 @@
+"""
+Konfigurasi gunicorn untuk menjalankan HoopHub lewat ASGI dengan worker
+uvicorn, supaya view async (proxy gambar, list JSON) tidak memblokir worker
+selama menunggu upstream atau database:
+
+    gunicorn hoophub.asgi:application -c hoophub/gunicorn_asgi.py
+
+Semua nilai bisa diganti lewat environment variable.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+# Satu event loop per worker sudah menangani banyak request I/O sekaligus,
+# jadi cukup satu worker per core (bukan 2n+1 seperti worker sync)
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+# Restart worker secara berkala untuk membatasi kebocoran memori
+max_requests = 2000
+max_requests_jitter = 200
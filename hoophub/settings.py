@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from hoophub import db
 # Load environment variables from .env file
 load_dotenv()
 
@@ -54,13 +55,17 @@ INSTALLED_APPS = [
     'review',
     'catalog',
     'invoice', 
+    'analytics',
     'corsheaders',
 ]
 
 MIDDLEWARE = [
+    # Paling luar supaya waktu dan query middleware lain ikut terukur
+    'main.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise yang juga async-capable (lihat main.middleware)
+    'main.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -81,6 +86,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'cart.context_processors.cart_count',
             ],
         },
     },
@@ -93,30 +99,53 @@ WSGI_APPLICATION = 'hoophub.wsgi.application'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 # Database configuration
+# Koneksi persisten / pool psycopg diatur lewat environment variables (lihat hoophub/db.py)
 if PRODUCTION:
     # Production: gunakan PostgreSQL dengan kredensial dari environment variables
     DATABASES = {
+        'default': db.postgres(),
+    }
+else:
+    # Development: gunakan SQLite (mode WAL)
+    DATABASES = {
+        'default': db.sqlite(BASE_DIR / 'db.sqlite3'),
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+if PRODUCTION:
+    # Production: backend dipilih lewat env, misalnya
+    # CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+    # CACHE_LOCATION=redis://127.0.0.1:6379/1
+    CACHES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
-            'NAME': os.getenv('DB_NAME'),
-            'USER': os.getenv('DB_USER'),
-            'PASSWORD': os.getenv('DB_PASSWORD'),
-            'HOST': os.getenv('DB_HOST'),
-            'PORT': os.getenv('DB_PORT'),
-            'OPTIONS': {
-                'options': f"-c search_path={os.getenv('SCHEMA', 'public')}"
-            }
+            'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+            'LOCATION': os.getenv('CACHE_LOCATION', 'hoophub'),
         }
     }
 else:
-    # Development: gunakan SQLite
-    DATABASES = {
+    # Development: cache di memori proses
+    CACHES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'hoophub',
         }
     }
 
+# Snapshot cart per user (cart.cache), detik
+CART_CACHE_TIMEOUT = int(os.getenv('CART_CACHE_TIMEOUT', 300))
+# Tanpa env ini snapshot cart hanya aktif kalau backend cache dibagi antar
+# worker (bukan LocMemCache) atau DEBUG aktif
+if os.getenv('CART_CACHE_ENABLED'):
+    CART_CACHE_ENABLED = os.getenv('CART_CACHE_ENABLED').lower() == 'true'
+
+# Instrumentasi per endpoint (main.middleware), 0 = mati, 1 = semua request
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', '0.1' if PRODUCTION else '1'))
+# Token Bearer untuk scraper /metrics/prometheus/ (kosong = hanya staff)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -28,4 +28,5 @@ urlpatterns = [
     path('report/', include('report.urls')),
     path('review/', include('review.urls')),
     path('wishlist/', include('wishlist.urls')),
+    path('analytics/', include('analytics.urls')),
 ]
@@ -0,0 +1,143 @@
+"""
+Riwayat invoice untuk Flutter dengan keyset (cursor) pagination.
+
+Urutan selalu (-date, -id). Cursor menyimpan (date, id) invoice terakhir di
+halaman, jadi halaman berikutnya cukup `WHERE (date, id) < cursor` dan
+tidak perlu OFFSET yang makin lambat di halaman belakang. Per halaman
+hanya ada tiga query: invoice + order, item + produk untuk invoice di
+halaman itu, dan ringkasan (jumlah + total) yang dihitung di SQL, hanya
+di halaman pertama. Mode streaming (main.streaming) mengirim semua invoice
+hasil filter tanpa paginasi.
+"""
+import base64
+import datetime
+import json
+import uuid
+
+from django.db.models import Count, Prefetch, Q, Sum, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.timezone import localtime
+
+from cart.models import OrderItem
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+STATUSES = {"Pending", "Paid", "Shipped", "Cancelled"}
+
+
+class InvalidHistoryRequest(ValueError):
+    pass
+
+
+def _parse_day(raw, name):
+    try:
+        day = datetime.date.fromisoformat(raw)
+    except ValueError:
+        raise InvalidHistoryRequest(f"Invalid {name}, expected YYYY-MM-DD")
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def filter_invoices(invoices, params):
+    """Filter ?date_from=, ?date_to= (inklusif, waktu lokal) dan ?status=."""
+    if params.get("date_from"):
+        invoices = invoices.filter(date__gte=_parse_day(params["date_from"], "date_from"))
+    if params.get("date_to"):
+        end = _parse_day(params["date_to"], "date_to") + datetime.timedelta(days=1)
+        invoices = invoices.filter(date__lt=end)
+    status = params.get("status")
+    if status:
+        if status not in STATUSES:
+            raise InvalidHistoryRequest(f"Unknown status: {status}")
+        invoices = invoices.filter(order__status=status)
+    return invoices
+
+
+def parse_limit(raw):
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def encode_cursor(invoice):
+    payload = json.dumps([invoice.date.isoformat(), invoice.id.hex], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.datetime.fromisoformat(date), uuid.UUID(pk)
+    except Exception:
+        raise InvalidHistoryRequest("Invalid cursor")
+
+
+def summarize(invoices):
+    """Jumlah invoice dan total nilai order, dihitung dalam satu query agregat."""
+    return invoices.aggregate(
+        count=Count("id"),
+        total_price=Coalesce(Sum("order__total_price"), 0),
+    )
+
+
+def history_page(invoices, limit, cursor=None):
+    """Mengembalikan (invoices, next_cursor) untuk satu halaman."""
+    invoices = invoices.select_related("order").order_by("-date", "-id")
+    if cursor:
+        date, pk = decode_cursor(cursor)
+        invoices = invoices.filter(Q(date__lt=date) | Q(date=date, id__lt=pk))
+
+    # Satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+    page = list(invoices[:limit + 1])
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1])
+
+    # Item hanya di-prefetch untuk invoice di halaman ini
+    prefetch_related_objects([inv for inv in page if inv.order_id], _items_prefetch())
+    return page, next_cursor
+
+
+def _items_prefetch():
+    return Prefetch("order__items", queryset=OrderItem.objects.select_related("product").order_by("id"))
+
+
+def history_stream(invoices):
+    """
+    Semua invoice (tanpa paginasi) untuk mode streaming. Dengan
+    .iterator(chunk_size) Django mem-prefetch item per chunk.
+    """
+    return invoices.select_related("order").prefetch_related(_items_prefetch()).order_by("-date", "-id")
+
+
+def invoice_to_dict(invoice):
+    order = invoice.order
+    items = []
+    if order:
+        for it in order.items.all():
+            p = it.product
+            items.append({
+                "product_id": p.id,
+                "name": p.name,
+                "brand": p.brand,
+                "price": float(it.price_at_checkout),
+                "quantity": it.quantity,
+                "subtotal": float(it.price_at_checkout * it.quantity),
+                "image": str(p.image) if p.image else "",
+            })
+    return {
+        "id": invoice.id,
+        "invoice_no": invoice.invoice_no,
+        "date": localtime(invoice.date).strftime("%Y-%m-%d %H:%M"),
+        "full_name": getattr(order, "full_name", ""),
+        "address": getattr(order, "address", ""),
+        "city": getattr(order, "city", ""),
+        "postal_code": getattr(order, "postal_code", ""),
+        "total_price": float(getattr(order, "total_price", 0)),
+        "status": getattr(order, "status", "Pending"),
+        "items": items,
+    }
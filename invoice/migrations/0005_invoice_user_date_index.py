@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0003_cartitem_unique_user_product'),
+        ('catalog', '0005_product_indexes'),
+        ('invoice', '0004_invoice_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', '-date', '-id'], name='invoice_user_date_idx'),
+        ),
+    ]
@@ -16,6 +16,12 @@ class Invoice(models.Model):
     invoice_no = models.CharField(max_length=32, unique=True, db_index=True)
     order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True)
 
+    class Meta:
+        indexes = [
+            # Riwayat invoice per user dengan keyset (-date, -id), lihat invoice.history
+            models.Index(fields=['user', '-date', '-id'], name='invoice_user_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.invoice_no} - {self.user}"
     
@@ -26,4 +32,12 @@ class InvoiceItem(models.Model):
     subtotal = models.IntegerField(default=0)
 
     def __str__(self):
-        return f"{self.product.name} ({self.quantity})"
\ No newline at end of file
+        return f"{self.product.name} ({self.quantity})"
+
+class InvoiceSequence(models.Model):
+    """Counter nomor invoice per hari (lihat invoice.utils.InvoiceNumberAllocator)."""
+    day = models.DateField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day:%Y%m%d}: {self.last_value}"
@@ -1,3 +1,213 @@
-from django.test import TestCase
+import json
+import threading
+import time
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from cart.models import CartItem, Order, OrderItem
+from catalog.models import Product
+
+from invoice.models import Invoice, InvoiceSequence
+from invoice.utils import InvoiceNumberAllocator, format_invoice_no
+
+
+class InvoiceNumberAllocatorTest(TestCase):
+    def test_numbers_are_sequential_per_day(self):
+        allocator = InvoiceNumberAllocator(block_size=3)
+        today = timezone.localdate()
+        numbers = [allocator.next() for _ in range(5)]
+        self.assertEqual(numbers, [format_invoice_no(today, i) for i in range(1, 6)])
+        # Dua blok sudah dipesan
+        self.assertEqual(InvoiceSequence.objects.get(day=today).last_value, 6)
+
+        tomorrow = today + timezone.timedelta(days=1)
+        self.assertEqual(allocator.next(tomorrow), format_invoice_no(tomorrow, 1))
+
+    def test_workers_get_disjoint_blocks(self):
+        a, b = InvoiceNumberAllocator(block_size=10), InvoiceNumberAllocator(block_size=10)
+        first, second = a.next(), b.next()
+        self.assertNotEqual(first, second)
+        self.assertTrue(second.endswith("-000011"))
+
+    def test_block_from_rolled_back_transaction_is_discarded(self):
+        a, b = InvoiceNumberAllocator(block_size=10), InvoiceNumberAllocator(block_size=10)
+        try:
+            with transaction.atomic():
+                lost = a.next()
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        # Pesanan blok a ikut di-rollback, jadi b mendapat nomor yang sama...
+        self.assertEqual(b.next(), lost)
+        # ...dan a tidak boleh memakai sisa bloknya lagi
+        self.assertNotIn(a.next(), {lost, format_invoice_no(timezone.localdate(), 2)})
+
+    def test_double_checkout_in_same_second(self):
+        user = get_user_model().objects.create_user(username="buyer", password="x")
+        allocator = InvoiceNumberAllocator()
+        for _ in range(2):
+            Invoice.objects.create(user=user, invoice_no=allocator.next())
+        self.assertEqual(Invoice.objects.filter(user=user).count(), 2)
+
+
+class InvoiceNumberStressTest(TransactionTestCase):
+    def test_concurrent_workers_never_collide(self):
+        workers, per_worker = 8, 250
+        user = get_user_model().objects.create_user(username="buyer", password="x")
+        barrier = threading.Barrier(workers)
+        errors = []
+
+        def work():
+            # Satu allocator per thread, seperti worker gunicorn yang berbeda
+            allocator = InvoiceNumberAllocator(block_size=10)
+            barrier.wait()
+            try:
+                created = 0
+                while created < per_worker:
+                    try:
+                        Invoice.objects.create(user=user, invoice_no=allocator.next())
+                        created += 1
+                    except OperationalError:
+                        # SQLite mengunci seluruh database, coba lagi
+                        time.sleep(0.001)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        numbers = list(Invoice.objects.values_list("invoice_no", flat=True))
+        self.assertEqual(len(numbers), workers * per_worker)
+        self.assertEqual(len(set(numbers)), len(numbers))
+
+
+
+class InvoiceHistoryTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="buyer", password="pass12345")
+        self.other = User.objects.create_user(username="admin_wannabe", password="pass12345")
+        self.staff = User.objects.create_user(username="staff", password="pass12345", is_staff=True)
+        self.products = [
+            Product.objects.create(name=f"P{i}", brand="Nike", category="Shoes", price=100, stock=10)
+            for i in range(3)
+        ]
+        base = timezone.make_aware(timezone.datetime(2025, 1, 1, 12))
+        for i in range(25):
+            self.make_invoice(self.user, base + timezone.timedelta(days=i), "Paid" if i % 2 else "Pending", i)
+        self.make_invoice(self.other, base, "Pending", 99)
+
+    def make_invoice(self, user, date, status, n):
+        order = Order.objects.create(
+            user=user, full_name="Budi", address="Jl.", city="Depok", postal_code="1",
+            total_price=300, status=status,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=p, quantity=1, price_at_checkout=100) for p in self.products
+        ])
+        invoice = Invoice.objects.create(user=user, order=order, invoice_no=f"INV-T-{user.pk}-{n}")
+        Invoice.objects.filter(pk=invoice.pk).update(date=date)
+
+    def get(self, username="buyer", **params):
+        self.client.login(username=username, password="pass12345")
+        return self.client.get(reverse("invoice:show_invoice_json_flutter"), params)
+
+    def test_pages_through_all_invoices_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 10}
+            if cursor:
+                params["cursor"] = cursor
+            data = json.loads(self.get(**params).content)
+            seen += [inv["invoice_no"] for inv in data["invoices"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen, [f"INV-T-{self.user.pk}-{i}" for i in reversed(range(25))])
+        self.assertEqual(len(data["invoices"]), 5)
+
+    def test_query_budget_is_fixed(self):
+        self.client.login(username="buyer", password="pass12345")
+        url = reverse("invoice:show_invoice_json_flutter")
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url, {"limit": 2})
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url, {"limit": 20})
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(json.loads(response.content)["invoices"][0]["items"]), 3)
+        # session + user + invoice/order + item/product + summary
+        self.assertLessEqual(len(large), 5)
+
+    def test_filters_and_summary(self):
+        data = json.loads(self.get(date_from="2025-01-03", date_to="2025-01-06", status="Paid").content)
+        self.assertEqual([inv["invoice_no"][-1] for inv in data["invoices"]], ["5", "3"])
+        self.assertEqual(data["summary"], {"count": 2, "total_price": 600})
+
+    def test_admin_is_decided_by_staff_flag(self):
+        data = json.loads(self.get("admin_wannabe").content)
+        self.assertFalse(data["is_admin"])
+        self.assertEqual(data["summary"]["count"], 1)
+
+        data = json.loads(self.get("staff").content)
+        self.assertTrue(data["is_admin"])
+        self.assertEqual(data["summary"]["count"], 26)
+
+    def test_bad_parameters(self):
+        for params in ({"cursor": "nope"}, {"status": "Lost"}, {"date_from": "01/02/2025"}):
+            response = self.get(**params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(json.loads(response.content)["status"], "error")
+
+    def test_show_invoices_prefetches_items(self):
+        self.client.login(username="buyer", password="pass12345")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("invoice:show_invoices"))
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(queries), 10)
+
+    def test_stream_returns_all_filtered_invoices(self):
+        response = self.get(status="Paid", stream="ndjson")
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(len(rows[0]["items"]), 3)
+        self.assertEqual(rows[0]["invoice_no"], f"INV-T-{self.user.pk}-23")
+
+
+class ReorderFlutterTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="again", password="pass12345")
+        self.shoe = Product.objects.create(name="Shoe", brand="Nike", category="Shoes", price=1000, stock=5)
+        self.ball = Product.objects.create(name="Ball", brand="Wilson", category="Ball", price=500, stock=5)
+        CartItem.objects.create(user=self.user, product=self.shoe, quantity=1)
+        self.client.login(username="again", password="pass12345")
+
+    def reorder(self, items):
+        return self.client.post(
+            reverse("invoice:reorder_flutter"), json.dumps({"items": items}), content_type="application/json",
+        )
+
+    def test_adds_items_to_cart(self):
+        response = self.reorder([
+            {"productId": self.shoe.pk, "quantity": 2},
+            {"productId": self.ball.pk, "quantity": 3},
+        ])
+        self.assertEqual(response.status_code, 200)
+        quantities = dict(CartItem.objects.filter(user=self.user).values_list("product_id", "quantity"))
+        self.assertEqual(quantities, {self.shoe.pk: 3, self.ball.pk: 3})
+
+    def test_missing_product_adds_nothing(self):
+        response = self.reorder([{"productId": self.ball.pk, "quantity": 1}, {"productId": 999999, "quantity": 1}])
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(CartItem.objects.filter(user=self.user, product=self.ball).exists())
@@ -1,4 +1,90 @@
-import datetime
-def generate_invoice_no(user_id: int) -> str:
-    now = datetime.datetime.now()
-    return f"INV{now:%Y%m%d}-{user_id}-{now:%H%M%S%f}"[:32]
\ No newline at end of file
+"""
+Nomor invoice: INV{YYYYMMDD}-{urutan:06d}, urutan mulai dari 1 setiap hari.
+
+Urutan disimpan di InvoiceSequence (satu baris per hari). Supaya worker
+tidak berebut baris yang sama untuk setiap invoice, setiap thread
+memesan satu blok nomor sekaligus (INVOICE_NUMBER_BLOCK_SIZE) dengan satu
+UPDATE atomik, lalu membagikan nomor dari blok itu di memori. Akibatnya
+nomor unik dan naik dalam satu thread, tapi boleh ada celah (nomor sisa
+blok yang tidak terpakai saat worker restart atau ganti hari).
+
+Kalau blok dipesan di dalam transaksi yang kemudian di-rollback, pesanan
+di database ikut batal sehingga nomornya bisa dipesan worker lain. Karena
+itu blok yang belum ter-commit hanya dipakai selama transaksi pemesannya
+masih berjalan, dan dibuang kalau transaksi itu di-rollback.
+"""
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+DEFAULT_BLOCK_SIZE = 20
+
+
+def format_invoice_no(day, value):
+    return f"INV{day:%Y%m%d}-{value:06d}"
+
+
+def reserve_range(day, count):
+    """Pesan `count` nomor urut berikutnya untuk `day`; kembalikan nomor pertama."""
+    from invoice.models import InvoiceSequence
+
+    with transaction.atomic():
+        seq, _ = InvoiceSequence.objects.get_or_create(day=day)
+        InvoiceSequence.objects.filter(pk=seq.pk).update(last_value=F("last_value") + count)
+        last = InvoiceSequence.objects.values_list("last_value", flat=True).get(pk=seq.pk)
+    return last - count + 1
+
+
+class _Block:
+    def __init__(self, day, first, last):
+        self.day = day
+        self.next = first
+        self.last = last
+        self.committed = False
+
+    def confirm(self):
+        self.committed = True
+
+    def usable(self, day):
+        if self.day != day or self.next > self.last:
+            return False
+        if self.committed:
+            return True
+        # Belum commit: masih boleh dipakai selama callback on_commit-nya belum
+        # dibuang (dibuang Django saat transaksi / savepoint-nya di-rollback)
+        return any(func == self.confirm for _, func, _ in connection.run_on_commit)
+
+
+class InvoiceNumberAllocator:
+    def __init__(self, block_size=None):
+        self.block_size = block_size or getattr(settings, "INVOICE_NUMBER_BLOCK_SIZE", DEFAULT_BLOCK_SIZE)
+        self._local = threading.local()
+
+    def next(self, day=None):
+        day = day or timezone.localdate()
+        block = getattr(self._local, "block", None)
+        if block is None or not block.usable(day):
+            block = self._local.block = self._reserve(day)
+        value = block.next
+        block.next += 1
+        return format_invoice_no(day, value)
+
+    def _reserve(self, day):
+        first = reserve_range(day, self.block_size)
+        block = _Block(day, first, first + self.block_size - 1)
+        if connection.in_atomic_block:
+            transaction.on_commit(block.confirm)
+        else:
+            block.confirm()
+        return block
+
+
+allocator = InvoiceNumberAllocator()
+
+
+def generate_invoice_no(user_id=None) -> str:
+    # user_id tidak lagi dipakai, dipertahankan supaya pemanggil lama tetap jalan
+    return allocator.next()
@@ -1,20 +1,42 @@
-import datetime
 import json
 from django.http import HttpResponseRedirect, JsonResponse
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
+from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from invoice.models import Invoice, InvoiceItem
 from invoice.forms import InvoiceForm
+from invoice.utils import generate_invoice_no
+from invoice.history import InvalidHistoryRequest, filter_invoices, history_page, history_stream, invoice_to_dict, parse_limit, summarize
+from main.streaming import stream_format, streaming_json_response
 from cart.models import Order, OrderItem, CartItem  # penting: ambil model Order karena Invoice punya foreign key ke Order
 from catalog.models import Product
+from analytics.rollup import order_created, order_deleted, order_status_changed
+from cart.batch import CartBatchError, apply_operations, parse_operations
+from cart.cache import invalidate_cart
 from django.utils.timezone import localtime
 
 ALLOWED_STATUSES = {"Pending", "Paid", "Shipped", "Cancelled"}
 
+
+def change_order_status(order_id, new_status):
+    """
+    Ubah status order dan pindahkan rollup analytics-nya. Order dibaca ulang
+    dengan select_for_update di dalam transaksi, jadi old_status selalu status
+    terbaru walaupun ada request lain yang mengubahnya bersamaan.
+    """
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order_id)
+        old_status = order.status
+        order.status = new_status
+        order.save()
+        order_status_changed(order, old_status)
+    return order
+
 @login_required(login_url='/authenticate/login')
 @require_http_methods(["GET", "POST"])
 def reorder_invoice(request, id):
@@ -59,18 +81,11 @@ def delete_invoice(request, id):
     return JsonResponse({"status": "success"})
 
 
-def generate_invoice_no(user_id: int) -> str:
-    now = datetime.datetime.now()
-    return f"INV{now:%Y%m%d}-{user_id}-{now:%H%M%S}"
-
-
 def show_invoices(request):
     if request.user.is_authenticated:
-        invoices = Invoice.objects.filter(user=request.user).select_related('order').order_by('-date')
-        for inv in invoices:
-            if inv.order:
-                for item in inv.order.items.all():
-                    item.subtotal = item.price_at_checkout * item.quantity
+        invoices = Invoice.objects.filter(user=request.user).select_related('order').prefetch_related(
+            Prefetch('order__items', queryset=OrderItem.objects.select_related('product'))
+        ).order_by('-date')
 
         return render(request, "invoice.html", {"invoices": invoices})
     else:
@@ -172,9 +187,8 @@ def update_status(request, id):
             "message": "Status tidak valid."
         }, status=400)
 
-    # update status di db
-    order.status = new_status
-    order.save()
+    # update status di db (rollup analytics ikut dipindah ke status baru)
+    change_order_status(order.pk, new_status)
 
     return JsonResponse({
         "status": "success",
@@ -184,6 +198,13 @@ def update_status(request, id):
 
 @csrf_exempt
 def show_invoice_json_flutter(request):
+    """
+    Riwayat invoice per halaman. Staff/superuser melihat semua invoice,
+    user biasa hanya miliknya. Query params: date_from, date_to (YYYY-MM-DD),
+    status, limit (maks 100), cursor (dari next_cursor halaman sebelumnya).
+    Dengan ?stream=1 / ?stream=ndjson semua invoice hasil filter dikirim
+    bertahap sebagai list (tanpa paginasi dan summary).
+    """
     # 1. Cek Autentikasi
     if not request.user.is_authenticated:
         return JsonResponse(
@@ -191,66 +212,33 @@ def show_invoice_json_flutter(request):
             status=401
         )
 
-    is_admin = request.user.is_superuser or 'admin' in request.user.username.lower()
+    is_admin = request.user.is_staff or request.user.is_superuser
 
     if is_admin:
-        # Opsional: ganti jadi .filter(user=request.user) jika admin tetap hanya lihat miliknya
-        invoices = Invoice.objects.all() 
+        invoices = Invoice.objects.all()
     else:
         invoices = Invoice.objects.filter(user=request.user)
 
-    # Optimalisasi Query
-    invoices = invoices.select_related('order')\
-                       .prefetch_related('order__items__product')\
-                       .order_by('-date')
-
-    invoices_data = []
-
-    # 4. Loop Susun Data
-    for invoice in invoices:
-        order = invoice.order
-        items_list = []
-
-        if order:
-            for it in order.items.all():
-                p = it.product
-                # Logika ambil gambar
-                img = ""
-                if hasattr(p, "image") and p.image:
-                    img = str(p.image)
-                elif hasattr(p, "thumbnail") and p.thumbnail:
-                    img = str(p.thumbnail)
-
-                items_list.append({
-                    "product_id": p.id,
-                    "name": p.name,
-                    "brand": getattr(p, "brand", ""),
-                    "price": float(it.price_at_checkout),
-                    "quantity": it.quantity,
-                    "subtotal": float(it.price_at_checkout * it.quantity),
-                    "image": img,
-                })
-
-        # Data per satu Invoice
-        invoices_data.append({
-            "id": invoice.id,
-            "invoice_no": invoice.invoice_no,
-            "date": localtime(invoice.date).strftime("%Y-%m-%d %H:%M"),
-            "full_name": getattr(order, "full_name", ""),
-            "address": getattr(order, "address", ""),
-            "city": getattr(order, "city", ""),
-            "postal_code": getattr(order, "postal_code", ""),
-            "total_price": float(getattr(order, "total_price", 0)),
-            "status": getattr(order, "status", "Pending"),
-            "items": items_list,
-        })
+    cursor = request.GET.get("cursor")
+    try:
+        invoices = filter_invoices(invoices, request.GET)
+        fmt = stream_format(request)
+        if fmt:
+            return streaming_json_response(history_stream(invoices), invoice_to_dict, fmt, chunk_size=200)
+        page, next_cursor = history_page(invoices, parse_limit(request.GET.get("limit")), cursor)
+    except InvalidHistoryRequest as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
 
-    # 5. Return Dictionary (Lebih aman dan rapi untuk Flutter)
-    return JsonResponse({
+    data = {
         "status": "success",
         "is_admin": is_admin,
-        "invoices": invoices_data
-    })
+        "invoices": [invoice_to_dict(inv) for inv in page],
+        "next_cursor": next_cursor,
+    }
+    # Ringkasan hanya di halaman pertama supaya halaman berikutnya tetap murah
+    if not cursor:
+        data["summary"] = summarize(invoices)
+    return JsonResponse(data)
 
 @csrf_exempt
 def create_invoice_flutter(request):
@@ -280,6 +268,8 @@ def create_invoice_flutter(request):
                     price_at_checkout = int(item.get("subtotal", 0))
                 )
 
+            order_created(new_order)
+
             new_invoice = Invoice.objects.create(
                 user = request.user,
                 order = new_order, # Menghubungkan Invoice ke Order yang baru dibuat
@@ -288,6 +278,7 @@ def create_invoice_flutter(request):
             )
 
             CartItem.objects.filter(user=request.user).delete()
+            invalidate_cart(request.user.pk)
 
             return JsonResponse({
                 "status": "success", 
@@ -317,7 +308,9 @@ def delete_invoice_flutter(request):
                 return JsonResponse({"status": "error", "message": "Unauthorized"}, status=403)
 
             if invoice.order:
-                invoice.order.delete()
+                with transaction.atomic():
+                    order_deleted(invoice.order)
+                    invoice.order.delete()
             else:
                 invoice.delete()
 
@@ -330,30 +323,28 @@ def delete_invoice_flutter(request):
 
 @csrf_exempt
 def reorder_flutter(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({"status": "error", "message": "Login required"}, status=401)
+
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
             items_data = data.get("items", [])
 
-            for item in items_data:
-                product_id = item.get("productId")
-                product_obj = get_object_or_404(Product, pk=product_id)
-                
-                cart_item, created = CartItem.objects.get_or_create(
-                    user=request.user,
-                    product=product_obj,
-                    defaults={'quantity': item.get("quantity", 1)}
-                )
-
-                if not created:
-                    cart_item.quantity += int(item.get("quantity", 1))
-                    cart_item.save()
+            # Satu batch lewat cart.batch: query tetap, semua item masuk atau tidak sama sekali
+            operations = parse_operations([
+                {"product_id": item.get("productId"), "op": "add", "quantity": item.get("quantity", 1)}
+                for item in items_data
+            ])
+            apply_operations(request.user, operations)
 
             return JsonResponse({
                 "status": "success", 
                 "message": "Items re-added to cart!"
             }, status=200)
 
+        except CartBatchError as e:
+            return JsonResponse({"status": "error", "message": e.message}, status=e.status)
         except Exception as e:
             return JsonResponse({"status": "error", "message": str(e)}, status=400)
             
@@ -370,10 +361,8 @@ def edit_status_flutter(request):
             # Ambil invoice untuk mendapatkan order-nya
             invoice = get_object_or_404(Invoice, pk=invoice_id)
             
-            if invoice.order:
-                order = invoice.order
-                order.status = new_status
-                order.save()
+            if invoice.order_id:
+                change_order_status(invoice.order_id, new_status)
                 
                 return JsonResponse({"status": "success", "message": f"Status updated to {new_status}"})
             else:
@@ -0,0 +1,174 @@
+"""
+Benchmark endpoint utama berdasarkan nama URL.
+
+Setiap skenario dijalankan beberapa kali (setelah warmup) lewat salah satu
+transport:
+- ClientTransport: django.test.Client di proses ini, jumlah query dihitung
+  langsung dari koneksi database.
+- HttpTransport: server yang sedang berjalan (mis. gunicorn lokal) lewat
+  HTTP. Jumlah query dibaca dari header Server-Timing (main.middleware),
+  jadi server perlu METRICS_SAMPLE_RATE=1.
+
+Hasilnya berupa dict yang bisa disimpan sebagai JSON dan dibandingkan
+dengan baseline lewat compare().
+"""
+import re
+import statistics
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+SCENARIOS = (
+    # (nama, nama URL, butuh login, argumen URL, query params)
+    ("home", "main:show_main", False, None, {}),
+    ("catalog_list", "catalog:product_list", False, None, {}),
+    ("catalog_json", "catalog:products_json", False, None, {}),
+    ("catalog_filtered", "catalog:products_filtered_json", False, None, {"category": "Shoes", "max_price": 2000000}),
+    ("catalog_search", "catalog:products_filtered_json", False, None, {"q": "nike jersey"}),
+    ("catalog_page", "catalog:products_page_json", False, None, {"sort": "price", "limit": 20}),
+    ("product_reviews", "catalog:get_reviews", False, "product", {}),
+    ("reviews_page", "review:show_json_all_flutter", False, None, {"page": 1}),
+    ("cart_json", "cart:get_cart_json", True, None, {}),
+    ("invoice_history", "invoice:show_invoice_json_flutter", True, None, {"limit": 20}),
+    ("my_reports", "report:show_my_json_flutter", True, None, {}),
+    ("wishlist_json", "wishlist:show_json", True, None, {}),
+)
+PERCENTILES = (50, 90, 99)
+_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+class ClientTransport:
+    name = "client"
+
+    def __init__(self, user=None):
+        # ALLOWED_HOSTS tidak memuat "testserver"
+        self.anonymous = Client(SERVER_NAME="localhost")
+        self.authenticated = None
+        if user is not None:
+            self.authenticated = Client(SERVER_NAME="localhost")
+            self.authenticated.force_login(user)
+
+    def send(self, path, params, auth):
+        client = self.authenticated if auth else self.anonymous
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(path, params)
+            size = sum(len(c) for c in response.streaming_content) if response.streaming else len(response.content)
+        return response.status_code, len(ctx.captured_queries), size
+
+
+class HttpTransport:
+    name = "http"
+
+    def __init__(self, base_url, username=None, password=None):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.anonymous = requests.Session()
+        self.authenticated = None
+        if username:
+            session = requests.Session()
+            response = session.post(
+                self.base_url + reverse("authentication:login_flutter"),
+                data={"username": username, "password": password},
+            )
+            response.raise_for_status()
+            # Cookie session bertanda Secure; tanpa HTTPS harus dipasang ulang manual
+            session.cookies.set("sessionid", response.cookies["sessionid"])
+            self.authenticated = session
+
+    def send(self, path, params, auth):
+        session = self.authenticated if auth else self.anonymous
+        response = session.get(self.base_url + path, params=params)
+        match = _QUERIES_RE.search(response.headers.get("Server-Timing", ""))
+        return response.status_code, int(match.group(1)) if match else None, len(response.content)
+
+
+def percentile(sorted_values, p):
+    """Persentil dengan interpolasi linear (sama seperti numpy default)."""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def run_scenario(transport, path, params, auth, iterations, warmup):
+    for _ in range(warmup):
+        transport.send(path, params, auth)
+
+    latencies, queries, sizes, errors = [], [], [], 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        status, n_queries, size = transport.send(path, params, auth)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if status >= 400:
+            errors += 1
+        if n_queries is not None:
+            queries.append(n_queries)
+        sizes.append(size)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": iterations,
+        "errors": errors,
+        "throughput_rps": round(iterations / elapsed, 1),
+        "latency_ms": {
+            **{f"p{p}": round(percentile(latencies, p), 3) for p in PERCENTILES},
+            "mean": round(statistics.fmean(latencies), 3),
+            "max": round(latencies[-1], 3),
+        },
+        "queries": max(queries) if queries else None,
+        "bytes": int(statistics.median(sizes)),
+    }
+
+
+def run(transport, context, iterations=50, warmup=5, only=None, log=None):
+    """
+    Jalankan SCENARIOS (atau hanya nama di `only`). `context` berisi objek
+    untuk argumen URL, mis. {"product": 12}. Skenario yang butuh login
+    dilewati kalau transport tidak punya user.
+    """
+    log = log or (lambda message: None)
+    results = {}
+    for name, url_name, auth, arg, params in SCENARIOS:
+        if only and name not in only:
+            continue
+        if auth and transport.authenticated is None:
+            log(f"skip {name}: no user")
+            continue
+        if arg and context.get(arg) is None:
+            log(f"skip {name}: no {arg}")
+            continue
+        path = reverse(url_name, args=[context[arg]] if arg else None)
+        results[name] = run_scenario(transport, path, params, auth, iterations, warmup)
+        results[name]["url_name"] = url_name
+        log(f"{name}: p50 {results[name]['latency_ms']['p50']:.1f} ms")
+    return results
+
+
+def compare(baseline, current, tolerance=0.2, min_delta_ms=1.0):
+    """
+    Bandingkan hasil dengan baseline. Regresi kalau p50 latency naik lebih
+    dari `tolerance` (relatif) sekaligus lebih dari `min_delta_ms` (supaya
+    noise di endpoint yang sangat cepat tidak dihitung), kalau jumlah query
+    bertambah, atau kalau skenario mulai mengembalikan error.
+    """
+    regressions = []
+    for name, base in baseline.items():
+        result = current.get(name)
+        if result is None:
+            continue
+        base_p50, p50 = base["latency_ms"]["p50"], result["latency_ms"]["p50"]
+        if p50 > base_p50 * (1 + tolerance) and p50 - base_p50 > min_delta_ms:
+            regressions.append(f"{name}: p50 {base_p50:.1f} -> {p50:.1f} ms")
+        if base.get("queries") is not None and result.get("queries") is not None and result["queries"] > base["queries"]:
+            regressions.append(f"{name}: queries {base['queries']} -> {result['queries']}")
+        if result["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: errors {base.get('errors', 0)} -> {result['errors']}")
+    return regressions
@@ -0,0 +1,499 @@
+"""
+Proxy gambar produk yang dipakai bersama oleh review, report, dan wishlist.
+
+- Satu requests.Session dengan connection pool untuk semua request keluar.
+- Hanya host di IMAGE_PROXY_ALLOWED_HOSTS (dan subdomainnya) yang boleh diambil.
+  Redirect diikuti manual (fetch / afetch) dan setiap Location dicek ulang,
+  jadi host yang diizinkan tidak bisa mengarahkan proxy ke alamat lain.
+- Cache di disk: isi gambar disimpan sebagai blob bernama SHA-256 dari
+  isinya (gambar yang sama dari URL berbeda hanya disimpan sekali), plus file
+  meta per URL berisi ETag/Last-Modified. Total ukuran dibatasi
+  IMAGE_PROXY_CACHE_MAX_BYTES dengan eviction LRU (mtime meta = akses terakhir).
+- Setelah IMAGE_PROXY_TTL detik entry direvalidasi dengan If-None-Match /
+  If-Modified-Since; kalau upstream balas 304 cukup pakai blob yang ada.
+- Response upstream di-stream ke client sambil ditulis ke cache, tidak
+  ditampung utuh di memori. Ukuran per gambar dibatasi IMAGE_PROXY_MAX_IMAGE_BYTES.
+
+aproxy_image adalah versi async untuk ASGI: request keluar memakai
+httpx.AsyncClient (satu pool per event loop), jadi menunggu upstream tidak
+memblokir worker. IO disk (meta, tulis blob, commit dan eviction) dijalankan
+di thread pool supaya event loop tidak ikut menunggu. Di bawah WSGI versi
+async langsung memakai proxy_image.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from requests.adapters import HTTPAdapter
+
+from main.streaming import is_asgi_request
+
+DEFAULT_ALLOWED_HOSTS = [
+    "static.nike.com",
+    "www.adidas.co.id",
+    "assets.adidas.com",
+    "spalding-basketball.com",
+    "contents.mediadecathlon.com",
+    "www.wilson.com",
+]
+CHUNK_SIZE = 64 * 1024
+MAX_REDIRECTS = 3
+USER_AGENT = "HoopHub image proxy"
+
+_session = None
+_session_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+_cache_bytes = None
+_cache_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                _session = session
+    return _session
+
+
+def _httpx_timeout(value):
+    # Format requests: angka atau tuple (connect, read)
+    if isinstance(value, (tuple, list)):
+        connect, read = value
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(value)
+
+
+def get_async_client():
+    """
+    httpx.AsyncClient untuk event loop yang sedang berjalan. Koneksi httpx
+    terikat ke loop-nya, jadi setiap loop (satu per worker uvicorn) punya
+    pool sendiri.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=_httpx_timeout(_setting("IMAGE_PROXY_TIMEOUT", (3.05, 10))),
+            headers={"User-Agent": USER_AGENT},
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def is_allowed(url):
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return False
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return False
+    host = parts.hostname.lower()
+    for allowed in _setting("IMAGE_PROXY_ALLOWED_HOSTS", DEFAULT_ALLOWED_HOSTS):
+        allowed = allowed.lower()
+        if host == allowed or host.endswith("." + allowed):
+            return True
+    return False
+
+
+class UpstreamRedirectError(Exception):
+    """Upstream me-redirect ke host di luar allowlist, atau terlalu banyak redirect."""
+
+
+def _next_location(url, location, hops):
+    target = urljoin(url, location)
+    if hops >= MAX_REDIRECTS:
+        raise UpstreamRedirectError("Too many redirects")
+    if not is_allowed(target):
+        raise UpstreamRedirectError(f"Redirect to a host that is not allowed: {urlsplit(target).hostname}")
+    return target
+
+
+def fetch(url, headers=None):
+    """
+    GET streaming lewat session bersama. Redirect tidak diikuti otomatis oleh
+    requests; setiap Location dicek dengan is_allowed lebih dulu.
+    """
+    timeout = _setting("IMAGE_PROXY_TIMEOUT", (3.05, 10))
+    for hops in range(MAX_REDIRECTS + 1):
+        upstream = get_session().get(url, headers=headers, stream=True, timeout=timeout, allow_redirects=False)
+        if not upstream.is_redirect:
+            return upstream
+        upstream.close()
+        url = _next_location(url, upstream.headers["Location"], hops)
+
+
+async def afetch(url, headers=None):
+    """Versi async dari fetch dengan httpx (yang juga tidak mengikuti redirect otomatis)."""
+    client = get_async_client()
+    for hops in range(MAX_REDIRECTS + 1):
+        upstream = await client.send(client.build_request("GET", url, headers=headers), stream=True)
+        if not upstream.has_redirect_location:
+            return upstream
+        await upstream.aclose()
+        url = _next_location(url, upstream.headers["Location"], hops)
+
+
+# ---------- cache di disk ----------
+
+def _cache_dir():
+    return Path(_setting("IMAGE_PROXY_CACHE_DIR", settings.BASE_DIR / ".cache" / "image_proxy"))
+
+
+def _meta_path(url):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return _cache_dir() / "meta" / key[:2] / f"{key}.json"
+
+
+def _blob_path(digest):
+    return _cache_dir() / "blobs" / digest[:2] / digest
+
+
+def _atomic_write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _load_meta(url):
+    path = _meta_path(url)
+    try:
+        meta = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if meta.get("url") != url or not _blob_path(meta["blob"]).exists():
+        return None
+    return meta
+
+
+def _save_meta(url, meta):
+    _atomic_write(_meta_path(url), json.dumps(meta).encode("utf-8"))
+
+
+def _touch(url):
+    try:
+        os.utime(_meta_path(url))
+    except OSError:
+        pass
+
+
+def _scan_cache():
+    metas, blobs = [], {}
+    for path in (_cache_dir() / "meta").glob("*/*.json"):
+        try:
+            metas.append((path.stat().st_mtime, path, json.loads(path.read_text())["blob"]))
+        except (OSError, ValueError, KeyError):
+            path.unlink(missing_ok=True)
+    for path in (_cache_dir() / "blobs").glob("*/*"):
+        if not path.name.startswith(".tmp-"):
+            blobs[path.name] = path.stat().st_size
+    return metas, blobs
+
+
+def _account(size):
+    """Catat blob baru dan jalankan eviction kalau cache melewati budget."""
+    global _cache_bytes
+    budget = _setting("IMAGE_PROXY_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+    with _cache_lock:
+        if _cache_bytes is None:
+            _cache_bytes = sum(_scan_cache()[1].values())
+        else:
+            _cache_bytes += size
+        if _cache_bytes > budget:
+            _cache_bytes = _evict(int(budget * 0.9))
+
+
+def _evict(target):
+    metas, blobs = _scan_cache()
+    metas.sort(key=lambda m: m[0], reverse=True)  # paling baru diakses dulu
+
+    keep, used = set(), 0
+    for _, path, blob in metas:
+        size = blobs.get(blob)
+        if size is None:
+            path.unlink(missing_ok=True)
+        elif blob in keep:
+            continue
+        elif used + size <= target:
+            keep.add(blob)
+            used += size
+        else:
+            path.unlink(missing_ok=True)
+
+    # Hapus meta yang menunjuk blob yang dibuang, lalu blob tanpa referensi
+    for _, path, blob in metas:
+        if blob not in keep:
+            path.unlink(missing_ok=True)
+    for blob in blobs:
+        if blob not in keep:
+            _blob_path(blob).unlink(missing_ok=True)
+    return used
+
+
+def clear_cache_state():
+    """Reset penghitung ukuran cache (dipakai test saat direktori cache diganti)."""
+    global _cache_bytes
+    with _cache_lock:
+        _cache_bytes = None
+
+
+# ---------- response ----------
+
+def _in_thread(func):
+    """Bungkus IO disk (sync) supaya view async tidak memblokir event loop."""
+    return sync_to_async(func, thread_sensitive=False)
+
+
+async def _aiter_file(path):
+    with open(path, "rb") as f:
+        while chunk := await _in_thread(f.read)(CHUNK_SIZE):
+            yield chunk
+
+
+def _cached_response(meta, status_label, is_async=False):
+    path = _blob_path(meta["blob"])
+    if is_async:
+        # Di ASGI, FileResponse (iterator sync) akan dibaca utuh ke memori dulu
+        response = StreamingHttpResponse(_aiter_file(path), content_type=meta["content_type"])
+        response["Content-Length"] = str(path.stat().st_size)
+    else:
+        response = FileResponse(open(path, "rb"), content_type=meta["content_type"])
+    response["Cache-Control"] = f"public, max-age={_setting('IMAGE_PROXY_TTL', 86400)}"
+    response["X-Cache"] = status_label
+    return response
+
+
+class _BlobWriter:
+    """Tulis body upstream ke file sementara sambil menghitung SHA-256-nya."""
+
+    def __init__(self, max_bytes):
+        tmp_dir = _cache_dir() / "blobs"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir, prefix=".tmp-")
+        self.file = os.fdopen(fd, "wb")
+        self.tmp = Path(tmp)
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.max_bytes = max_bytes
+
+    def write(self, chunk):
+        """False kalau gambar melewati batas ukuran (jangan diteruskan lagi)."""
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            return False
+        self.file.write(chunk)
+        self.digest.update(chunk)
+        return True
+
+    def abort(self):
+        self.file.close()
+        self.tmp.unlink(missing_ok=True)
+
+    def commit(self, url, headers):
+        self.file.close()
+        blob = self.digest.hexdigest()
+        path = _blob_path(blob)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not path.exists()
+        if is_new:
+            os.replace(self.tmp, path)
+        else:
+            self.tmp.unlink(missing_ok=True)
+        _save_meta(url, {
+            "url": url,
+            "blob": blob,
+            "content_type": headers.get("Content-Type", "image/jpeg"),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "size": self.size,
+        })
+        if is_new:
+            _account(self.size)
+
+
+def _stream_and_store(url, upstream, max_bytes):
+    """Generator yang meneruskan body upstream ke client sambil menulis ke cache."""
+    writer = _BlobWriter(max_bytes)
+    complete = False
+    try:
+        for chunk in upstream.iter_content(CHUNK_SIZE):
+            if not writer.write(chunk):
+                # Header sudah terkirim, jadi cukup hentikan stream dan jangan cache
+                return
+            yield chunk
+        complete = True
+    finally:
+        upstream.close()
+        if complete:
+            writer.commit(url, upstream.headers)
+        else:
+            writer.abort()
+
+
+async def _astream_and_store(url, upstream, max_bytes):
+    # Tulis file, commit (termasuk eviction) dan abort berjalan di thread pool
+    writer = await _in_thread(_BlobWriter)(max_bytes)
+    complete = False
+    try:
+        async for chunk in upstream.aiter_bytes(CHUNK_SIZE):
+            if not await _in_thread(writer.write)(chunk):
+                return
+            yield chunk
+        complete = True
+    finally:
+        await upstream.aclose()
+        if complete:
+            await _in_thread(writer.commit)(url, upstream.headers)
+        else:
+            await _in_thread(writer.abort)()
+
+
+def _validate(request):
+    """(url, None) kalau request boleh diproses, atau (None, response error)."""
+    image_url = request.GET.get('url')
+    if not image_url:
+        return None, HttpResponse('No URL provided', status=400)
+    if not is_allowed(image_url):
+        return None, HttpResponse('Host not allowed', status=403)
+    return image_url, None
+
+
+def _revalidation_headers(meta):
+    headers = {}
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def _reject_upstream(headers, max_bytes):
+    """Response error kalau upstream bukan gambar atau terlalu besar, selain itu None."""
+    if not headers.get("Content-Type", "image/jpeg").startswith("image/"):
+        return HttpResponse('Upstream did not return an image', status=415)
+    length = headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > max_bytes:
+        return HttpResponse('Image too large', status=413)
+    return None
+
+
+def _streaming_response(content, headers, ttl):
+    response = StreamingHttpResponse(content, content_type=headers.get("Content-Type", "image/jpeg"))
+    response["Cache-Control"] = f"public, max-age={ttl}"
+    response["X-Cache"] = "MISS"
+    return response
+
+
+def _lookup(image_url, ttl, is_async=False):
+    """(meta, response HIT) dari cache; response None kalau tidak ada atau sudah lewat TTL."""
+    meta = _load_meta(image_url)
+    if meta and time.time() - meta["fetched_at"] < ttl:
+        _touch(image_url)
+        return meta, _cached_response(meta, "HIT", is_async)
+    return meta, None
+
+
+def _revalidated(image_url, meta, is_async=False):
+    meta["fetched_at"] = time.time()
+    _save_meta(image_url, meta)
+    return _cached_response(meta, "REVALIDATED", is_async)
+
+
+def proxy_image(request):
+    image_url, error = _validate(request)
+    if error:
+        return error
+
+    ttl = _setting("IMAGE_PROXY_TTL", 86400)
+    meta, hit = _lookup(image_url, ttl)
+    if hit:
+        return hit
+
+    headers = _revalidation_headers(meta)
+    max_bytes = _setting("IMAGE_PROXY_MAX_IMAGE_BYTES", 5 * 1024 * 1024)
+    upstream = None
+    try:
+        upstream = fetch(image_url, headers)
+        if meta and upstream.status_code == 304:
+            upstream.close()
+            return _revalidated(image_url, meta)
+        upstream.raise_for_status()
+    except (requests.RequestException, UpstreamRedirectError) as e:
+        if upstream is not None:
+            upstream.close()
+        if meta:
+            # Upstream bermasalah, pakai salinan lama daripada gagal
+            return _cached_response(meta, "STALE")
+        return HttpResponse(f'Error fetching image: {str(e)}', status=500)
+
+    rejected = _reject_upstream(upstream.headers, max_bytes)
+    if rejected:
+        upstream.close()
+        return rejected
+    return _streaming_response(_stream_and_store(image_url, upstream, max_bytes), upstream.headers, ttl)
+
+
+async def aproxy_image(request):
+    """
+    Sama seperti proxy_image, tapi menunggu upstream tanpa memblokir thread.
+    Body dari httpx hanya bisa dibaca di event loop yang sama, jadi di bawah
+    WSGI (loop berbeda per pemanggilan) yang dipakai versi sync.
+    """
+    if not is_asgi_request(request):
+        return await sync_to_async(proxy_image)(request)
+
+    image_url, error = _validate(request)
+    if error:
+        return error
+
+    ttl = _setting("IMAGE_PROXY_TTL", 86400)
+    meta, hit = await _in_thread(_lookup)(image_url, ttl, is_async=True)
+    if hit:
+        return hit
+
+    max_bytes = _setting("IMAGE_PROXY_MAX_IMAGE_BYTES", 5 * 1024 * 1024)
+    upstream = None
+    try:
+        upstream = await afetch(image_url, _revalidation_headers(meta))
+        if meta and upstream.status_code == 304:
+            await upstream.aclose()
+            return await _in_thread(_revalidated)(image_url, meta, is_async=True)
+        upstream.raise_for_status()
+    except (httpx.HTTPError, UpstreamRedirectError) as e:
+        if upstream is not None:
+            await upstream.aclose()
+        if meta:
+            return await _in_thread(_cached_response)(meta, "STALE", is_async=True)
+        return HttpResponse(f'Error fetching image: {str(e)}', status=500)
+
+    rejected = _reject_upstream(upstream.headers, max_bytes)
+    if rejected:
+        await upstream.aclose()
+        return rejected
+    return _streaming_response(_astream_and_store(image_url, upstream, max_bytes), upstream.headers, ttl)
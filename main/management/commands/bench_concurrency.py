@@ -0,0 +1,155 @@
+import asyncio
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+from django.core.asgi import get_asgi_application
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from main import image_proxy
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"x" * 8192
+
+
+def _slow_upstream(delay):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(PNG)))
+            self.end_headers()
+            self.wfile.write(PNG)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare how many concurrent image proxy requests the app serves through the sync "
+        "WSGI handler (fixed worker threads, like gunicorn sync workers) and the ASGI handler "
+        "(one event loop, like a uvicorn worker) against a slow upstream. Every request is a "
+        "cache miss."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients")
+        parser.add_argument("--wsgi-workers", type=int, default=4, help="WSGI worker threads")
+        parser.add_argument("--delay", type=float, default=0.2, help="Upstream latency in seconds")
+
+    def handle(self, *args, **opts):
+        upstream = _slow_upstream(opts["delay"])
+        cache_dir = tempfile.mkdtemp()
+        base = f"http://127.0.0.1:{upstream.server_port}"
+        path = reverse("review:proxy_image")
+        # URL unik per request supaya selalu cache miss
+        queries = [urlencode({"url": f"{base}/img-{i}.png"}) for i in range(opts["requests"])]
+        try:
+            with override_settings(
+                IMAGE_PROXY_ALLOWED_HOSTS=["127.0.0.1"], IMAGE_PROXY_CACHE_DIR=cache_dir,
+                METRICS_SAMPLE_RATE=0,
+            ):
+                image_proxy.clear_cache_state()
+                self.stdout.write(
+                    f"{opts['requests']} requests, {opts['concurrency']} concurrent clients, "
+                    f"upstream delay {opts['delay'] * 1000:.0f} ms"
+                )
+                self._report(f"WSGI ({opts['wsgi_workers']} threads)", *self._run_wsgi(path, queries, opts))
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                image_proxy.clear_cache_state()
+                self._report("ASGI (1 event loop)", *asyncio.run(self._run_asgi(path, queries, opts)))
+        finally:
+            upstream.shutdown()
+            upstream.server_close()
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            image_proxy.clear_cache_state()
+
+    def _run_wsgi(self, path, queries, opts):
+        handler = WSGIHandler()
+        factory = RequestFactory(SERVER_NAME="localhost")
+
+        # Client sebanyak --concurrency, tapi hanya --wsgi-workers yang dilayani
+        # bersamaan; sisanya antre seperti di depan worker gunicorn sync
+        workers = threading.Semaphore(opts["wsgi_workers"])
+
+        def one(query):
+            environ = factory.get(f"{path}?{query}").environ
+            start = time.perf_counter()
+            status = []
+            with workers:
+                body = handler(environ, lambda s, headers, exc_info=None: status.append(s))
+                size = sum(len(chunk) for chunk in body)
+                body.close()
+            return time.perf_counter() - start, status[0].startswith("200") and size == len(PNG)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opts["concurrency"]) as pool:
+            results = list(pool.map(one, queries))
+        return results, time.perf_counter() - start
+
+    async def _run_asgi(self, path, queries, opts):
+        app = get_asgi_application()
+        limit = asyncio.Semaphore(opts["concurrency"])
+
+        async def one(query):
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+                "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+                "query_string": query.encode(), "root_path": "",
+                "headers": [(b"host", b"localhost")],
+                "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+            }
+            done = asyncio.Event()
+            sent = {"body": b""}
+            received = False
+
+            async def receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await done.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    sent["status"] = message["status"]
+                elif message["type"] == "http.response.body":
+                    sent["body"] += message.get("body", b"")
+                    if not message.get("more_body"):
+                        done.set()
+
+            async with limit:
+                start = time.perf_counter()
+                await app(scope, receive, send)
+                return time.perf_counter() - start, sent.get("status") == 200 and sent["body"] == PNG
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(q) for q in queries))
+        return results, time.perf_counter() - start
+
+    def _report(self, label, results, elapsed):
+        latencies = sorted(t * 1000 for t, _ in results)
+        failed = sum(1 for _, ok in results if not ok)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            f"{label:<20} {len(results) / elapsed:>8.1f} req/s   p50 {statistics.median(latencies):>7.1f} ms   "
+            f"p95 {p95:>7.1f} ms   failed {failed}"
+        )
@@ -0,0 +1,94 @@
+import copy
+import statistics
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import RequestFactory
+from django.urls import reverse
+
+from main.benchmarks import percentile
+
+
+def _per_request(settings_dict):
+    """Koneksi baru di setiap request: tanpa pool dan CONN_MAX_AGE=0."""
+    settings_dict["CONN_MAX_AGE"] = 0
+    settings_dict["CONN_HEALTH_CHECKS"] = False
+    settings_dict["OPTIONS"].pop("pool", None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request latency of a one-query endpoint when every request opens a new "
+        "database connection, compared with the configured persistent connections or pool "
+        "(hoophub/db.py). Also times a bare connect against a reused connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **opts):
+        conn = connections[opts["database"]]
+        original = copy.deepcopy(conn.settings_dict)
+        configured = "pool" if original["OPTIONS"].get("pool") else f"CONN_MAX_AGE={original['CONN_MAX_AGE']}"
+        self.stdout.write(f"{conn.vendor} {original['NAME']}, {opts['requests']} requests per mode")
+
+        try:
+            self._report("connect + SELECT 1", self._raw(conn, opts["requests"], reconnect=True))
+            self._report("SELECT 1 (reused)", self._raw(conn, opts["requests"], reconnect=False))
+            self._reset(conn, original, _per_request)
+            self._report("request, new conn", self._requests(opts["requests"]))
+            self._reset(conn, original)
+            self._report(f"request, {configured}", self._requests(opts["requests"]))
+        finally:
+            self._reset(conn, original)
+
+    def _reset(self, conn, original, change=None):
+        conn.close()
+        if getattr(conn, "pool", None):
+            conn.close_pool()
+        conn.settings_dict.clear()
+        conn.settings_dict.update(copy.deepcopy(original))
+        if change:
+            change(conn.settings_dict)
+
+    def _raw(self, conn, n, reconnect):
+        latencies = []
+        conn.ensure_connection()
+        for _ in range(n):
+            start = time.perf_counter()
+            if reconnect:
+                conn.close()
+                conn.ensure_connection()
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    def _requests(self, n):
+        # WSGIHandler asli, karena test Client melepas close_old_connections dari request_finished
+        handler = WSGIHandler()
+        environ = RequestFactory(SERVER_NAME="localhost").get(reverse("catalog:products_json")).environ
+        latencies = []
+        for i in range(n + 5):
+            start = time.perf_counter()
+            status = []
+            body = handler(dict(environ), lambda s, headers, exc_info=None: status.append(s))
+            for _ in body:
+                pass
+            body.close()
+            if i >= 5:  # warmup
+                latencies.append(time.perf_counter() - start)
+            if not status[0].startswith(("200", "304")):
+                self.stderr.write(f"unexpected status {status[0]}")
+        return latencies
+
+    def _report(self, label, latencies):
+        ms = sorted(t * 1000 for t in latencies)
+        self.stdout.write(
+            f"{label:<28} mean {statistics.fmean(ms):>7.3f} ms   p50 {percentile(ms, 50):>7.3f} ms   "
+            f"p99 {percentile(ms, 99):>7.3f} ms"
+        )
@@ -0,0 +1,82 @@
+import time
+import tracemalloc
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from catalog.models import Product
+from catalog.views import products_json
+
+MODES = {
+    "buffered": {},
+    "json": {"stream": "1"},
+    "ndjson": {"stream": "ndjson"},
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare peak traced Python allocations (tracemalloc, not process RSS) and time to "
+        "first byte of catalog products_json with and without streaming for growing row "
+        "counts. Synthetic rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=str, default="1000,10000,50000", help="Comma separated row counts")
+        parser.add_argument("--description-bytes", type=int, default=400)
+
+    def handle(self, *args, **opts):
+        try:
+            counts = sorted(int(n) for n in opts["rows"].split(",") if n.strip())
+        except ValueError:
+            raise CommandError("--rows must be a comma separated list of integers.")
+
+        try:
+            with transaction.atomic():
+                self._run(counts, opts["description_bytes"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, counts, description_bytes):
+        factory = RequestFactory()
+        description = ("Lorem ipsum dolor sit amet " * (description_bytes // 27 + 1))[:description_bytes]
+        existing = 0
+
+        self.stdout.write(f"{'rows':>8} {'mode':>9} {'tracemalloc peak MB':>20} {'first byte ms':>14} {'total ms':>9} {'MB out':>7}")
+        for count in counts:
+            Product.objects.bulk_create(
+                [
+                    Product(
+                        name=f"Bench product {i}", brand="Nike", category="Shoes", price=100_000 + i,
+                        stock=5, description=description, image=f"https://static.nike.com/{i}.png",
+                    )
+                    for i in range(existing, count)
+                ],
+                batch_size=2000,
+            )
+            existing = count
+
+            for mode, params in MODES.items():
+                request = factory.get("/catalog/json/", params)
+                tracemalloc.start()
+                start = time.perf_counter()
+                response = async_to_sync(products_json)(request)
+                chunks = iter(response.streaming_content if response.streaming else [response.content])
+                first = next(chunks, b"")
+                first_byte = time.perf_counter() - start
+                size = len(first) + sum(len(c) for c in chunks)
+                total = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f"{count:>8} {mode:>9} {peak / 1e6:>20.1f} {first_byte * 1000:>14.1f} "
+                    f"{total * 1000:>9.0f} {size / 1e6:>7.1f}"
+                )
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.synthetic import DEFAULT_PASSWORD, DEFAULT_SCALE, SYNTHETIC_PREFIX, generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic products (modelled on data/data.csv), users, reviews, wishlists, "
+        "carts, orders, invoices and reports for benchmarking. Data is committed."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SCALE.items():
+            parser.add_argument(f"--{name}", type=int, default=default)
+        parser.add_argument("--scale", type=float, default=1.0, help="Multiply every count by this factor")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password for every synthetic user")
+        parser.add_argument("--allow-production", action="store_true")
+
+    def handle(self, *args, **opts):
+        if getattr(settings, "PRODUCTION", False) and not opts["allow_production"]:
+            raise CommandError("Refusing to write synthetic data to production; pass --allow-production.")
+        scale = {name: int(opts[name] * opts["scale"]) for name in DEFAULT_SCALE}
+        if any(n < 0 for n in scale.values()):
+            raise CommandError("Counts must not be negative.")
+
+        counts = generate(scale, seed=opts["seed"], password=opts["password"], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            ", ".join(f"{n} {name}" for name, n in counts.items())
+            + f". Users are named {SYNTHETIC_PREFIX}<n> with password {opts['password']!r}."
+        ))
@@ -0,0 +1,146 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from catalog.models import Product
+from invoice.models import Invoice
+from main import benchmarks
+from main.synthetic import DEFAULT_PASSWORD, DEFAULT_SCALE, SYNTHETIC_PREFIX, generate
+from review.models import Review
+
+BENCH_DIR = settings.BASE_DIR / "bench"
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the main endpoints (latency percentiles, throughput, query counts), write the "
+        "results as JSON and fail when they regress against the stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--only", default="", help="Comma separated scenario names")
+        parser.add_argument("--base-url", help="Benchmark a running server (e.g. http://127.0.0.1:8000) instead of the test client")
+        parser.add_argument("--username", help="User for endpoints that need login (default: busiest synthetic user)")
+        parser.add_argument("--password", default=DEFAULT_PASSWORD)
+        parser.add_argument(
+            "--generate", type=int, metavar="PRODUCTS",
+            help="Generate synthetic data scaled to this many products first and roll it back afterwards "
+                 "(test client only)",
+        )
+        parser.add_argument("--output", default=str(BENCH_DIR / "results.json"))
+        parser.add_argument("--baseline", default=str(BENCH_DIR / "baseline.json"))
+        parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative p50 slowdown")
+
+    def handle(self, *args, **opts):
+        if opts["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        known = {name for name, *_ in benchmarks.SCENARIOS}
+        only = {n.strip() for n in opts["only"].split(",") if n.strip()}
+        if only - known:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(only - known))}")
+
+        if opts["generate"]:
+            if opts["base_url"]:
+                raise CommandError("--generate only works with the test client; run generate_synthetic_data first.")
+            try:
+                with transaction.atomic():
+                    factor = opts["generate"] / DEFAULT_SCALE["products"]
+                    generate({name: int(n * factor) for name, n in DEFAULT_SCALE.items()}, log=self.stdout.write)
+                    report = self._benchmark(opts, only)
+                    raise _Rollback
+            except _Rollback:
+                pass
+        else:
+            report = self._benchmark(opts, only)
+
+        self._write(Path(opts["output"]), report)
+        self._print(report["scenarios"])
+
+        baseline_path = Path(opts["baseline"])
+        if opts["save_baseline"]:
+            self._write(baseline_path, report)
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}"))
+            return
+        if not baseline_path.exists():
+            self.stdout.write(f"No baseline at {baseline_path}; run with --save-baseline to create one.")
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        regressions = benchmarks.compare(baseline["scenarios"], report["scenarios"], opts["tolerance"])
+        if regressions:
+            for line in regressions:
+                self.stderr.write(self.style.ERROR(f"REGRESSION {line}"))
+            raise CommandError(f"{len(regressions)} regression(s) against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline_path}"))
+
+    def _benchmark(self, opts, only):
+        product = (
+            Review.objects.values("product").annotate(n=Count("id")).order_by("-n")
+            .values_list("product", flat=True).first()
+            or Product.objects.values_list("pk", flat=True).first()
+        )
+        if opts["base_url"]:
+            transport = benchmarks.HttpTransport(opts["base_url"], opts["username"], opts["password"])
+        else:
+            transport = benchmarks.ClientTransport(self._user(opts["username"]))
+
+        scenarios = benchmarks.run(
+            transport, {"product": product}, opts["iterations"], opts["warmup"], only, log=self.stdout.write,
+        )
+        return {
+            "meta": {
+                "created": timezone.now().isoformat(),
+                "transport": transport.name,
+                "base_url": opts["base_url"],
+                "database": connection.vendor,
+                "iterations": opts["iterations"],
+                "warmup": opts["warmup"],
+                "rows": {
+                    "products": Product.objects.count(),
+                    "reviews": Review.objects.count(),
+                    "invoices": Invoice.objects.count(),
+                    "users": User.objects.count(),
+                },
+            },
+            "scenarios": scenarios,
+        }
+
+    def _user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User {username!r} does not exist.")
+        # User sintetis dengan isi cart dan invoice terbanyak
+        return (
+            User.objects.filter(username__startswith=SYNTHETIC_PREFIX)
+            .annotate(carts=Count("cartitem", distinct=True), invoices=Count("invoice", distinct=True))
+            .order_by("-carts", "-invoices", "pk").first()
+        )
+
+    def _write(self, path, report):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + "\n")
+
+    def _print(self, scenarios):
+        self.stdout.write(f"{'scenario':<18} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8} {'KB':>8} {'errors':>7}")
+        for name, r in scenarios.items():
+            lat = r["latency_ms"]
+            queries = "-" if r["queries"] is None else r["queries"]
+            self.stdout.write(
+                f"{name:<18} {lat['p50']:>8.1f} {lat['p90']:>8.1f} {lat['p99']:>8.1f} "
+                f"{r['throughput_rps']:>8.1f} {queries:>8} {r['bytes'] / 1024:>8.1f} {r['errors']:>7}"
+            )
@@ -0,0 +1,178 @@
+"""
+Statistik per endpoint: jumlah query DB, waktu DB, waktu total, dan ukuran
+response, dikelompokkan per nama URL (mis. `catalog:products_filtered_json`).
+
+Setiap metrik disimpan di histogram dengan bucket tetap, jadi memori per
+endpoint konstan berapa pun jumlah request. Persentil dihitung dari bucket
+(interpolasi linear di dalam bucket), cukup akurat untuk melihat endpoint
+mana yang lambat atau boros query. Data hanya ada di memori proses ini
+(per worker), sama seperti cart.cache.cache_stats.
+"""
+import bisect
+import threading
+import time
+
+# Batas atas bucket; nilai di atas bucket terakhir masuk bucket +Inf
+TIME_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+METRICS = {
+    # nama: (bucket, nama metrik Prometheus, pembagi ke satuan Prometheus)
+    "total_ms": (TIME_BUCKETS_MS, "hoophub_request_duration_seconds", 1000),
+    "db_ms": (TIME_BUCKETS_MS, "hoophub_request_db_seconds", 1000),
+    "queries": (QUERY_BUCKETS, "hoophub_request_db_queries", 1),
+    "bytes": (SIZE_BUCKETS, "hoophub_response_size_bytes", 1),
+}
+PERCENTILES = (50, 90, 99)
+# Batas jumlah endpoint yang dilacak; sisanya digabung ke OTHER
+MAX_ENDPOINTS = 500
+OTHER = "<other>"
+UNRESOLVED = "<unresolved>"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = self.count * p / 100
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i else 0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                upper = min(upper, self.max)
+                return round(lower + (upper - lower) * (rank - seen) / n, 3)
+            seen += n
+        return round(self.max, 3)
+
+    def summary(self):
+        data = {
+            "mean": round(self.sum / self.count, 3) if self.count else None,
+            "max": round(self.max, 3),
+        }
+        for p in PERCENTILES:
+            data[f"p{p}"] = self.percentile(p)
+        return data
+
+
+class EndpointStats:
+    __slots__ = ("requests", "errors", "histograms")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.histograms = {name: Histogram(bounds) for name, (bounds, _, _) in METRICS.items()}
+
+
+class QueryTimer:
+    """Dipasang lewat connection.execute_wrapper untuk menghitung query dan waktunya."""
+
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+class Registry:
+    def __init__(self, max_endpoints=MAX_ENDPOINTS):
+        self.max_endpoints = max_endpoints
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, status, total_ms, db_ms, queries, size):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                if len(self._endpoints) >= self.max_endpoints:
+                    endpoint = OTHER
+                stats = self._endpoints.setdefault(endpoint, EndpointStats())
+            stats.requests += 1
+            if status >= 500:
+                stats.errors += 1
+            h = stats.histograms
+            h["total_ms"].observe(total_ms)
+            h["db_ms"].observe(db_ms)
+            h["queries"].observe(queries)
+            if size is not None:
+                h["bytes"].observe(size)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    **{name: h.summary() for name, h in stats.histograms.items()},
+                }
+                for endpoint, stats in sorted(self._endpoints.items())
+            }
+
+    def prometheus(self):
+        """Format teks eksposisi Prometheus (histogram kumulatif per endpoint)."""
+        lines = []
+        with self._lock:
+            items = sorted(self._endpoints.items())
+            lines.append("# TYPE hoophub_requests_total counter")
+            for endpoint, stats in items:
+                lines.append(f'hoophub_requests_total{{endpoint="{_escape(endpoint)}"}} {stats.requests}')
+            lines.append("# TYPE hoophub_request_errors_total counter")
+            for endpoint, stats in items:
+                lines.append(f'hoophub_request_errors_total{{endpoint="{_escape(endpoint)}"}} {stats.errors}')
+            for name, (bounds, metric, scale) in METRICS.items():
+                lines.append(f"# TYPE {metric} histogram")
+                for endpoint, stats in items:
+                    h = stats.histograms[name]
+                    label = f'endpoint="{_escape(endpoint)}"'
+                    cumulative = 0
+                    for bound, n in zip(bounds, h.counts):
+                        cumulative += n
+                        lines.append(f'{metric}_bucket{{{label},le="{_number(bound / scale)}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {h.count}')
+                    lines.append(f"{metric}_sum{{{label}}} {_number(h.sum / scale)}")
+                    lines.append(f"{metric}_count{{{label}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return format(value, "g") if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+
+def server_timing(total_ms, db_ms, queries):
+    return f'db;dur={db_ms:.1f};desc="{queries} queries", total;dur={total_ms:.1f}'
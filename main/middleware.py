@@ -0,0 +1,181 @@
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from main.metrics import UNRESOLVED, QueryTimer, registry, server_timing
+
+DEFAULT_SAMPLE_RATE = 1.0
+
+
+# Timer request yang sedang berjalan. sync_to_async menyalin context ke
+# thread ORM, jadi query dari request async yang saling tumpang tindih
+# tetap masuk ke timer request masing-masing.
+_current_timer = ContextVar("metrics_query_timer", default=None)
+
+
+def _dispatch(execute, sql, params, many, context):
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def _install_wrappers():
+    """
+    Pasang _dispatch sekali di setiap koneksi thread ini. Wrapper tidak
+    pernah dilepas: execute_wrapper() melepas wrapper terakhir di list, bukan
+    miliknya sendiri, sehingga tidak aman dipakai bergantian oleh request
+    async yang berbagi koneksi. Di jalur async harus dipanggil lewat
+    sync_to_async, karena koneksi database bersifat per thread.
+    """
+    for conn in connections.all():
+        if _dispatch not in conn.execute_wrappers:
+            # Di depan, supaya pop() dari execute_wrapper() lain tidak mengenainya
+            conn.execute_wrappers.insert(0, _dispatch)
+
+
+def _sampled():
+    rate = getattr(settings, "METRICS_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+class MetricsMiddleware:
+    """
+    Catat jumlah query, waktu DB, waktu total dan ukuran response per
+    endpoint (main.metrics) untuk sebagian request (METRICS_SAMPLE_RATE,
+    0 = mati), dan kirim header Server-Timing pada request yang disampel.
+    Request yang tidak disampel hanya membayar satu perbandingan angka.
+
+    Untuk StreamingHttpResponse, query dan byte yang dihasilkan selama body
+    dikirim ikut dihitung; pencatatan terjadi setelah stream selesai, jadi
+    Server-Timing-nya hanya mencakup waktu sampai header dikirim.
+
+    Mendukung sync dan async, supaya view async di bawah ASGI tidak
+    dipaksa berjalan di thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not _sampled():
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+        _install_wrappers()
+        token = _current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        return self._finish(request, response, timer, start)
+
+    async def __acall__(self, request):
+        if not _sampled():
+            return await self.get_response(request)
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+        await sync_to_async(_install_wrappers)()
+        token = _current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        return self._finish(request, response, timer, start)
+
+    def _finish(self, request, response, timer, start):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        endpoint = request.resolver_match.view_name if request.resolver_match else UNRESOLVED
+        response["Server-Timing"] = server_timing(elapsed_ms, timer.seconds * 1000, timer.queries)
+
+        if response.streaming and not isinstance(response, FileResponse):
+            measure = self._ameasure_stream if response.is_async else self._measure_stream
+            response.streaming_content = measure(response.streaming_content, endpoint, response.status_code, start, timer)
+            return response
+
+        if not response.streaming:
+            size = len(response.content)
+        else:
+            # FileResponse dibiarkan apa adanya supaya tetap bisa dikirim lewat wsgi.file_wrapper
+            size = int(response["Content-Length"]) if response.has_header("Content-Length") else None
+        registry.record(endpoint, response.status_code, elapsed_ms, timer.seconds * 1000, timer.queries, size)
+        return response
+
+    def _measure_stream(self, content, endpoint, status, start, timer):
+        size = 0
+        _install_wrappers()
+        # Body bisa diiterasi di context lain, jadi timer dilepas dengan set(None)
+        _current_timer.set(timer)
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            _current_timer.set(None)
+            registry.record(
+                endpoint, status, (time.perf_counter() - start) * 1000,
+                timer.seconds * 1000, timer.queries, size,
+            )
+
+    async def _ameasure_stream(self, content, endpoint, status, start, timer):
+        size = 0
+        await sync_to_async(_install_wrappers)()
+        _current_timer.set(timer)
+        try:
+            async for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            _current_timer.set(None)
+            registry.record(
+                endpoint, status, (time.perf_counter() - start) * 1000,
+                timer.seconds * 1000, timer.queries, size,
+            )
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware yang juga bisa dipakai di rantai async. WhiteNoise
+    sendiri hanya sync; tanpa pembungkus ini Django menjalankan semua view
+    async lewat thread di bawah ASGI. Pencarian file statis hanya lookup
+    dict (atau stat file kalau autorefresh), jadi aman dari event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,124 @@
+"""
+Response JSON yang dikirim bertahap untuk endpoint list yang besar.
+
+Client memilih mode streaming lewat `?stream=1` (JSON array) atau
+`?stream=ndjson` / header `Accept: application/x-ndjson` (satu objek JSON
+per baris). QuerySet dibaca dengan `.iterator(chunk_size=...)`, jadi memori
+yang dipakai sebanding dengan ukuran chunk, bukan jumlah baris, dan byte
+pertama sudah terkirim sebelum seluruh tabel selesai dibaca.
+
+View async memakai astreaming_json_response: di bawah ASGI baris dibaca
+dengan `.aiterator()` dan body berupa async iterator; di bawah WSGI tetap
+iterator biasa, karena Django akan menampung seluruh async iterator ke
+list dulu sebelum mengirimnya ke server WSGI.
+"""
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+DEFAULT_CHUNK_SIZE = 500
+# Jumlah objek yang digabung per potongan yang di-yield ke server
+OBJECTS_PER_WRITE = 100
+
+
+def stream_format(request):
+    """"json" / "ndjson" kalau client meminta streaming, None kalau tidak."""
+    flag = request.GET.get("stream", "").lower()
+    if flag == "ndjson" or NDJSON_CONTENT_TYPE in request.headers.get("Accept", ""):
+        return "ndjson"
+    if flag in ("1", "true", "json"):
+        return "json"
+    return None
+
+
+def is_asgi_request(request):
+    return isinstance(request, ASGIRequest)
+
+
+class _JsonWriter:
+    """Gabungkan objek JSON menjadi potongan berisi OBJECTS_PER_WRITE objek."""
+
+    def __init__(self, to_dict, fmt):
+        self.encode = DjangoJSONEncoder().encode
+        self.to_dict = to_dict
+        self.fmt = fmt
+        self.buffer = []
+        self.first = True
+
+    def start(self):
+        return "[" if self.fmt == "json" else ""
+
+    def add(self, row):
+        """Tambah satu baris; kembalikan potongan kalau buffer sudah penuh."""
+        data = self.encode(self.to_dict(row) if self.to_dict else row)
+        if self.fmt == "ndjson":
+            self.buffer.append(data + "\n")
+        else:
+            self.buffer.append(data if self.first else "," + data)
+        self.first = False
+        if len(self.buffer) >= OBJECTS_PER_WRITE:
+            return self.flush()
+        return None
+
+    def flush(self):
+        chunk = "".join(self.buffer)
+        self.buffer = []
+        return chunk
+
+    def end(self):
+        return self.flush() + ("]" if self.fmt == "json" else "")
+
+
+def iter_json(rows, to_dict=None, fmt="json"):
+    writer = _JsonWriter(to_dict, fmt)
+    head = writer.start()
+    if head:
+        yield head
+    for row in rows:
+        chunk = writer.add(row)
+        if chunk:
+            yield chunk
+    tail = writer.end()
+    if tail:
+        yield tail
+
+
+async def aiter_json(rows, to_dict=None, fmt="json"):
+    writer = _JsonWriter(to_dict, fmt)
+    head = writer.start()
+    if head:
+        yield head
+    async for row in rows:
+        chunk = writer.add(row)
+        if chunk:
+            yield chunk
+    tail = writer.end()
+    if tail:
+        yield tail
+
+
+def streaming_json_response(rows, to_dict=None, fmt="json", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    StreamingHttpResponse dari QuerySet (atau iterable biasa). `to_dict`
+    mengubah setiap baris menjadi objek JSON; tanpa `to_dict` baris dipakai
+    apa adanya (misalnya hasil `.values()`).
+    """
+    if hasattr(rows, "iterator"):
+        rows = rows.iterator(chunk_size=chunk_size)
+    return _response(iter_json(rows, to_dict, fmt), fmt)
+
+
+def astreaming_json_response(request, rows, to_dict=None, fmt="json", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Versi untuk view async; `rows` harus QuerySet. Lihat docstring modul."""
+    if not is_asgi_request(request):
+        return streaming_json_response(rows, to_dict, fmt, chunk_size)
+    return _response(aiter_json(rows.aiterator(chunk_size=chunk_size), to_dict, fmt), fmt)
+
+
+def _response(content, fmt):
+    content_type = NDJSON_CONTENT_TYPE if fmt == "ndjson" else "application/json"
+    response = StreamingHttpResponse(content, content_type=content_type)
+    # Jangan ditampung dulu oleh proxy (nginx) supaya byte pertama cepat sampai
+    response["X-Accel-Buffering"] = "no"
+    return response
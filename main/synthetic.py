@@ -0,0 +1,262 @@
+"""
+Data sintetis untuk benchmark, dengan skala yang bisa diatur.
+
+Produk dibuat dari contoh di data/data.csv (nama, brand, kategori,
+deskripsi, gambar) dengan variasi warna, harga, stok dan tanggal rilis.
+Popularitas produk mengikuti distribusi Zipf, jadi sebagian kecil produk
+mendapat sebagian besar review, wishlist, cart dan order, seperti di toko
+sungguhan. Semua user sintetis memakai prefix SYNTHETIC_PREFIX dan password
+yang sama supaya benchmark bisa login.
+
+Semua baris ditulis dengan bulk_create. Tanggal order/invoice disebar ke
+belakang (DAYS_OF_HISTORY hari) supaya riwayat invoice dan filter tanggal
+punya data yang realistis; nomor invoice dipesan dari InvoiceSequence
+sehingga tidak bentrok dengan nomor yang dibuat checkout.
+"""
+import datetime
+import itertools
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from analytics.rollup import record_orders
+from cart.models import CartItem, Order, OrderItem
+from catalog.cache import bump_catalog_version
+from catalog.csv_parsing import parse_chunk, read_header
+from catalog.models import Product
+from catalog.ratings import rebuild_ratings
+from invoice.models import Invoice
+from invoice.utils import format_invoice_no, reserve_range
+from report.models import Report
+from review.models import Review
+from wishlist.models import Wishlist
+
+SAMPLE_CSV = settings.BASE_DIR / "data" / "data.csv"
+SYNTHETIC_PREFIX = "synth_"
+DEFAULT_PASSWORD = "synthetic-pass-123"
+DAYS_OF_HISTORY = 365
+BATCH_SIZE = 1000
+
+DEFAULT_SCALE = {
+    "products": 1000,
+    "users": 200,
+    "reviews": 5000,
+    "wishlists": 2000,
+    "carts": 100,
+    "orders": 1000,
+    "reports": 200,
+}
+
+COLORWAYS = (
+    "Black/White", "White/University Red", "Royal Blue", "Volt", "Triple Black",
+    "Sail/Gum", "Midnight Navy", "Infrared", "Team Orange", "Cool Grey",
+)
+REVIEW_TEXTS = (
+    "Nyaman dipakai main.", "Sesuai deskripsi.", "Ukurannya pas.", "Pengiriman cepat.",
+    "Kualitas bagus untuk harganya.", "Agak kebesaran.", "Warnanya sedikit beda dari foto.",
+    "Grip-nya mantap di lapangan indoor.", "", "Recommended!",
+)
+REPORT_TITLES = ("Harga tidak sesuai", "Gambar salah", "Review spam", "Produk palsu", "Deskripsi menyesatkan")
+RATING_WEIGHTS = (5, 7, 18, 35, 35)  # rating 1..5
+ORDER_STATUS_WEIGHTS = {"Pending": 10, "Paid": 30, "Shipped": 55, "Cancelled": 5}
+REPORT_STATUS_WEIGHTS = {"pending": 60, "resolved": 30, "rejected": 10}
+
+
+def load_templates(path=SAMPLE_CSV):
+    """Baris valid dari CSV contoh (sudah dibersihkan oleh catalog.csv_parsing)."""
+    fieldnames, offset = read_header(path)
+    rows, _ = parse_chunk(path, offset, path.stat().st_size, 2, fieldnames)
+    if not rows:
+        raise ValueError(f"No usable rows in {path}")
+    return rows
+
+
+class _Popularity:
+    """Pilih id secara acak dengan bobot Zipf (id di depan lebih populer)."""
+
+    def __init__(self, rng, ids, exponent=1.0):
+        self.rng = rng
+        self.ids = list(ids)
+        rng.shuffle(self.ids)
+        self.cum_weights = list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(len(self.ids))))
+
+    def pick(self, k=1):
+        return self.rng.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+    def pick_distinct(self, k):
+        chosen = set()
+        while len(chosen) < min(k, len(self.ids)):
+            chosen.update(self.pick(k - len(chosen)))
+        return list(chosen)
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _past(rng, now):
+    return now - datetime.timedelta(days=rng.random() * DAYS_OF_HISTORY)
+
+
+def _backdate(model, objs, field, dates):
+    """
+    Field auto_now_add selalu diisi "sekarang" oleh bulk_create, jadi
+    tanggal yang disebar ditulis ulang setelahnya dengan bulk_update.
+    """
+    for obj, value in zip(objs, dates):
+        setattr(obj, field, value)
+    model.objects.bulk_update(objs, [field], batch_size=BATCH_SIZE)
+
+
+def make_products(rng, templates, count):
+    products = []
+    for _ in range(count):
+        t = rng.choice(templates)
+        stock = 0 if rng.random() < 0.1 else rng.randint(1, 200)
+        release = t["release_date"] or datetime.date(2024, 1, 1)
+        products.append(Product(
+            name=f"{t['name']} ({rng.choice(COLORWAYS)})"[:300],
+            brand=t["brand"],
+            category=t["category"],
+            description=t["description"],
+            image=t["image"],
+            price=max(1000, int(round(t["price"] * rng.uniform(0.8, 1.25), -3))),
+            stock=stock,
+            is_available=stock > 0,
+            release_date=release + datetime.timedelta(days=rng.randint(-400, 400)),
+        ))
+    return Product.objects.bulk_create(products, batch_size=BATCH_SIZE)
+
+
+def make_users(count, password):
+    start = User.objects.filter(username__startswith=SYNTHETIC_PREFIX).count()
+    hashed = make_password(password)  # hash sekali, dipakai semua user
+    users = [
+        User(username=f"{SYNTHETIC_PREFIX}{i}", password=hashed, email=f"{SYNTHETIC_PREFIX}{i}@example.com")
+        for i in range(start, start + count)
+    ]
+    return User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+
+
+def make_reviews(rng, users, popular, count):
+    reviews = [
+        Review(
+            user=rng.choice(users), product_id=product_id,
+            rating=rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0],
+            review=rng.choice(REVIEW_TEXTS),
+        )
+        for product_id in popular.pick(count)
+    ]
+    Review.objects.bulk_create(reviews, batch_size=BATCH_SIZE)
+    return len(reviews)
+
+
+def make_wishlists(rng, users, popular, count):
+    pairs = {(rng.choice(users).pk, product_id) for product_id in popular.pick(count)}
+    Wishlist.objects.bulk_create(
+        [Wishlist(user_id=u, product_id=p) for u, p in pairs], batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+    return len(pairs)
+
+
+def make_carts(rng, users, popular, count):
+    items = []
+    for user in rng.sample(users, min(count, len(users))):
+        for product_id in popular.pick_distinct(rng.randint(1, 5)):
+            items.append(CartItem(user=user, product_id=product_id, quantity=rng.randint(1, 3)))
+    CartItem.objects.bulk_create(items, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(items)
+
+
+def make_orders(rng, users, popular, prices, count, now):
+    orders, items = [], []
+    dates = sorted(_past(rng, now) for _ in range(count))
+    for _ in range(count):
+        user = rng.choice(users)
+        order = Order(
+            user=user, full_name=user.username, address="Jl. Margonda Raya 100", city="Depok",
+            postal_code="16424", total_price=0, status=_weighted(rng, ORDER_STATUS_WEIGHTS),
+        )
+        for product_id in popular.pick_distinct(rng.randint(1, 4)):
+            quantity = rng.randint(1, 3)
+            price = int(prices[product_id])
+            order.total_price += price * quantity
+            items.append(OrderItem(order=order, product_id=product_id, quantity=quantity, price_at_checkout=price))
+        orders.append(order)
+
+    Order.objects.bulk_create(orders, batch_size=BATCH_SIZE)
+    _backdate(Order, orders, "created_at", dates)
+    OrderItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+    # Rollup analytics untuk dashboard, sama seperti checkout
+    for start in range(0, len(orders), BATCH_SIZE):
+        record_orders(orders[start:start + BATCH_SIZE])
+
+    # Nomor invoice dipesan per hari dari InvoiceSequence, sama seperti checkout
+    days = [timezone.localdate(date) for date in dates]
+    next_value = {day: reserve_range(day, n) for day, n in Counter(days).items()}
+    invoices = []
+    for order, day in zip(orders, days):
+        invoices.append(Invoice(user=order.user, order=order, invoice_no=format_invoice_no(day, next_value[day])))
+        next_value[day] += 1
+    Invoice.objects.bulk_create(invoices, batch_size=BATCH_SIZE)
+    _backdate(Invoice, invoices, "date", dates)
+    return len(orders), len(items)
+
+
+def make_reports(rng, users, popular, count, now):
+    reports = []
+    for product_id in popular.pick(count):
+        reporter = rng.choice(users)
+        report_type = rng.choice(["product", "review"])
+        reports.append(Report(
+            reporter=reporter,
+            reported_product_id=product_id,
+            reported_user=rng.choice(users) if report_type == "review" else None,
+            report_type=report_type,
+            status=_weighted(rng, REPORT_STATUS_WEIGHTS),
+            title=rng.choice(REPORT_TITLES),
+            description="Dibuat oleh generator data sintetis.",
+        ))
+    Report.objects.bulk_create(reports, batch_size=BATCH_SIZE)
+    _backdate(Report, reports, "created_at", [_past(rng, now) for _ in reports])
+    return len(reports)
+
+
+def generate(scale=None, seed=42, password=DEFAULT_PASSWORD, templates=None, log=None):
+    """
+    Buat data sintetis sesuai `scale` (lihat DEFAULT_SCALE) dalam satu
+    transaksi dan kembalikan jumlah baris per jenis data.
+    """
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    rng = random.Random(seed)
+    templates = templates or load_templates()
+    now = timezone.now()
+    log = log or (lambda message: None)
+    counts = {}
+
+    with transaction.atomic():
+        products = make_products(rng, templates, scale["products"])
+        counts["products"] = len(products)
+        log(f"products: {counts['products']}")
+        users = make_users(max(1, scale["users"]), password)
+        counts["users"] = len(users)
+        log(f"users: {counts['users']}")
+
+        if products:
+            popular = _Popularity(rng, [p.pk for p in products])
+            prices = {p.pk: p.price for p in products}
+            counts["reviews"] = make_reviews(rng, users, popular, scale["reviews"])
+            counts["wishlists"] = make_wishlists(rng, users, popular, scale["wishlists"])
+            counts["cart_items"] = make_carts(rng, users, popular, scale["carts"])
+            counts["orders"], counts["order_items"] = make_orders(rng, users, popular, prices, scale["orders"], now)
+            counts["reports"] = make_reports(rng, users, popular, scale["reports"], now)
+            for name in ("reviews", "wishlists", "cart_items", "orders", "reports"):
+                log(f"{name}: {counts[name]}")
+            rebuild_ratings()
+        bump_catalog_version()
+    return counts
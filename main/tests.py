@@ -1,7 +1,37 @@
-from django.test import TestCase, Client
+import asyncio
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from unittest import mock, skipUnless
+
+import httpx
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from cart.models import CartItem, Order
+from catalog.models import Product
+from invoice.models import Invoice
+from main import image_proxy
+from main import benchmarks
+from main.middleware import MetricsMiddleware
+from main.metrics import OTHER, Histogram, Registry, registry
+from main.synthetic import SYNTHETIC_PREFIX, generate
+from report.models import Report
+from review.models import Review
+from main.streaming import iter_json, stream_format
+from django.test import RequestFactory
+from hoophub import db
+import json
+import re
+
 # Create your tests here.
 class MainTest(TestCase):
     def test_main_url_is_exist(self):
@@ -14,4 +44,423 @@ class MainTest(TestCase):
 
     def test_nonexistent_page(self):
         response = Client().get('/burhan_always_exists/')
-        self.assertEqual(response.status_code, 404)
\ No newline at end of file
+        self.assertEqual(response.status_code, 404)
+
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"x" * 2048
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        if self.path.startswith("/redirect-out"):
+            # "localhost" tidak ada di allowlist test (hanya 127.0.0.1)
+            self._redirect(f"http://localhost:{self.server.server_port}/secret.png")
+        elif self.path.startswith("/redirect-in"):
+            self._redirect("/moved.png")
+        elif self.path.startswith("/big"):
+            self._send(200, "image/png", b"x" * 4096)
+        elif self.path.startswith("/text"):
+            self._send(200, "text/html", b"<html></html>")
+        elif self.path.startswith("/missing"):
+            self._send(404, "text/html", b"not found" * 100)
+        elif self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self._send(200, "image/png", PNG + self.path.encode(), etag='"v1"')
+
+    def _redirect(self, location):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send(self, status, content_type, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageProxyTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        _ImageHandler.hits = []
+        overrides = override_settings(
+            IMAGE_PROXY_ALLOWED_HOSTS=["127.0.0.1"],
+            IMAGE_PROXY_CACHE_DIR=self.cache_dir,
+            IMAGE_PROXY_MAX_IMAGE_BYTES=3000,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        image_proxy.clear_cache_state()
+        self.addCleanup(image_proxy.clear_cache_state)
+
+    def fetch(self, path, name="review:proxy_image"):
+        response = self.client.get(reverse(name), {"url": self.base + path})
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_miss_then_hit(self):
+        response, body = self.fetch("/shoe.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertTrue(body.startswith(PNG))
+
+        response, cached = self.fetch("/shoe.png")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(cached, body)
+        self.assertEqual(len(_ImageHandler.hits), 1)
+
+    def test_expired_entry_is_revalidated(self):
+        self.fetch("/shoe.png")
+        with self.settings(IMAGE_PROXY_TTL=0):
+            response, body = self.fetch("/shoe.png")
+        self.assertEqual(response["X-Cache"], "REVALIDATED")
+        self.assertTrue(body.startswith(PNG))
+        self.assertEqual(len(_ImageHandler.hits), 2)
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.client.get(reverse("review:proxy_image")).status_code, 400)
+        response = self.client.get(reverse("review:proxy_image"), {"url": "http://example.com/a.png"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.fetch("/big.png")[0].status_code, 413)
+        self.assertEqual(self.fetch("/text")[0].status_code, 415)
+
+    def test_redirects_are_checked_against_allowlist(self):
+        response, body = self.fetch("/redirect-out.png")
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn("/secret.png", _ImageHandler.hits)
+
+        response, body = self.fetch("/redirect-in.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(body.startswith(PNG + b"/moved.png"))
+
+    def test_failed_upstream_is_closed(self):
+        opened = []
+        real_fetch, real_afetch = image_proxy.fetch, image_proxy.afetch
+
+        def fetch(url, headers=None):
+            opened.append(real_fetch(url, headers))
+            return opened[-1]
+
+        async def afetch(url, headers=None):
+            opened.append(await real_afetch(url, headers))
+            return opened[-1]
+
+        with mock.patch.object(image_proxy, "fetch", fetch), mock.patch.object(image_proxy, "afetch", afetch):
+            response, _ = self.fetch("/missing.png")
+        self.assertEqual(response.status_code, 500)
+        # Koneksi dikembalikan ke pool, bukan dibiarkan menggantung
+        upstream, = opened
+        self.assertTrue(upstream.is_closed if isinstance(upstream, httpx.Response) else upstream.raw.closed)
+
+    def test_cache_is_bounded(self):
+        size = len(PNG) + len("/a.png")
+        with self.settings(IMAGE_PROXY_CACHE_MAX_BYTES=size * 2):
+            for name in ("/a.png", "/b.png", "/c.png"):
+                self.fetch(name)
+        # Entry tertua dibuang, yang terbaru masih di cache
+        self.assertEqual(self.fetch("/c.png")[0]["X-Cache"], "HIT")
+        self.assertEqual(self.fetch("/a.png")[0]["X-Cache"], "MISS")
+
+    def test_all_apps_share_the_cache(self):
+        self.fetch("/shoe.png", "review:proxy_image")
+        for name in ("report:proxy_image", "wishlist:proxy_image"):
+            self.assertEqual(self.fetch("/shoe.png", name)[0]["X-Cache"], "HIT")
+        self.assertEqual(len(_ImageHandler.hits), 1)
+
+
+class AsyncImageProxyTest(ImageProxyTest):
+    """Skenario yang sama lewat jalur ASGI (AsyncClient -> aproxy_image -> httpx)."""
+
+    def fetch(self, path, name="review:proxy_image"):
+        return async_to_sync(self._afetch)(path, name)
+
+    async def _afetch(self, path, name):
+        response = await self.async_client.get(reverse(name), {"url": self.base + path})
+        if not response.streaming:
+            return response, response.content
+        return response, b"".join([chunk async for chunk in response])
+
+    def test_upstream_error_without_cache(self):
+        # Port 9 (discard) tidak melayani HTTP, koneksi ditolak
+        response = async_to_sync(self.async_client.get)(
+            reverse("review:proxy_image"), {"url": "http://127.0.0.1:9/nothing.png"},
+        )
+        self.assertEqual(response.status_code, 500)
+
+
+class StreamingJsonTest(TestCase):
+    def test_stream_format(self):
+        factory = RequestFactory()
+        self.assertIsNone(stream_format(factory.get("/")))
+        self.assertEqual(stream_format(factory.get("/", {"stream": "1"})), "json")
+        self.assertEqual(stream_format(factory.get("/", {"stream": "ndjson"})), "ndjson")
+        self.assertEqual(stream_format(factory.get("/", HTTP_ACCEPT="application/x-ndjson")), "ndjson")
+
+    def test_iter_json_formats(self):
+        rows = [{"id": i} for i in range(250)]
+        self.assertEqual(json.loads("".join(iter_json(rows))), rows)
+        self.assertEqual(json.loads("".join(iter_json([]))), [])
+        lines = "".join(iter_json(rows, fmt="ndjson")).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], rows)
+        # Objek digabung per potongan, bukan satu yield per baris
+        self.assertLess(len(list(iter_json(rows))), 10)
+
+    def test_to_dict_is_applied(self):
+        out = "".join(iter_json(range(3), to_dict=lambda n: {"n": n * 2}))
+        self.assertEqual(json.loads(out), [{"n": 0}, {"n": 2}, {"n": 4}])
+
+
+@skipUnless(connection.vendor == "sqlite", "Rencana query (EXPLAIN QUERY PLAN) khusus SQLite")
+class QueryPlanTest(TestCase):
+    """Pastikan query utama endpoint memakai index, bukan full scan."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="planner", password="pw")
+        self.client.force_login(self.user)
+        self.product = Product.objects.create(name="Jordan", brand="Nike", category="Shoes", price=1500000, stock=5)
+        Review.objects.create(user=self.user, product=self.product, rating=5, review="ok")
+        Report.objects.create(reporter=self.user, title="t", report_type="product", reported_product=self.product)
+        order = Order.objects.create(user=self.user, full_name="A", address="B", city="C", postal_code="1", total_price=1)
+        Invoice.objects.create(user=self.user, order=order, invoice_no="INV-PLAN-1")
+        CartItem.objects.create(user=self.user, product=self.product)
+
+    def plans(self, table, url, method="get"):
+        """Detail EXPLAIN QUERY PLAN untuk setiap query ber-WHERE/ORDER BY ke `table`."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url)
+        self.assertLess(response.status_code, 400)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                sql = query["sql"]
+                if not sql.startswith("SELECT") or f'FROM "{table}"' not in sql:
+                    continue
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                plans.append(" | ".join(row[-1] for row in cursor.fetchall()))
+        self.assertTrue(plans, f"tidak ada query ke {table}")
+        return plans
+
+    def assertUsesIndex(self, table, url, index, method="get"):
+        plans = self.plans(table, url, method)
+        self.assertTrue(any(index in plan for plan in plans), plans)
+        # "SCAN tabel USING INDEX" (scan berurutan lewat index untuk ORDER BY + LIMIT) masih wajar,
+        # yang tidak boleh adalah full table scan
+        self.assertFalse(any(re.search(rf"SCAN {table}(?! USING)", plan) for plan in plans), plans)
+
+    def test_product_filters(self):
+        url = reverse("catalog:products_filtered_json") + "?category=Shoes&max_price=2000000"
+        self.assertUsesIndex("catalog_product", url, "product_avail_cat_price_idx")
+
+    def test_product_page_sorted_by_price(self):
+        url = reverse("catalog:products_page_json") + "?sort=price"
+        self.assertUsesIndex("catalog_product", url, "product_avail_price_idx")
+
+    def test_product_reviews(self):
+        url = reverse("catalog:get_reviews", args=[self.product.pk])
+        self.assertUsesIndex("review_review", url, "review_product_date_idx")
+
+    def test_my_reviews(self):
+        self.assertUsesIndex("review_review", reverse("review:show_json_flutter"), "review_user_date_idx")
+
+    def test_my_reports(self):
+        self.assertUsesIndex("report_report", reverse("report:show_my_json_flutter"), "report_reporter_created_idx")
+
+    def test_invoice_history(self):
+        self.assertUsesIndex("invoice_invoice", reverse("invoice:show_invoice_json_flutter"), "invoice_user_date_idx")
+
+    def test_add_to_cart_uses_unique_index(self):
+        url = reverse("cart:add_to_cart_flutter", args=[self.product.pk])
+        # Index dari UniqueConstraint (user, product); namanya dibuat SQLite sendiri
+        self.assertUsesIndex("cart_cartitem", url, "(user_id=? AND product_id=?)", method="post")
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        Product.objects.create(name="Jordan", brand="Nike", category="Shoes", price=1500000, stock=5)
+        self.staff = get_user_model().objects.create_user(username="ops", password="pw", is_staff=True)
+
+    def test_histogram_percentiles(self):
+        h = Histogram((10, 20, 50))
+        for value in [5] * 50 + [15] * 40 + [40] * 10:
+            h.observe(value)
+        summary = h.summary()
+        self.assertEqual(summary["max"], 40)
+        self.assertEqual(summary["p50"], 10)
+        self.assertTrue(10 < summary["p90"] <= 20)
+        self.assertTrue(20 < summary["p99"] <= 40)
+        self.assertIsNone(Histogram((1,)).percentile(50))
+
+    def test_registry_is_bounded(self):
+        reg = Registry(max_endpoints=2)
+        for name in ("a", "b", "c", "d"):
+            reg.record(name, 200, 1, 0, 0, 10)
+        self.assertEqual(set(reg.snapshot()), {"a", "b", OTHER})
+        self.assertEqual(reg.snapshot()[OTHER]["requests"], 2)
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_request_is_recorded_per_url_name(self):
+        response = self.client.get(reverse("catalog:products_filtered_json") + "?category=Shoes")
+        self.assertIn('desc="', response["Server-Timing"])
+        stats = registry.snapshot()["catalog:products_filtered_json"]
+        self.assertEqual(stats["requests"], 1)
+        self.assertGreaterEqual(stats["queries"]["max"], 1)
+        self.assertEqual(stats["bytes"]["max"], len(response.content))
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_streaming_response_is_recorded_after_body(self):
+        response = self.client.get(reverse("catalog:products_json") + "?stream=1")
+        self.assertNotIn("catalog:products_json", registry.snapshot())
+        body = b"".join(response.streaming_content)
+        stats = registry.snapshot()["catalog:products_json"]
+        self.assertEqual(stats["bytes"]["max"], len(body))
+        self.assertGreaterEqual(stats["queries"]["max"], 1)
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    async def test_async_request_counts_queries(self):
+        response = await self.async_client.get(reverse("catalog:products_json"), {"stream": "ndjson"})
+        body = b"".join([chunk async for chunk in response])
+        stats = registry.snapshot()["catalog:products_json"]
+        self.assertEqual(stats["bytes"]["max"], len(body))
+        # Query aiterator berjalan di thread ORM, tetap terhitung
+        self.assertGreaterEqual(stats["queries"]["max"], 1)
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    async def test_overlapping_async_requests_count_own_queries(self):
+        async def view(request):
+            for _ in range(int(request.GET["n"])):
+                await Product.objects.acount()
+                await asyncio.sleep(0)
+            return HttpResponse("ok")
+
+        middleware = MetricsMiddleware(view)
+        factory = RequestFactory()
+        responses = await asyncio.gather(*[middleware(factory.get("/", {"n": n})) for n in (1, 4, 2)])
+        counts = [re.search(r'desc="(\d+) queries"', r["Server-Timing"]).group(1) for r in responses]
+        self.assertEqual(counts, ["1", "4", "2"])
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sampling_off_records_nothing(self):
+        response = self.client.get(reverse("catalog:products_filtered_json"))
+        self.assertFalse(response.has_header("Server-Timing"))
+        self.assertEqual(registry.snapshot(), {})
+
+    @override_settings(METRICS_SAMPLE_RATE=1, METRICS_TOKEN="s3cret")
+    def test_endpoints_require_staff_or_token(self):
+        self.client.get(reverse("catalog:products_filtered_json"))
+        self.assertEqual(self.client.get(reverse("main:metrics_json")).status_code, 403)
+        self.assertEqual(self.client.get(reverse("main:metrics_prometheus")).status_code, 403)
+
+        text = self.client.get(reverse("main:metrics_prometheus"), HTTP_AUTHORIZATION="Bearer s3cret").content.decode()
+        self.assertIn('hoophub_requests_total{endpoint="catalog:products_filtered_json"} 1', text)
+        self.assertIn('hoophub_request_duration_seconds_bucket{endpoint="catalog:products_filtered_json",le="+Inf"} 1', text)
+
+        self.client.force_login(self.staff)
+        data = json.loads(self.client.get(reverse("main:metrics_json")).content)
+        self.assertEqual(data["status"], "success")
+        self.assertIn("p99", data["endpoints"]["catalog:products_filtered_json"]["total_ms"])
+
+
+class SyntheticDataTest(TestCase):
+    SCALE = {"products": 40, "users": 10, "reviews": 120, "wishlists": 30, "carts": 5, "orders": 25, "reports": 8}
+
+    def test_generate_counts_and_consistency(self):
+        counts = generate(self.SCALE, seed=1)
+        self.assertEqual(Product.objects.count(), 40)
+        self.assertEqual(get_user_model().objects.filter(username__startswith=SYNTHETIC_PREFIX).count(), 10)
+        self.assertEqual(Review.objects.count(), 120)
+        self.assertEqual(Invoice.objects.count(), counts["orders"])
+        self.assertEqual(Report.objects.count(), 8)
+        # Agregat rating sudah dihitung ulang dari review yang dibuat
+        product = Product.objects.order_by("-review_count").first()
+        self.assertEqual(product.review_count, Review.objects.filter(product=product).count())
+        # Tanggal invoice tersebar ke belakang, bukan semuanya "sekarang"
+        self.assertGreater(Invoice.objects.dates("date", "day").count(), 5)
+
+    def test_generate_twice_does_not_collide(self):
+        generate(self.SCALE, seed=1)
+        generate(self.SCALE, seed=1)
+        self.assertEqual(get_user_model().objects.filter(username__startswith=SYNTHETIC_PREFIX).count(), 20)
+        self.assertEqual(Invoice.objects.values("invoice_no").distinct().count(), Invoice.objects.count())
+
+
+class BenchmarksTest(TestCase):
+    def test_run_with_test_client(self):
+        generate(SyntheticDataTest.SCALE, seed=2)
+        user = get_user_model().objects.filter(username__startswith=SYNTHETIC_PREFIX).first()
+        results = benchmarks.run(
+            benchmarks.ClientTransport(user), {"product": Product.objects.first().pk},
+            iterations=2, warmup=0, only={"catalog_filtered", "invoice_history"},
+        )
+        self.assertEqual(set(results), {"catalog_filtered", "invoice_history"})
+        for result in results.values():
+            self.assertEqual(result["errors"], 0)
+            self.assertGreaterEqual(result["queries"], 1)
+            self.assertIn("p99", result["latency_ms"])
+
+    def test_compare_flags_regressions(self):
+        def result(p50, queries, errors=0):
+            return {"latency_ms": {"p50": p50}, "queries": queries, "errors": errors}
+
+        baseline = {"a": result(10, 2), "b": result(0.2, 1), "c": result(5, 3)}
+        current = {"a": result(15, 2), "b": result(0.6, 1), "c": result(5, 4, errors=1)}
+        regressions = benchmarks.compare(baseline, current, tolerance=0.2)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(regressions[0].startswith("a: p50"))
+        # "b" lebih lambat 3x tapi selisihnya di bawah 1 ms, dianggap noise
+        self.assertFalse(any(r.startswith("b:") for r in regressions))
+
+
+class DatabaseConfigTest(TestCase):
+    def test_postgres_defaults_to_persistent_connections(self):
+        config = db.postgres({"DB_NAME": "hoophub", "SCHEMA": "app"})
+        self.assertEqual(config["CONN_MAX_AGE"], db.DEFAULT_CONN_MAX_AGE)
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("pool", config["OPTIONS"])
+        self.assertEqual(config["OPTIONS"]["options"], "-c search_path=app")
+
+    def test_postgres_pool_from_env(self):
+        config = db.postgres({
+            "DB_POOL": "true", "DB_POOL_MIN_SIZE": "4", "DB_POOL_MAX_SIZE": "20", "DB_POOL_TIMEOUT": "2.5",
+        })
+        self.assertEqual(config["OPTIONS"]["pool"], {"min_size": 4, "max_size": 20, "timeout": 2.5})
+        # Pool Django tidak boleh digabung dengan koneksi persisten
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+
+    def test_sqlite_uses_wal_and_immediate_transactions(self):
+        config = db.sqlite("dev.sqlite3", {"DB_CONN_MAX_AGE": "0"})
+        self.assertIn("PRAGMA journal_mode=WAL", config["OPTIONS"]["init_command"])
+        self.assertEqual(config["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+
+    def test_settings_use_db_module(self):
+        self.assertEqual(connection.settings_dict["OPTIONS"]["transaction_mode"], "IMMEDIATE")
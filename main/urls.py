@@ -1,8 +1,10 @@
 from django.urls import path
-from main.views import show_main
+from main.views import metrics_json, metrics_prometheus, show_main
 
 app_name = 'main'
 
 urlpatterns = [
-    path('', show_main, name='show_main')
-]
\ No newline at end of file
+    path('', show_main, name='show_main'),
+    path('metrics/', metrics_json, name='metrics_json'),
+    path('metrics/prometheus/', metrics_prometheus, name='metrics_prometheus'),
+]
@@ -1,5 +1,11 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from main.metrics import registry
+
 # Create your views here.
 def show_main(request):
     context = {
@@ -8,4 +14,25 @@ def show_main(request):
         'class': 'PBP A'
     }
 
-    return render(request, "main.html", context)
\ No newline at end of file
+    return render(request, "main.html", context)
+
+
+def _can_read_metrics(request):
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    # Scraper Prometheus tidak punya session, jadi boleh pakai token
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    auth = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(auth, f'Bearer {token}')
+
+
+def metrics_json(request):
+    if not _can_read_metrics(request):
+        return JsonResponse({"status": "error", "message": "Unauthorized"}, status=403)
+    return JsonResponse({"status": "success", "endpoints": registry.snapshot()})
+
+
+def metrics_prometheus(request):
+    if not _can_read_metrics(request):
+        return HttpResponse("Unauthorized\n", status=403, content_type="text/plain")
+    return HttpResponse(registry.prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -27,5 +27,12 @@ class Report(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['reporter', '-created_at'], name='report_reporter_created_idx'),
+            # Daftar report admin diurutkan dari yang terbaru
+            models.Index(fields=['-created_at'], name='report_created_idx'),
+        ]
+
     def __str__(self):
         return f"Report by {self.reporter} on {self.reported_user} - {self.get_report_type_display()}"
\ No newline at end of file
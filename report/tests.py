@@ -1,3 +1,4 @@
+import json
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
@@ -131,4 +132,26 @@ class ReportViewsTest(TestCase):
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, 302)  # should redirect after update
         self.report.refresh_from_db()
-        self.assertEqual(self.report.status, "resolved")
\ No newline at end of file
+        self.assertEqual(self.report.status, "resolved")
+
+    def test_show_json_flutter_streaming_matches_buffered(self):
+        url = reverse("report:show_json_flutter")
+        buffered = json.loads(self.client.get(url).content)
+
+        response = self.client.get(url, {"stream": "1"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), buffered)
+
+        response = self.client.get(url, HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], buffered)
+
+    async def test_show_json_flutter_under_asgi(self):
+        url = reverse("report:show_json_flutter")
+        buffered = json.loads((await self.async_client.get(url)).content)
+        self.assertTrue(buffered)
+        response = await self.async_client.get(url, {"stream": "ndjson"})
+        self.assertTrue(response.is_async)
+        lines = b"".join([chunk async for chunk in response]).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], buffered)
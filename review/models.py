@@ -11,4 +11,11 @@ class Review(models.Model):
     rating = models.IntegerField()
     
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
\ No newline at end of file
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
+
+    class Meta:
+        indexes = [
+            # Review per produk dan review milik user, terbaru dulu
+            models.Index(fields=['product', '-date'], name='review_product_date_idx'),
+            models.Index(fields=['user', '-date'], name='review_user_date_idx'),
+        ]
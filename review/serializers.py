@@ -0,0 +1,108 @@
+"""
+Serialisasi Review ke JSON tanpa N+1 query.
+
+Semua bentuk JSON dibangun dari satu query `.values()` yang sudah
+join ke user dan product (setara select_related('user', 'product')),
+jadi jumlah query tetap berapa pun banyaknya review.
+"""
+from django.http import JsonResponse
+
+from main.streaming import astreaming_json_response
+
+REVIEW_VALUES = (
+    "id", "date", "review", "rating",
+    "user__username",
+    "product_id", "product__name", "product__price", "product__image",
+)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+STREAM_CHUNK_SIZE = 500
+
+
+def review_rows(reviews):
+    return reviews.select_related("user", "product").order_by("-date", "id").values(*REVIEW_VALUES)
+
+
+def _base(row):
+    return {
+        "id": str(row["id"]),
+        "date": row["date"].strftime("%d %B %Y"),
+        "review": row["review"],
+        "rating": row["rating"],
+    }
+
+
+def review_to_dict(row):
+    """Bentuk untuk review.views.show_json / show_json_by_id."""
+    data = _base(row)
+    data["product"] = {
+        "name": row["product__name"],
+        "price": row["product__price"],
+        "image": row["product__image"],
+    }
+    return data
+
+
+def review_to_flutter_dict(row):
+    """Bentuk untuk endpoint Flutter (ada username dan product id)."""
+    data = _base(row)
+    data["user"] = row["user__username"]
+    data["product"] = {
+        "id": row["product_id"],
+        "name": row["product__name"],
+        "price": row["product__price"],
+        "image": row["product__image"],
+    }
+    return data
+
+
+def product_review_to_dict(row):
+    """Bentuk untuk catalog.views.get_reviews (review per produk)."""
+    return {
+        "id": str(row["id"]),
+        "user": row["user__username"],
+        "rating": row["rating"],
+        "review": row["review"],
+        "date": row["date"].strftime("%d %B %Y"),
+    }
+
+
+def _int_param(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def paginate(rows, request):
+    """
+    Paginasi opsional lewat ?page= (mulai dari 1) dan ?page_size= (maks 100).
+    Tanpa ?page semua baris dikembalikan seperti sebelumnya. Nilai yang
+    bukan angka diganti default masing-masing (halaman 1, DEFAULT_PAGE_SIZE).
+    Mengembalikan (rows, next_page) dengan next_page None di halaman terakhir.
+    """
+    page = request.GET.get("page")
+    if page is None:
+        return list(rows), None
+    page = max(1, _int_param(page, 1))
+    page_size = _int_param(request.GET.get("page_size"), DEFAULT_PAGE_SIZE)
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+    offset = (page - 1) * page_size
+    # Ambil satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+    rows = list(rows[offset:offset + page_size + 1])
+    return rows[:page_size], (page + 1 if len(rows) > page_size else None)
+
+
+def review_list_response(request, reviews, to_dict):
+    rows, next_page = paginate(review_rows(reviews), request)
+    response = JsonResponse([to_dict(row) for row in rows], safe=False)
+    if next_page:
+        response["X-Next-Page"] = next_page
+    return response
+
+
+def astream_review_list(request, reviews, to_dict, fmt="json"):
+    """JSON array / NDJSON yang dikirim bertahap untuk view async, tanpa menampung semua review di memori."""
+    return astreaming_json_response(request, review_rows(reviews), to_dict, fmt, chunk_size=STREAM_CHUNK_SIZE)
@@ -1,8 +1,14 @@
+from unittest import mock
+
+from django.db import connection
+from django.db.models import QuerySet
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from catalog.models import Product
 from review.models import Review
+from django.core.management import call_command
+from io import StringIO
 import json
 
 # Create your tests here.
@@ -131,4 +137,165 @@ class ReviewTest(TestCase):
             'review': 'hi'
         })
         
-        self.assertEqual(response.status_code, 404)
\ No newline at end of file
+        self.assertEqual(response.status_code, 404)
+
+class RatingAggregateTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='rater', password='password')
+        self.product = Product.objects.create(name='aggregate product', price=100, category='Shoes')
+        self.client = Client()
+        self.client.login(username='rater', password='password')
+
+    def _create(self, rating):
+        self.client.post(reverse('review:create_review', args=[self.product.pk]), {'rating': rating, 'review': 'ok'})
+        return Review.objects.filter(product=self.product).latest('date')
+
+    def test_create_edit_delete_keep_aggregate_in_sync(self):
+        first = self._create(4)
+        self._create(2)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.review_count, self.product.rating_sum), (2, 6))
+        self.assertEqual(self.product.rating, 3.0)
+
+        self.client.post(reverse('review:edit_review', args=[first.pk]), {'rating': 5, 'review': 'better'})
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.review_count, self.product.rating_sum), (2, 7))
+        self.assertEqual(self.product.rating, 3.5)
+
+        self.client.post(reverse('review:delete_review', args=[first.pk]))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.review_count, self.product.rating_sum), (1, 2))
+        self.assertEqual(self.product.rating, 2.0)
+
+    def test_deleting_last_review_resets_average(self):
+        review = self._create(5)
+        self.client.post(reverse('review:delete_review', args=[review.pk]))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.review_count, self.product.rating_sum, self.product.rating), (0, 0, 0))
+
+    def test_flutter_endpoints_update_aggregate(self):
+        self.client.post(
+            reverse('review:create_review_flutter', args=[self.product.pk]),
+            data=json.dumps({'rating': 3, 'review': 'meh'}), content_type='application/json',
+        )
+        review = Review.objects.get(product=self.product)
+        self.client.post(
+            reverse('review:edit_review_flutter', args=[review.pk]),
+            data=json.dumps({'rating': 1, 'review': 'bad'}), content_type='application/json',
+        )
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.review_count, self.product.rating_sum), (1, 1))
+
+        self.client.post(reverse('review:delete_review_flutter', args=[review.pk]))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_count, 0)
+
+    def test_edits_lock_the_review_before_reading_old_rating(self):
+        review = self._create(4)
+        locked = []
+        real = QuerySet.select_for_update
+
+        def select_for_update(qs, *args, **kwargs):
+            locked.append((qs.model, connection.in_atomic_block))
+            return real(qs, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=select_for_update):
+            self.client.post(reverse('review:edit_review', args=[review.pk]), {'rating': 2, 'review': 'meh'})
+            self.client.post(
+                reverse('review:edit_review_flutter', args=[review.pk]),
+                data=json.dumps({'rating': 3, 'review': 'ok'}), content_type='application/json',
+            )
+            self.client.post(reverse('review:delete_review_flutter', args=[review.pk]))
+        self.assertEqual(locked, [(Review, True)] * 3)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.review_count, self.product.rating_sum), (0, 0))
+
+    def test_rebuild_ratings_command(self):
+        Review.objects.create(user=self.user, product=self.product, rating=4)
+        Review.objects.create(user=self.user, product=self.product, rating=1)
+        empty = Product.objects.create(name='no reviews', price=1, category='Ball', rating=4)
+
+        call_command('rebuild_ratings', stdout=StringIO())
+
+        self.product.refresh_from_db()
+        empty.refresh_from_db()
+        self.assertEqual((self.product.review_count, self.product.rating_sum, self.product.rating), (2, 5, 2.5))
+        self.assertEqual((empty.review_count, empty.rating), (0, 0))
+
+
+class ReviewJsonQueryCountTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='counter', password='password')
+        self.client = Client()
+        self.client.login(username='counter', password='password')
+
+    def _add_reviews(self, n):
+        for i in range(n):
+            user = get_user_model().objects.create(username=f'reviewer{Review.objects.count()}')
+            product = Product.objects.create(name=f'p{i}', price=i, category='Shoes')
+            Review.objects.create(user=user, product=product, rating=1 + i % 5, review='r')
+            Review.objects.create(user=self.user, product=product, rating=5, review='mine')
+
+    def _count_queries(self, url, params=None):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+            if response.streaming:
+                body = b''.join(response.streaming_content)
+            else:
+                body = response.content
+        return len(ctx), json.loads(body)
+
+    def test_query_count_is_constant(self):
+        product = Product.objects.create(name='detail', price=1, category='Ball')
+        Review.objects.create(user=self.user, product=product, rating=3)
+        urls = [
+            (reverse('review:show_json'), None),
+            (reverse('review:show_json_flutter'), None),
+            (reverse('review:show_json_all_flutter'), None),
+            (reverse('review:show_json_all_flutter'), {'page': 1}),
+            (reverse('catalog:get_reviews', args=[product.pk]), None),
+        ]
+        small = [self._count_queries(url, params)[0] for url, params in urls]
+        self._add_reviews(15)
+        Review.objects.create(user=get_user_model().objects.create(username='other'), product=product, rating=4)
+
+        for (url, params), expected in zip(urls, small):
+            with self.subTest(url=url, params=params):
+                num_queries, data = self._count_queries(url, params)
+                self.assertEqual(num_queries, expected)
+                self.assertTrue(len(data) > 1)
+
+    def test_show_json_all_flutter_streams_every_review(self):
+        self._add_reviews(3)
+        response = self.client.get(reverse('review:show_json_all_flutter'))
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 6)
+        self.assertEqual(set(data[0]), {'id', 'user', 'date', 'review', 'rating', 'product'})
+        self.assertEqual(set(data[0]['product']), {'id', 'name', 'price', 'image'})
+
+    def test_pagination(self):
+        self._add_reviews(3)
+        url = reverse('review:show_json_flutter')
+        first = self.client.get(url, {'page': 1, 'page_size': 2})
+        self.assertEqual(len(json.loads(first.content)), 2)
+        self.assertEqual(first['X-Next-Page'], '2')
+
+        last = self.client.get(url, {'page': 2, 'page_size': 2})
+        self.assertEqual(len(json.loads(last.content)), 1)
+        self.assertFalse(last.has_header('X-Next-Page'))
+
+        # page_size yang tidak valid tidak membuang nomor halaman
+        second = self.client.get(url, {'page': 2, 'page_size': 'x'})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(json.loads(second.content), [])
+        self.assertEqual(len(json.loads(self.client.get(url, {'page': 'x', 'page_size': 2}).content)), 2)
+
+    def test_query_count_for_page(self):
+        self._add_reviews(5)
+        url = reverse('review:show_json_all_flutter')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'page': 1, 'page_size': 3})
+        self.assertEqual(len(json.loads(response.content)), 3)
@@ -1,5 +1,6 @@
 from django.urls import path
-from review.views import show_review, show_json, show_json_by_id, create_review, edit_review, delete_review, proxy_image, show_json_flutter, show_json_all_flutter, create_review_flutter, edit_review_flutter, delete_review_flutter
+from main.image_proxy import aproxy_image
+from review.views import show_review, show_json, show_json_by_id, create_review, edit_review, delete_review, show_json_flutter, show_json_all_flutter, create_review_flutter, edit_review_flutter, delete_review_flutter
 
 app_name = 'review'
 
@@ -10,7 +11,7 @@ urlpatterns = [
     path('create/<int:id>/', create_review, name='create_review'),
     path('edit/<uuid:review_id>/', edit_review, name='edit_review'),
     path('delete/<uuid:review_id>/', delete_review, name='delete_review'),
-    path('proxy-image/', proxy_image, name='proxy_image'),
+    path('proxy-image/', aproxy_image, name='proxy_image'),
     path('json-flutter/', show_json_flutter, name='show_json_flutter'),
     path('json-all-flutter/', show_json_all_flutter, name='show_json_all_flutter'),
     path('create-flutter/<int:id>/', create_review_flutter, name='create_review_flutter'),
@@ -1,12 +1,16 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from review.models import Review
 from review.forms import ReviewForm
+from review.serializers import astream_review_list, review_list_response, review_rows, review_to_dict, review_to_flutter_dict
 from catalog.models import Product
+from catalog.ratings import apply_review_change
+from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
-import requests
+from main.streaming import stream_format
 import json
 
 # Create your views here.
@@ -29,41 +33,17 @@ def show_json(request):
         reviews = Review.objects.all()
     else:
         reviews = Review.objects.filter(user=request.user)
-    data = [
-        {
-            'id': str(review.id),
-            'date': review.date.strftime("%d %B %Y"),
-            'review': review.review,
-            'rating': review.rating,
-            'product': {
-                'name': review.product.name,
-                'price': review.product.price,
-                'image': review.product.image
-            }
-        }
-        for review in reviews
-    ]
-    return JsonResponse(data, safe=False)
+    return review_list_response(request, reviews, review_to_dict)
 
 @login_required(login_url="authentication:login")
 def show_json_by_id(request, review_id):
     try:
         if request.user.username.lower() == 'admin':
-            review = Review.objects.get(pk=review_id)
+            reviews = Review.objects.all()
         else:
-            review = Review.objects.filter(user=request.user).get(pk=review_id)
-        data = {
-            'id': str(review.id),
-            'date': review.date.strftime("%d %B %Y"),
-            'review': review.review,
-            'rating': review.rating,
-            'product': {
-                'name': review.product.name,
-                'price': review.product.price,
-                'image': review.product.image
-            }
-        }
-        return JsonResponse(data)
+            reviews = Review.objects.filter(user=request.user)
+        row = review_rows(reviews).get(pk=review_id)
+        return JsonResponse(review_to_dict(row))
     except Review.DoesNotExist:
        return JsonResponse({'detail': 'Not found'}, status=404)
 
@@ -77,7 +57,9 @@ def create_review(request, id):
             review = form.save(commit=False)
             review.user = request.user
             review.product = product
-            review.save()
+            with transaction.atomic():
+                review.save()
+                apply_review_change(product.pk, 1, review.rating)
             return JsonResponse({'status': 'success', 'message': 'Review added!'})
         else:
             return JsonResponse({'status': 'error', 'errors': form.errors}, status=400)
@@ -86,52 +68,44 @@ def create_review(request, id):
     context = {'form': form}
     return render(request, "review.html", context)
 
+def _locked_reviews(request):
+    """
+    Review yang boleh diubah user ini, dikunci sampai transaksi selesai
+    (panggil di dalam transaction.atomic), supaya rating lama yang dipakai
+    apply_review_change selalu yang terbaru.
+    """
+    reviews = Review.objects.select_for_update()
+    if request.user.username.lower() == 'admin':
+        return reviews
+    return reviews.filter(user=request.user)
+
 @require_POST
 @login_required(login_url="authentication:login")
 def edit_review(request, review_id):
-    if request.user.username.lower() == 'admin':
-        review = get_object_or_404(Review, pk=review_id)
-    else:
-        review = get_object_or_404(Review, pk=review_id, user=request.user)
-    form = ReviewForm(request.POST or None, instance=review)
+    with transaction.atomic():
+        review = get_object_or_404(_locked_reviews(request), pk=review_id)
+        old_rating = review.rating
+        form = ReviewForm(request.POST or None, instance=review)
 
-    if form.is_valid() and request.method == 'POST':
-        form.save()
-        return JsonResponse({'status': 'success', 'message': 'Review updated!'})
-    else:
-        return JsonResponse({'status': 'error', 'errors': form.errors}, status=400)
+        if form.is_valid() and request.method == 'POST':
+            form.save()
+            apply_review_change(review.product_id, 0, review.rating - old_rating)
+            return JsonResponse({'status': 'success', 'message': 'Review updated!'})
+        else:
+            return JsonResponse({'status': 'error', 'errors': form.errors}, status=400)
     
 @require_POST
 @login_required(login_url="authentication:login")
 def delete_review(request, review_id):
     try:
-        if request.user.username.lower() == 'admin':
-            review = get_object_or_404(Review, pk=review_id)
-        else:
-            review = get_object_or_404(Review, pk=review_id, user=request.user)
-        review.delete()
+        with transaction.atomic():
+            review = get_object_or_404(_locked_reviews(request), pk=review_id)
+            review.delete()
+            apply_review_change(review.product_id, -1, -review.rating)
         return JsonResponse({'status':'success', 'message':'Review deleted!'})
     except Exception as e:
         return JsonResponse({'status':'error', 'message':str(e)})
     
-def proxy_image(request):
-    image_url = request.GET.get('url')
-    if not image_url:
-        return HttpResponse('No URL provided', status=400)
-    
-    try:
-        # Fetch image from external source
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        
-        # Return the image with proper content type
-        return HttpResponse(
-            response.content,
-            content_type=response.headers.get('Content-Type', 'image/jpeg')
-        )
-    except requests.RequestException as e:
-        return HttpResponse(f'Error fetching image: {str(e)}', status=500)
-    
 @csrf_exempt
 def show_json_flutter(request):
     if not request.user.is_authenticated:
@@ -141,44 +115,14 @@ def show_json_flutter(request):
         reviews = Review.objects.all()
     else:
         reviews = Review.objects.filter(user=request.user)
-    data = [
-        {
-            'id': str(review.id),
-            'user': review.user.username,
-            'date': review.date.strftime("%d %B %Y"),
-            'review': review.review,
-            'rating': review.rating,
-            'product': {
-                'id': review.product.id,
-                'name': review.product.name,
-                'price': review.product.price,
-                'image': review.product.image
-            }
-        }
-        for review in reviews
-    ]
-    return JsonResponse(data, safe=False)
+    return review_list_response(request, reviews, review_to_flutter_dict)
 
 @csrf_exempt
-def show_json_all_flutter(request):
+async def show_json_all_flutter(request):
     reviews = Review.objects.all()
-    data = [
-        {
-            'id': str(review.id),
-            'user': review.user.username,
-            'date': review.date.strftime("%d %B %Y"),
-            'review': review.review,
-            'rating': review.rating,
-            'product': {
-                'id': review.product.id,
-                'name': review.product.name,
-                'price': review.product.price,
-                'image': review.product.image
-            }
-        }
-        for review in reviews
-    ]
-    return JsonResponse(data, safe=False)
+    if 'page' in request.GET:
+        return await sync_to_async(review_list_response)(request, reviews, review_to_flutter_dict)
+    return astream_review_list(request, reviews, review_to_flutter_dict, stream_format(request) or "json")
 
 @login_required
 @csrf_exempt
@@ -206,7 +150,9 @@ def create_review_flutter(request, id):
                 review=review_text,
                 rating=rating,
             )
-            new_review.save()
+            with transaction.atomic():
+                new_review.save()
+                apply_review_change(product.pk, 1, rating)
 
             return JsonResponse({"status": "success", "message": "Review successfully added"}, status=200)
         except Product.DoesNotExist:
@@ -219,27 +165,26 @@ def create_review_flutter(request, id):
 def edit_review_flutter(request, review_id):
     if request.method == 'POST':
         try:
-            if request.user.username.lower() == 'admin':
-                review = Review.objects.get(pk=review_id)
-            else:
-                review = Review.objects.get(pk=review_id, user=request.user)
-            
             data = json.loads(request.body)
+            with transaction.atomic():
+                review = _locked_reviews(request).get(pk=review_id)
 
-            review_text = data.get("review", "")
-            rating_val = data.get("rating", review.rating)
-            
-            try:
-                rating = int(rating_val)
-            except ValueError:
-                return JsonResponse({"status": "error", "message": "Rating must be a valid number"}, status=400)
+                review_text = data.get("review", "")
+                rating_val = data.get("rating", review.rating)
 
-            if rating < 1 or rating > 5:
-                return JsonResponse({"status": "error", "message": "Rating must be between 1 and 5"}, status=400)
-            
-            review.review = review_text
-            review.rating = rating
-            review.save()
+                try:
+                    rating = int(rating_val)
+                except ValueError:
+                    return JsonResponse({"status": "error", "message": "Rating must be a valid number"}, status=400)
+
+                if rating < 1 or rating > 5:
+                    return JsonResponse({"status": "error", "message": "Rating must be between 1 and 5"}, status=400)
+
+                old_rating = review.rating
+                review.review = review_text
+                review.rating = rating
+                review.save()
+                apply_review_change(review.product_id, 0, rating - old_rating)
             
             return JsonResponse({"status": "success", "message": "Review successfully updated"}, status=200)
         except Review.DoesNotExist:
@@ -252,12 +197,10 @@ def edit_review_flutter(request, review_id):
 def delete_review_flutter(request, review_id):
     if request.method == 'POST':
         try:
-            if request.user.username.lower() == 'admin':
-                review = Review.objects.get(pk=review_id)
-            else:
-                review = Review.objects.get(pk=review_id, user=request.user)
-            
-            review.delete()
+            with transaction.atomic():
+                review = _locked_reviews(request).get(pk=review_id)
+                review.delete()
+                apply_review_change(review.product_id, -1, -review.rating)
             return JsonResponse({"status": "success", "message": "Review successfully deleted"}, status=200)
         except Review.DoesNotExist:
             return JsonResponse({"status": "error", "message": "Review not found"}, status=404)